@@ -0,0 +1,72 @@
+"""Commands/sec of the bot's update handling with simulated users.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_bot_concurrency --users 1000 --commands 5 --latency-ms 20
+
+Each simulated user sends a burst of commands. Updates go through
+Application.process_update, wrapped by the update processor the same way
+the Application's update fetcher does it. The handler sleeps for
+--latency-ms to stand in for a DB round-trip, then replies through a local
+fake Telegram Bot API. The sequential default processor is compared with
+PerUserUpdateProcessor, and per-user ordering is checked.
+"""
+import argparse
+import asyncio
+import time
+from telegram import Update
+from telegram.ext import Application, CommandHandler, SimpleUpdateProcessor
+
+from fake_services import make_update, serve, FakeTelegramApi
+from update_processor import PerUserUpdateProcessor
+
+
+async def run(processor, args, api_url) -> tuple[float, bool]:
+    seen: dict[int, list[int]] = {}
+
+    async def handler(update, context):
+        await asyncio.sleep(args.latency_ms / 1000)
+        seen.setdefault(update.effective_user.id, []).append(update.update_id)
+        await update.message.reply_text("ok")
+
+    application = (
+        Application.builder().token("123456:BENCH").base_url(f"{api_url}/bot")
+        .concurrent_updates(processor).build()
+    )
+    application.add_handler(CommandHandler("status", handler))
+    await application.initialize()
+    updates = [
+        Update.de_json(make_update(i * args.users + user, "/status", user_id=user), application.bot)
+        for i in range(args.commands) for user in range(1, args.users + 1)
+    ]
+    start = time.perf_counter()
+    # Mirrors Application._update_fetcher: one task per update, bounded by the processor
+    await asyncio.gather(*(processor.process_update(u, application.process_update(u)) for u in updates))
+    elapsed = time.perf_counter() - start
+    await application.shutdown()
+    in_order = all(ids == sorted(ids) for ids in seen.values())
+    return len(updates) / elapsed, in_order
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--commands", type=int, default=5, help="commands per user")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    runner, api_url = await serve(FakeTelegramApi().app())
+    try:
+        print(f"{args.users} users x {args.commands} commands, {args.latency_ms:.0f} ms per handler")
+        # The sequential run is capped so it finishes in reasonable time
+        seq_args = argparse.Namespace(**{**vars(args), "users": min(args.users, 100)})
+        rate, _ = await run(SimpleUpdateProcessor(1), seq_args, api_url)
+        print(f"sequential (default)          {rate:10.1f} commands/s  ({seq_args.users} users)")
+        rate, in_order = await run(PerUserUpdateProcessor(args.concurrency), args, api_url)
+        print(f"per-user, {args.concurrency:4d} concurrent     {rate:10.1f} commands/s  per-user order kept: {in_order}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""End-to-end copy throughput against local fakes of every upstream service.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_e2e --wallets 10 --subscribers 20 --rate 5 --duration 10
+
+Starts fake Polymarket data API, CLOB and Telegram Bot API servers. A
+throwaway SQLite database gets `--subscribers` users who each follow all
+`--wallets` wallets. Then poll_trades -> queue -> trade_execution_worker runs
+while the data API produces `--rate` source trades per second; each trade
+is copied once per subscriber. Reports copies/sec, per-stage latencies from
+metrics (including event-loop lag), DB writes/sec and peak memory.
+`--uvloop` runs it on uvloop; benchmarks/bench_loop.py compares the two.
+`--backend simulated` sends orders to simulator.SimulatedExchange (with
+`--clob-latency-ms` as its latency) instead of the fake CLOB.
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import time
+
+from benchmarks.bench_startup import PLACEHOLDER_KEY
+
+os.environ.setdefault("ENCRYPTION_KEY", PLACEHOLDER_KEY)
+
+from sqlalchemy import event, insert
+from telegram import Bot
+
+import database
+import executor
+import metrics
+import poller
+import simulator
+from loop_monitor import LoopMonitor, install_event_loop_policy
+from database import AsyncSessionLocal, User, UserKeys, SourceTrader, Subscription
+from fake_services import serve, FakeDataApi, FakeClob, FakeClobClient, FakeTelegramApi
+from security import encrypt_data
+
+STAGES = ("poll_fetch", "poll_cycle", "queue_wait", "order_post", "execute", "net_flush", "end_to_end", "loop_lag")
+
+
+async def seed(wallets: list[str], subscribers: int, amount: float) -> None:
+    key = encrypt_data("bench")
+    async with AsyncSessionLocal() as session:
+        users = range(1, subscribers + 1)
+        await session.execute(insert(User), [{"telegram_user_id": u, "username": f"user{u}"} for u in users])
+        await session.execute(insert(UserKeys), [
+            {"user_id": u, "api_key": key, "api_secret": key, "api_passphrase": key} for u in users])
+        if wallets:
+            # A cursor of 0: every generated trade is new activity, not history to skip
+            await session.execute(insert(SourceTrader), [
+                {"id": i, "wallet_address": w, "last_seen_trade_timestamp": 0} for i, w in enumerate(wallets, 1)])
+            await session.execute(insert(Subscription), [
+                {"user_id": u, "subscription_type": "WALLET", "trader_id": t, "trade_amount_usdc": amount, "active": True}
+                for u in users for t in range(1, len(wallets) + 1)])
+        await session.commit()
+
+
+def count_writes(sync_engine) -> dict:
+    """Count INSERT/UPDATE/DELETE statements and rows sent to the database from now on."""
+    counts = {"statements": 0, "rows": 0}
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            counts["statements"] += 1
+            counts["rows"] += len(parameters) if executemany else 1
+
+    return counts
+
+
+async def run(args) -> dict:
+    wallets = [f"0x{i:040x}" for i in range(1, args.wallets + 1)]
+    data_api = FakeDataApi(wallets, markets=args.markets)
+    clob = FakeClob(latency=args.clob_latency_ms / 1000)
+    telegram_api = FakeTelegramApi()
+    runners, urls = [], []
+    for fake in (data_api, clob, telegram_api):
+        runner, url = await serve(fake.app())
+        runners.append(runner)
+        urls.append(url)
+    data_url, clob_url, telegram_url = urls
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_URL = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        engine = database.get_engine()
+        await database.init_db()
+        await seed(wallets, args.subscribers, args.amount)
+        writes = count_writes(engine.sync_engine)
+
+        poller.POLY_API = f"{data_url}/activity"
+        poller.POLL_INTERVAL = args.poll_interval
+        executor.ClobClient = FakeClobClient
+        executor.CLOB_HOST = clob_url
+        executor.order_netter.window = args.netting_window_ms / 1000
+        executor.EXECUTION_BACKEND = args.backend
+        simulator._exchange = simulator.SimulatedExchange(source="synthetic", latency=args.clob_latency_ms / 1000)
+        bot = Bot("123456:BENCH", base_url=f"{telegram_url}/bot")
+        await bot.initialize()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = [asyncio.create_task(poller.poll_trades(queue))]
+        tasks += [asyncio.create_task(executor.trade_execution_worker(queue, bot)) for _ in range(args.workers)]
+        monitor = LoopMonitor(interval=0.01, warn_ms=float("inf"))
+        tasks.append(asyncio.create_task(monitor.run()))
+        start = time.perf_counter()
+        generated = await data_api.generate(args.rate, args.duration)
+        expected = generated * args.subscribers
+        copied = metrics.histogram("end_to_end")
+        deadline = time.monotonic() + args.drain_timeout
+        while copied.count < expected and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await bot.shutdown()
+        for runner in runners:
+            await runner.cleanup()
+        await engine.dispose()
+
+    latency = metrics.snapshot()["latency"]
+    print(f"{monitor.loop_name}: {args.wallets} wallets x {args.subscribers} subscribers, {args.rate:g} trades/s for {args.duration:g}s, "
+          f"{args.workers} workers, poll every {args.poll_interval:g}s")
+    print(f"source trades  {generated:8d}  ({data_api.requests} data API requests)")
+    print(f"copies         {copied.count:8d} of {expected}  in {elapsed:.1f}s  -> {copied.count / elapsed:10.1f} copies/s")
+    orders = len(clob.orders) if args.backend == "clob" else simulator._exchange.counts["orders"]
+    print(f"orders posted  {orders:8d}   in {clob.requests} CLOB requests, telegram messages {len(telegram_api.sent)}")
+    print(f"DB writes      {writes['statements'] / elapsed:10.1f} statements/s  {writes['rows'] / elapsed:10.1f} rows/s")
+    print(f"peak RSS       {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:8.1f} MB")
+    print(f"{'stage':<12}{'count':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage in STAGES:
+        s = latency.get(stage)
+        if s:
+            print(f"{stage:<12}{s['count']:>9}{s['p50_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+    return {"loop": monitor.loop_name, "copies": copied.count, "expected": expected, "elapsed": elapsed,
+            "data_api_requests": data_api.requests, "latency": latency}
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wallets", type=int, default=10)
+    parser.add_argument("--subscribers", type=int, default=20, help="users, each following every wallet")
+    parser.add_argument("--rate", type=float, default=5.0, help="source trades per second across all wallets")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of trade generation")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument("--markets", type=int, default=20)
+    parser.add_argument("--amount", type=float, default=10.0, help="USDC per copy")
+    parser.add_argument("--clob-latency-ms", type=float, default=5.0)
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="seconds to wait for queued copies")
+    parser.add_argument("--netting-window-ms", type=float, default=0.0,
+                        help="net and batch each user's orders over this window (ORDER_NETTING_WINDOW_MS)")
+    parser.add_argument("--backend", choices=("clob", "simulated"), default="clob",
+                        help="clob: fake CLOB over HTTP; simulated: in-process simulated exchange")
+    parser.add_argument("--uvloop", action="store_true", help="run on uvloop instead of asyncio")
+    return parser
+
+
+def main():
+    args = parser().parse_args()
+    install_event_loop_policy(args.uvloop)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
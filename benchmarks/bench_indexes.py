@@ -0,0 +1,108 @@
+"""Query plans and timings for the hot-path queries before and after migration 1.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_indexes --rows 10000000
+
+Builds a throwaway SQLite database with the pre-index schema, fills
+trade_log/subscription with synthetic rows, then runs the queries issued by
+log_and_notify, /status and poll_trades before and after the migration.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateTable
+
+from database import Base
+from migrations import MIGRATIONS
+
+QUERIES = {
+    "log_and_notify lookup": (
+        "SELECT id FROM trade_log WHERE subscription_id = ? AND source_trade_hash = ?",
+        lambda r, a: (r.randint(1, a.subs), f"0x{r.randrange(a.rows):x}"),
+    ),
+    "/status latest 5": (
+        "SELECT id FROM trade_log WHERE subscription_id IN (?, ?, ?) ORDER BY created_at DESC LIMIT 5",
+        lambda r, a: tuple(r.randint(1, a.subs) for _ in range(3)),
+    ),
+    "poller wallet followers": (
+        "SELECT id, user_id, trade_amount_usdc FROM subscription WHERE trader_id = ? AND active = 1",
+        lambda r, a: (r.randint(1, a.traders),),
+    ),
+    "poller TOP_PNL_1 followers": (
+        "SELECT id, user_id, trade_amount_usdc FROM subscription WHERE subscription_type = 'TOP_PNL_1' AND active = 1",
+        lambda r, a: (),
+    ),
+}
+
+
+def build(conn, args):
+    for table in ("user", "source_trader", "subscription", "trade_log"):
+        conn.execute(str(CreateTable(Base.metadata.tables[table]).compile(dialect=sqlite.dialect())))
+    rnd = random.Random(1)
+    subs = []
+    for sub_id in range(1, args.subs + 1):
+        top = sub_id % 10 == 0
+        subs.append((sub_id, sub_id, "TOP_PNL_1" if top else "WALLET",
+                     None if top else rnd.randint(1, args.traders), 10.0, rnd.random() < 0.8))
+    conn.executemany("INSERT INTO subscription (id, user_id, subscription_type, trader_id, trade_amount_usdc, active) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", subs)
+    start = time.perf_counter()
+    epoch = datetime(2025, 1, 1)
+    batch = 200_000
+    for offset in range(0, args.rows, batch):
+        conn.executemany(
+            "INSERT INTO trade_log (subscription_id, source_trade_hash, source_market_id, source_outcome_index, "
+            "source_side, copy_trade_status, created_at) VALUES (?, ?, 'mkt', 0, 'BUY', 'SUCCESS', ?)",
+            ((rnd.randint(1, args.subs), f"0x{i:x}", (epoch + timedelta(seconds=i)).isoformat(" "))
+             for i in range(offset, min(offset + batch, args.rows))))
+    conn.commit()
+    print(f"Loaded {args.rows:,} trade_log rows in {time.perf_counter() - start:.1f}s")
+
+
+def run_queries(conn, args, label, repeat):
+    print(f"\n== {label} ==")
+    rnd = random.Random(2)
+    for name, (sql, params) in QUERIES.items():
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params(rnd, args)).fetchall()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            conn.execute(sql, params(rnd, args)).fetchall()
+        ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"{name:28s} {ms:10.3f} ms/query   plan: {' | '.join(row[-1] for row in plan)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--subs", type=int, default=50_000)
+    parser.add_argument("--traders", type=int, default=5_000)
+    parser.add_argument("--repeat-before", type=int, default=5)
+    parser.add_argument("--repeat-after", type=int, default=2_000)
+    parser.add_argument("--db", help="SQLite file to use (default: temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+    conn = sqlite3.connect(path)
+    try:
+        build(conn, args)
+        run_queries(conn, args, "before migration", args.repeat_before)
+        start = time.perf_counter()
+        for statement in dict((v, stmts) for v, _, stmts in MIGRATIONS)[1]:
+            conn.execute(statement)
+        conn.execute("ANALYZE")
+        conn.commit()
+        print(f"\nMigrations applied in {time.perf_counter() - start:.1f}s")
+        run_queries(conn, args, "after migration", args.repeat_after)
+    finally:
+        conn.close()
+        if not args.db:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
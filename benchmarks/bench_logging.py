@@ -0,0 +1,127 @@
+"""Event-loop blocking caused by logging: print, a direct handler, and log_config's queue.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_logging --rate 2000 --seconds 3 --write-latency-ms 0.2
+
+A coroutine logs `--rate` records per second for `--seconds` while a probe
+measures how late asyncio.sleep(1 ms) wakes up. A second workload runs SQLite
+queries with SQL statement logging on. The sink is a stream whose write()
+sleeps `--write-latency-ms`, standing in for a slow console or log pipe.
+Modes:
+  print   print() to the sink, as poller/leaderboard used to
+  direct  StreamHandler on the root logger (basicConfig, or echo=True for SQL)
+  queue   setup_logging(): QueueHandler plus a listener thread, sampling off
+  sampled setup_logging() with the default LOG_SAMPLE_BURST
+  off     no logging, as a baseline
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import log_config
+
+logger = logging.getLogger("poller")
+
+
+class SlowStream(io.TextIOBase):
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.writes = 0
+
+    def write(self, s):
+        time.sleep(self.latency)
+        self.writes += 1
+        return len(s)
+
+
+async def probe(lags: list[float], interval: float = 0.001) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+def configure(mode: str, sink: SlowStream, sql: bool):
+    root = logging.getLogger()
+    root.handlers[:] = []
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if sql and mode != "off" else logging.WARNING)
+    if mode == "direct":
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(log_config.JsonFormatter())
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    elif mode in ("queue", "sampled"):
+        listener = log_config.setup_logging(sink)
+        if mode == "queue":
+            root.handlers[0].filters[0].burst = 0  # every record goes through
+        return listener
+    return None
+
+
+async def log_workload(mode: str, sink: SlowStream, args) -> int:
+    n = int(args.rate * args.seconds)
+    for i in range(n):
+        if mode == "print":
+            print(f"[trades] Error for 0x{i:040x}, status 500", file=sink)
+        elif mode != "off":
+            logger.warning("Activity request for %s failed with status %s", f"0x{i:040x}", 500)
+        if i % 10 == 9:
+            await asyncio.sleep(10 / args.rate)
+    return n
+
+
+async def sql_workload(mode: str, sink: SlowStream, args) -> int:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    n = int(args.rate * args.seconds / 10)
+    async with engine.connect() as conn:
+        for i in range(n):
+            await conn.execute(text("SELECT :i"), {"i": i})
+    await engine.dispose()
+    return n
+
+
+async def measure(workload, mode: str, args) -> dict:
+    sink = SlowStream(args.write_latency_ms / 1000)
+    listener = configure(mode, sink, sql=workload is sql_workload)
+    lags: list[float] = []
+    task = asyncio.create_task(probe(lags))
+    start = time.perf_counter()
+    count = await workload(mode, sink, args)
+    elapsed = time.perf_counter() - start
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    if listener is not None:
+        listener.stop()
+    logging.getLogger().handlers[:] = []
+    lags.sort()
+    return {"rate": count / elapsed, "p50": statistics.median(lags) * 1000,
+            "p99": lags[int(len(lags) * 0.99)] * 1000, "max": lags[-1] * 1000,
+            "blocked": sum(l for l in lags if l > 0.001) / elapsed * 100, "writes": sink.writes}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=2000, help="log records per second")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--write-latency-ms", type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{'workload':<10}{'mode':<8}{'ops/s':>10}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}{'blocked %':>11}{'writes':>8}")
+    for name, workload, modes in (("log", log_workload, ("off", "print", "direct", "queue", "sampled")),
+                                  ("sql", sql_workload, ("off", "direct", "queue"))):
+        for mode in modes:
+            r = await measure(workload, mode, args)
+            print(f"{name:<10}{mode:<8}{r['rate']:>10.0f}{r['p50']:>9.2f}ms{r['p99']:>8.2f}ms{r['max']:>8.2f}ms"
+                  f"{r['blocked']:>10.1f}%{r['writes']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""Poller and executor throughput on the default asyncio loop vs uvloop.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_loop --wallets 10 --subscribers 20 --rate 10 --duration 5
+
+Runs the bench_e2e pipeline (fake data API, CLOB and Telegram, SQLite) once
+per loop implementation, each in a fresh process so metrics and imports do
+not carry over. Defaults keep the executors saturated, so copies/sec is
+bounded by the loop rather than the trade rate. Takes every bench_e2e option.
+"""
+import multiprocessing
+
+from benchmarks import bench_e2e
+
+STAGES = ("poll_cycle", "queue_wait", "execute", "end_to_end", "loop_lag")
+
+
+def _run(use_uvloop: bool, argv: list[str], results) -> None:
+    import asyncio
+    from loop_monitor import install_event_loop_policy
+
+    args = bench_e2e.parser().parse_args(argv)
+    install_event_loop_policy(use_uvloop)
+    results.put(asyncio.run(bench_e2e.run(args)))
+
+
+def main():
+    parser = bench_e2e.parser()
+    parser.description = __doc__
+    parser.set_defaults(wallets=10, subscribers=20, rate=10.0, duration=5.0, workers=8, clob_latency_ms=1.0)
+    args, _ = parser.parse_known_args()
+    argv = [f"--{k.replace('_', '-')}={v}" for k, v in vars(args).items() if k != "uvloop"]
+    try:
+        import uvloop  # noqa: F401
+        loops = (False, True)
+    except ImportError:
+        print("uvloop is not installed (pip install uvloop); measuring asyncio only")
+        loops = (False,)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for use_uvloop in loops:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run, args=(use_uvloop, argv, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+        print()
+
+    print(f"{'loop':<10}{'copies/s':>10}" + "".join(f"{s + ' p99':>16}" for s in STAGES))
+    for r in results:
+        row = "".join(f"{r['latency'].get(s, {}).get('p99_ms', 0):>14.2f}ms" for s in STAGES)
+        print(f"{r['loop'].split('.')[0]:<10}{r['copies'] / r['elapsed']:>10.1f}{row}")
+
+
+if __name__ == "__main__":
+    main()
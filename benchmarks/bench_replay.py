@@ -0,0 +1,121 @@
+"""Replay a recorded (or synthetic) burst through fan-out and the executor queue.
+
+Usage (from the repo root):
+    python replay.py burst --wallet 0x000000000000000000000000000000000000beef --trades 40 --seconds 60 --top-pnl burst.ndjson.gz
+    python -m benchmarks.bench_replay burst.ndjson.gz --speed 10 --subscribers 200
+
+A throwaway SQLite database gets `--subscribers` users who follow every
+recorded wallet (and the top PNL trader when the recording names one). The
+recording is fed into poller.ingest_activity at `--speed` times real time
+while executors copy against local fake CLOB and Telegram servers. Reports
+the queue depth over time, the drain time after the last event, and stage
+latencies.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.bench_startup import PLACEHOLDER_KEY
+
+os.environ.setdefault("ENCRYPTION_KEY", PLACEHOLDER_KEY)
+
+from sqlalchemy import insert
+from telegram import Bot
+
+import database
+import executor
+import metrics
+from benchmarks.bench_e2e import seed, count_writes, STAGES
+from database import AsyncSessionLocal, Subscription
+from fake_services import serve, FakeClob, FakeClobClient, FakeTelegramApi
+from replay import read_recording, replay
+
+
+async def sample_depth(queue: asyncio.Queue, samples: list[tuple[float, int]], every: float = 0.05) -> None:
+    start = time.monotonic()
+    while True:
+        samples.append((time.monotonic() - start, queue.qsize()))
+        await asyncio.sleep(every)
+
+
+async def run(args) -> None:
+    header, events = read_recording(args.recording)
+    wallets = [w for w in header["wallets"] if w != header.get("top_pnl_wallet")]
+    clob = FakeClob(latency=args.clob_latency_ms / 1000)
+    telegram_api = FakeTelegramApi()
+    clob_runner, clob_url = await serve(clob.app())
+    telegram_runner, telegram_url = await serve(telegram_api.app())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_URL = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        engine = database.get_engine()
+        await database.init_db()
+        await seed(wallets, args.subscribers, args.amount)
+        if header.get("top_pnl_wallet"):
+            async with AsyncSessionLocal() as session:
+                await session.execute(insert(Subscription), [
+                    {"user_id": u, "subscription_type": "TOP_PNL_1", "trader_id": None,
+                     "trade_amount_usdc": args.amount, "active": True}
+                    for u in range(1, args.subscribers + 1)])
+                await session.commit()
+        writes = count_writes(engine.sync_engine)
+
+        executor.ClobClient = FakeClobClient
+        executor.CLOB_HOST = clob_url
+        bot = Bot("123456:BENCH", base_url=f"{telegram_url}/bot")
+        await bot.initialize()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        samples: list[tuple[float, int]] = []
+        tasks = [asyncio.create_task(sample_depth(queue, samples))]
+        tasks += [asyncio.create_task(executor.trade_execution_worker(queue, bot)) for _ in range(args.workers)]
+        start = time.perf_counter()
+        stats = await replay(args.recording, queue, args.speed)
+        fed = time.perf_counter()
+        await asyncio.wait_for(queue.join(), args.drain_timeout)
+        done = time.perf_counter()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await bot.shutdown()
+        await clob_runner.cleanup()
+        await telegram_runner.cleanup()
+        await engine.dispose()
+
+    copies = metrics.histogram("end_to_end").count
+    span = events[-1]["t"] if events else 0.0
+    print(f"{args.recording}: {stats['trades']} trades in {stats['events']} events over {span:g}s, "
+          f"replayed at {args.speed:g}x to {args.subscribers} subscribers, {args.workers} workers")
+    print(f"feed {fed - start:6.2f}s   drain after last event {done - fed:6.2f}s   "
+          f"copies {copies} ({copies / (done - start):.1f}/s)   orders {len(clob.orders)}")
+    print(f"DB writes {writes['statements']} statements, {writes['rows']} rows")
+    peak = max(samples, key=lambda s: s[1], default=(0.0, 0))
+    print(f"queue depth: peak {peak[1]} fan-out jobs at {peak[0]:.2f}s")
+    step = max(1, len(samples) // 20)
+    for t, depth in samples[::step]:
+        print(f"    {t:7.2f}s {depth:6d} {'#' * min(depth, 60)}")
+    latency = metrics.snapshot()["latency"]
+    print(f"{'stage':<12}{'count':>9}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage in STAGES:
+        s = latency.get(stage)
+        if s:
+            print(f"{stage:<12}{s['count']:>9}{s['p50_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="file written by `replay.py record` or `replay.py burst`")
+    parser.add_argument("--speed", type=float, default=10.0, help="replay speed, 1 = real time (1-100)")
+    parser.add_argument("--subscribers", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--amount", type=float, default=10.0, help="USDC per copy")
+    parser.add_argument("--clob-latency-ms", type=float, default=5.0)
+    parser.add_argument("--drain-timeout", type=float, default=600.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Cold import time of the bot's entry modules, measured with `python -X importtime`.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_startup --module main --top 15
+
+Each module is imported in a fresh interpreter. The report shows the
+cumulative time of the module, its heaviest direct imports, and whether the
+dependencies that should load lazily (DEFERRED_MODULES) stayed unloaded.
+test_startup.py checks `import main` against STARTUP_BUDGET_MS.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Generous on purpose: it should catch an eager py_clob_client or similar, not machine noise
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "2000"))
+# Loaded on first use; importing main must not pull them in
+DEFERRED_MODULES = ("py_clob_client",)
+# security.py refuses to import without a key; any valid Fernet key will do
+PLACEHOLDER_KEY = "A" * 43 + "="
+
+
+def measure_imports(module: str) -> list[tuple[int, int, str]]:
+    """Import `module` in a fresh interpreter. Returns (depth, cumulative_us, name) per imported module."""
+    env = {**os.environ, "ENCRYPTION_KEY": os.environ.get("ENCRYPTION_KEY") or PLACEHOLDER_KEY}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, check=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        stripped = name.rstrip().lstrip(" ")
+        depth = (len(name.rstrip()) - len(stripped) - 1) // 2
+        entries.append((depth, int(cumulative), stripped))
+    return entries
+
+
+def cumulative_ms(entries, module: str) -> float:
+    return next(us for depth, us, name in entries if depth == 0 and name == module) / 1000
+
+
+def direct_imports(entries, module: str) -> list[tuple[int, str]]:
+    """(cumulative_us, name) of the modules `module` imported itself, heaviest first."""
+    index = next(i for i, (depth, _, name) in enumerate(entries) if depth == 0 and name == module)
+    children = []
+    # importtime prints children before their parent
+    for depth, us, name in reversed(entries[:index]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((us, name))
+    return sorted(children, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="module to import (repeatable, default: main)")
+    parser.add_argument("--top", type=int, default=10, help="direct imports to list per module")
+    args = parser.parse_args()
+
+    for module in args.module or ["main"]:
+        start = time.perf_counter()
+        entries = measure_imports(module)
+        wall_ms = (time.perf_counter() - start) * 1000
+        names = {name for _, _, name in entries}
+        print(f"import {module}: {cumulative_ms(entries, module):8.1f} ms "
+              f"(interpreter wall {wall_ms:.0f} ms, {len(entries)} modules, budget {STARTUP_BUDGET_MS:.0f} ms)")
+        for us, name in direct_imports(entries, module)[:args.top]:
+            print(f"    {us / 1000:8.1f} ms  {name}")
+        for deferred in DEFERRED_MODULES:
+            print(f"    {deferred}: {'LOADED' if deferred in names else 'deferred'}")
+
+
+if __name__ == "__main__":
+    main()
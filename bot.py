@@ -1,19 +1,53 @@
 import logging
+import os
 from telegram import Update
 from telegram.ext import (
     Application, CommandHandler, ConversationHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
 )
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 import asyncio
-from database import AsyncSessionLocal, User, UserKeys, SourceTrader, Subscription, TradeLog, init_db
+from database import (
+    AsyncSessionLocal, User, UserKeys, SourceTrader, Subscription, init_db, dialect_insert, insert_ignore
+)
 from security import encrypt_data
+from rollups import user_stats, FINAL_STATUSES
+from retention import query_history
+from view_cache import view_cache
+from events import traders_changed
+from sqlalchemy import update as sql_update
 from sqlalchemy.future import select
 from sqlalchemy.exc import SQLAlchemyError
 import re
 
+logger = logging.getLogger(__name__)
+
 # --- Conversation states ---
 ADD_KEY, ADD_SECRET, ADD_PASS = range(3)
 
+# Cached views, dropped when the user's subscriptions change
+SUBSCRIPTION_VIEWS = ("subs", "status")
+# Wallets accepted by one bulk command or imported file
+BULK_MAX_WALLETS = int(os.getenv("BULK_MAX_WALLETS", "200"))
+BULK_MAX_FILE_BYTES = 64 * 1024
+
+async def reply(update: Update, text: str, **kwargs) -> None:
+    """Reply to a command message or, for menu buttons, to the message holding the button."""
+    if update.message:
+        await update.message.reply_text(text, **kwargs)
+    elif update.callback_query:
+        await update.callback_query.message.reply_text(text, **kwargs)
+
+async def ensure_user(session, tg_user) -> None:
+    """Create the User row on first use. Users already seen skip the lookup."""
+    if view_cache.get(tg_user.id, "user"):
+        return
+    if await session.get(User, tg_user.id) is None:
+        session.add(User(telegram_user_id=tg_user.id, username=tg_user.username))
+        await session.flush()
+    else:
+        # Only cache rows known to be committed
+        view_cache.set(tg_user.id, "user", True)
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     keyboard = [
         [InlineKeyboardButton("Add Keys", callback_data='add_keys_start'),
@@ -59,10 +93,15 @@ Commands:
 /copy_top_pnl <usd_amount> — Copy the current #1 PNL trader
 /stop_wallet <wallet_address> — Cease copying a wallet
 /stop_top_pnl — Cease following top trader
+/copy_wallets <usd_amount> <wallet> [<wallet> ...] — Copy many wallets at once
+/stop_wallets <wallet> [<wallet> ...] — Cease copying many wallets at once
+Send a .csv or .txt file of wallets (one per line, optionally "wallet,amount") with the default amount as caption to import it
 /list — List your active subscriptions
 /config_wallet <wallet_address> <new_amount> — Change allocation for a wallet
 /config_top_pnl <new_amount> — Change allocation on the top PNL trader
+/paper <wallet_address|top_pnl> <on|off> — Paper-trade a subscription: copies are simulated, no real orders
 /status — Recent copy-trade status and history
+/stats — Success rate, volume copied and last error per subscription (7 days)
 
 WARNING: Copy trading involves significant financial risk. Only use with funds you can afford to lose.
 """)
@@ -88,7 +127,6 @@ async def add_keys_pass(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.delete()
 
     user_id = update.effective_user.id
-    username = update.effective_user.username
 
     enc_key = encrypt_data(context.user_data['api_key'])
     enc_secret = encrypt_data(context.user_data['api_secret'])
@@ -97,11 +135,7 @@ async def add_keys_pass(update: Update, context: ContextTypes.DEFAULT_TYPE):
     async with AsyncSessionLocal() as session:
         try:
             # Upsert user
-            user = await session.get(User, user_id)
-            if not user:
-                user = User(telegram_user_id=user_id, username=username)
-                session.add(user)
-                await session.flush()
+            await ensure_user(session, update.effective_user)
             # Upsert keys
             res = await session.get(UserKeys, user_id)
             if not res:
@@ -112,7 +146,7 @@ async def add_keys_pass(update: Update, context: ContextTypes.DEFAULT_TYPE):
             res.api_passphrase = enc_pass
             await session.commit()
         except SQLAlchemyError as e:
-            logging.error(f"/add_keys DB error: {e}")
+            logger.error("/add_keys DB error: %s", e)
             await update.message.reply_text("Failed to save keys. Please try again later.")
             return ConversationHandler.END
 
@@ -170,15 +204,12 @@ async def copy_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
     async with AsyncSessionLocal() as session:
         try:
             # Get or create user
-            user = await session.get(User, user_id)
-            if not user:
-                user = User(telegram_user_id=user_id, username=update.effective_user.username)
-                session.add(user)
-                await session.flush()
+            await ensure_user(session, update.effective_user)
             # Get or create SourceTrader
             result = await session.execute(select(SourceTrader).where(SourceTrader.wallet_address == wallet_addr))
             trader = result.scalar_one_or_none()
-            if not trader:
+            new_trader = trader is None
+            if new_trader:
                 trader = SourceTrader(wallet_address=wallet_addr, display_name=None)
                 session.add(trader)
                 await session.flush()
@@ -201,10 +232,14 @@ async def copy_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
                 session.add(sub)
             await session.commit()
+            # Only once committed: a poller reloading earlier would not see the new trader
+            if new_trader:
+                traders_changed.set()
+            view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
             short_addr = f"{wallet_addr[:6]}...{wallet_addr[-4:]}" if len(wallet_addr) > 10 else wallet_addr
             await update.message.reply_text(f"Now Copying Wallet!\nYou are now copying trades from {short_addr} with ${amount:.2f} per trade.")
         except SQLAlchemyError as e:
-            logging.error(f"/copy_wallet DB error: {e}")
+            logger.error("/copy_wallet DB error: %s", e)
             await update.message.reply_text("Failed to set up wallet copying. Please try again later.")
 
 async def copy_top_pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -221,11 +256,7 @@ async def copy_top_pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     async with AsyncSessionLocal() as session:
         try:
-            user = await session.get(User, user_id)
-            if not user:
-                user = User(telegram_user_id=user_id, username=update.effective_user.username)
-                session.add(user)
-                await session.flush()
+            await ensure_user(session, update.effective_user)
             result = await session.execute(select(Subscription).where(
                 Subscription.user_id == user_id,
                 Subscription.subscription_type == "TOP_PNL_1"
@@ -244,9 +275,10 @@ async def copy_top_pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 )
                 session.add(sub)
             await session.commit()
+            view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
             await update.message.reply_text(f"Now Copying Top PNL!\nYou are now copying the #1 PNL trader with ${amount:.2f} per trade. This will update automatically.")
         except SQLAlchemyError as e:
-            logging.error(f"/copy_top_pnl DB error: {e}")
+            logger.error("/copy_top_pnl DB error: %s", e)
             await update.message.reply_text("Failed to set up top PNL copying. Please try again later.")
 
 async def stop_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -275,10 +307,11 @@ async def stop_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return
             sub.active = False
             await session.commit()
+            view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
             short_addr = f"{wallet_addr[:6]}...{wallet_addr[-4:]}" if len(wallet_addr) > 10 else wallet_addr
             await update.message.reply_text(f"Stopped. You are no longer copying trades from {short_addr}.")
         except SQLAlchemyError as e:
-            logging.error(f"/stop_wallet DB error: {e}")
+            logger.error("/stop_wallet DB error: %s", e)
             await update.message.reply_text("Failed to stop wallet copying. Please try again later.")
 
 async def stop_top_pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -295,13 +328,166 @@ async def stop_top_pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return
             sub.active = False
             await session.commit()
+            view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
             await update.message.reply_text("Stopped. You are no longer copying the Top PNL trader.")
         except SQLAlchemyError as e:
-            logging.error(f"/stop_top_pnl DB error: {e}")
+            logger.error("/stop_top_pnl DB error: %s", e)
             await update.message.reply_text("Failed to stop top PNL copying. Please try again later.")
 
+def parse_wallet_list(text: str, default_amount: float | None = None) -> tuple[dict[str, float], list[str]]:
+    """Parse wallets from a pasted list or CSV, one or more per line.
+
+    A number after a wallet sets that wallet's amount, otherwise `default_amount`
+    applies. A first line without any wallet or number is taken as a CSV header.
+    Returns {wallet: amount} in input order and the entries that were rejected.
+    """
+    amounts, invalid = {}, []
+    last = None
+    for line_no, line in enumerate(text.splitlines()):
+        fields = [f for f in re.split(r"[\s,;]+", line.strip()) if f]
+        if line_no == 0 and fields and not any(is_valid_wallet(f) or _is_amount(f) for f in fields):
+            continue
+        for field in fields:
+            if is_valid_wallet(field):
+                last = field
+                amounts[field] = default_amount
+            elif _is_amount(field) and last is not None:
+                amounts[last] = float(field)
+                last = None
+            else:
+                invalid.append(field)
+                last = None
+    invalid += [f"{addr} (no amount)" for addr, amount in amounts.items() if amount is None]
+    return {addr: amount for addr, amount in amounts.items() if amount is not None}, invalid
+
+def _is_amount(value: str) -> bool:
+    try:
+        return float(value) > 0
+    except ValueError:
+        return False
+
+async def subscribe_wallets(session, user_id: int, amounts: dict[str, float]) -> int:
+    """Upsert SourceTrader and WALLET Subscription rows for many wallets in three statements.
+
+    Re-activates and resizes existing subscriptions. Returns the number of new source traders.
+    """
+    new_traders = (await session.execute(
+        insert_ignore(SourceTrader, ["wallet_address"])
+        .values([{"wallet_address": addr} for addr in amounts])
+        .returning(SourceTrader.id)
+    )).scalars().all()
+    trader_ids = dict((await session.execute(
+        select(SourceTrader.wallet_address, SourceTrader.id).where(SourceTrader.wallet_address.in_(list(amounts)))
+    )).all())
+    stmt = dialect_insert(Subscription).values([
+        dict(user_id=user_id, subscription_type="WALLET", trader_id=trader_ids[addr],
+             trade_amount_usdc=amount, active=True)
+        for addr, amount in amounts.items()
+    ])
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "trader_id"],
+        set_={"trade_amount_usdc": stmt.excluded.trade_amount_usdc, "active": True},
+    ))
+    return len(new_traders)
+
+async def unsubscribe_wallets(session, user_id: int, wallets: list[str]) -> int:
+    """Deactivate a user's subscriptions to the given wallets in one statement. Returns how many were active."""
+    result = await session.execute(
+        sql_update(Subscription)
+        .where(Subscription.user_id == user_id, Subscription.active == True,
+               Subscription.trader_id.in_(select(SourceTrader.id).where(SourceTrader.wallet_address.in_(wallets))))
+        .values(active=False)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+def _bulk_problem(amounts: dict, invalid: list[str]) -> str | None:
+    if invalid:
+        shown = "\n".join(f"- {entry}" for entry in invalid[:10])
+        more = f"\n...and {len(invalid) - 10} more" if len(invalid) > 10 else ""
+        return f"Nothing was changed. Fix these entries and try again:\n{shown}{more}"
+    if not amounts:
+        return "No wallet addresses found."
+    if len(amounts) > BULK_MAX_WALLETS:
+        return f"Too many wallets ({len(amounts)}). The limit is {BULK_MAX_WALLETS} per command."
+    return None
+
+async def apply_bulk_subscribe(update: Update, amounts: dict[str, float]) -> None:
+    user_id = update.effective_user.id
+    async with AsyncSessionLocal() as session:
+        try:
+            await ensure_user(session, update.effective_user)
+            new_traders = await subscribe_wallets(session, user_id, amounts)
+            await session.commit()
+        except SQLAlchemyError as e:
+            logger.error("/copy_wallets DB error: %s", e)
+            await reply(update, "Failed to set up wallet copying. Please try again later.")
+            return
+    view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
+    if new_traders:
+        traders_changed.set()
+    await reply(update, f"Now Copying {len(amounts)} Wallets!\nAmounts per trade range from "
+                        f"${min(amounts.values()):.2f} to ${max(amounts.values()):.2f}. Use /list to review.")
+
+async def copy_wallets(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    usage = "Usage: /copy_wallets <usd_amount> <wallet> [<wallet> ...]\nExample: /copy_wallets 10 0x123...abc 0x456...def"
+    if not context.args or len(context.args) < 2 or not _is_amount(context.args[0]):
+        await update.message.reply_text(usage)
+        return
+    # Wallets may be separated by spaces, commas or newlines; a wallet can be followed by its own amount
+    text = update.message.text.split(None, 2)[2]
+    amounts, invalid = parse_wallet_list(text, float(context.args[0]))
+    problem = _bulk_problem(amounts, invalid)
+    if problem:
+        await update.message.reply_text(problem)
+        return
+    await apply_bulk_subscribe(update, amounts)
+
+async def import_wallets(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    document = update.message.document
+    if document.file_size and document.file_size > BULK_MAX_FILE_BYTES:
+        await update.message.reply_text("File too large. Send at most 64 KB of wallet addresses.")
+        return
+    caption = [f for f in (update.message.caption or "").split() if _is_amount(f)]
+    default_amount = float(caption[0]) if caption else None
+    data = await (await document.get_file()).download_as_bytearray()
+    amounts, invalid = parse_wallet_list(bytes(data).decode("utf-8-sig", errors="replace"), default_amount)
+    problem = _bulk_problem(amounts, invalid)
+    if problem:
+        if any(entry.endswith("(no amount)") for entry in invalid):
+            problem += "\nAdd an amount after each wallet or put a default amount in the file caption."
+        await update.message.reply_text(problem)
+        return
+    await apply_bulk_subscribe(update, amounts)
+
+async def stop_wallets(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    if not context.args:
+        await update.message.reply_text("Usage: /stop_wallets <wallet> [<wallet> ...]")
+        return
+    wallets = list(dict.fromkeys(f for f in re.split(r"[\s,;]+", " ".join(context.args)) if f))
+    invalid = [w for w in wallets if not is_valid_wallet(w)]
+    problem = _bulk_problem(dict.fromkeys(wallets), invalid)
+    if problem:
+        await update.message.reply_text(problem)
+        return
+    async with AsyncSessionLocal() as session:
+        try:
+            stopped = await unsubscribe_wallets(session, user_id, wallets)
+            await session.commit()
+        except SQLAlchemyError as e:
+            logger.error("/stop_wallets DB error: %s", e)
+            await update.message.reply_text("Failed to stop wallet copying. Please try again later.")
+            return
+    view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
+    await update.message.reply_text(f"Stopped. You are no longer copying {stopped} of {len(wallets)} wallets.")
+
 async def list_subscriptions(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
+    cached = view_cache.get(user_id, "subs")
+    if cached is not None:
+        await reply(update, cached)
+        return
     async with AsyncSessionLocal() as session:
         try:
             wallet_subs = await session.execute(select(Subscription, SourceTrader).join(SourceTrader).where(
@@ -317,7 +503,8 @@ async def list_subscriptions(update: Update, context: ContextTypes.DEFAULT_TYPE)
             wallet_list = []
             for sub, trader in wallet_subs:
                 short_addr = f"{trader.wallet_address[:6]}...{trader.wallet_address[-4:]}" if len(trader.wallet_address) > 10 else trader.wallet_address
-                wallet_list.append(f"- {short_addr} (Trading ${sub.trade_amount_usdc:.2f})")
+                paper = " [paper]" if sub.paper_trading else ""
+                wallet_list.append(f"- {short_addr} (Trading ${sub.trade_amount_usdc:.2f}){paper}")
             top_pnl_sub = top_pnl_subs.scalar_one_or_none()
             msg = "Your Active Subscriptions:\n\n"
             if wallet_list:
@@ -325,13 +512,15 @@ async def list_subscriptions(update: Update, context: ContextTypes.DEFAULT_TYPE)
             else:
                 msg += "Wallet Subscriptions:\n(None)\n\n"
             if top_pnl_sub:
-                msg += f"Dynamic Subscriptions:\n- Top #1 PNL Trader (Trading ${top_pnl_sub.trade_amount_usdc:.2f})"
+                paper = " [paper]" if top_pnl_sub.paper_trading else ""
+                msg += f"Dynamic Subscriptions:\n- Top #1 PNL Trader (Trading ${top_pnl_sub.trade_amount_usdc:.2f}){paper}"
             else:
                 msg += "Dynamic Subscriptions:\n(None)"
-            await update.message.reply_text(msg)
+            view_cache.set(user_id, "subs", msg)
+            await reply(update, msg)
         except SQLAlchemyError as e:
-            logging.error(f"/list DB error: {e}")
-            await update.message.reply_text("Failed to retrieve subscriptions. Please try again later.")
+            logger.error("/list DB error: %s", e)
+            await reply(update, "Failed to retrieve subscriptions. Please try again later.")
 
 async def config_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -366,10 +555,11 @@ async def config_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return
             sub.trade_amount_usdc = new_amount
             await session.commit()
+            view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
             short_addr = f"{wallet_addr[:6]}...{wallet_addr[-4:]}" if len(wallet_addr) > 10 else wallet_addr
             await update.message.reply_text(f"Amount Updated! New trade amount for {short_addr} is ${new_amount:.2f}.")
         except SQLAlchemyError as e:
-            logging.error(f"/config_wallet DB error: {e}")
+            logger.error("/config_wallet DB error: %s", e)
             await update.message.reply_text("Failed to update amount. Please try again later.")
 
 async def config_top_pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -396,50 +586,140 @@ async def config_top_pnl(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return
             sub.trade_amount_usdc = new_amount
             await session.commit()
+            view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
             await update.message.reply_text(f"Amount Updated! New trade amount for the Top #1 PNL Trader is ${new_amount:.2f}.")
         except SQLAlchemyError as e:
-            logging.error(f"/config_top_pnl DB error: {e}")
+            logger.error("/config_top_pnl DB error: %s", e)
             await update.message.reply_text("Failed to update amount. Please try again later.")
 
+async def paper_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    if not context.args or len(context.args) < 2 or context.args[1].lower() not in ("on", "off"):
+        await update.message.reply_text("Usage: /paper <wallet_address|top_pnl> <on|off>")
+        return
+    target = context.args[0].strip()
+    enabled = context.args[1].lower() == "on"
+    if target.lower() != "top_pnl" and not is_valid_wallet(target):
+        await update.message.reply_text("Invalid wallet address format.")
+        return
+    async with AsyncSessionLocal() as session:
+        try:
+            if target.lower() == "top_pnl":
+                query = select(Subscription).where(
+                    Subscription.user_id == user_id,
+                    Subscription.subscription_type == "TOP_PNL_1"
+                )
+                name = "the Top #1 PNL Trader"
+            else:
+                query = select(Subscription).join(SourceTrader).where(
+                    Subscription.user_id == user_id,
+                    SourceTrader.wallet_address == target
+                )
+                name = f"{target[:6]}...{target[-4:]}"
+            sub = (await session.execute(query)).scalar_one_or_none()
+            if not sub:
+                await update.message.reply_text("You are not subscribed to this trader.")
+                return
+            sub.paper_trading = enabled
+            await session.commit()
+            view_cache.invalidate(user_id, *SUBSCRIPTION_VIEWS)
+            if enabled:
+                await update.message.reply_text(
+                    f"Paper Trading On! Copies of {name} are now simulated against the order book; no real orders are placed.")
+            else:
+                await update.message.reply_text(f"Paper Trading Off! Copies of {name} are placed on Polymarket again.")
+        except SQLAlchemyError as e:
+            logger.error("/paper DB error: %s", e)
+            await update.message.reply_text("Failed to update the subscription. Please try again later.")
+
+async def render_status(session, user_id: int) -> tuple[str, str | None]:
+    """Text and parse mode of the /status reply."""
+    # Get user's subscriptions
+    subs_result = await session.execute(select(Subscription.id).where(
+        Subscription.user_id == user_id
+    ))
+    sub_ids = [row[0] for row in subs_result.fetchall()]
+    if not sub_ids:
+        return "No active subscriptions found. Use /list to see your subscriptions.", None
+    # Get last 5 trades, from the archive too once retention has moved them
+    trades = await query_history(session, sub_ids, limit=5)
+    if not trades:
+        return "No trade history yet. Trades will appear here once copying begins.", None
+    msg = "Recent Trade Status\n\n"
+    for trade in trades:
+        status_text = trade["copy_trade_status"] if trade["copy_trade_status"] in FINAL_STATUSES else "PENDING"
+        msg += f"Status: {status_text} | Side: {trade['source_side']}\n"
+        msg += f"Market: {trade['source_market_id'][:10]}...\n"
+        msg += f"Info: {trade['copy_trade_status']}\n"
+        if trade["error_message"]:
+            msg += f"Error: {trade['error_message'][:50]}...\n"
+        msg += "-------------------\n"
+    return msg, 'Markdown'
+
 async def status_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
+    cached = view_cache.get(user_id, "status")
+    if cached is not None:
+        msg, parse_mode = cached
+        await reply(update, msg, parse_mode=parse_mode)
+        return
     async with AsyncSessionLocal() as session:
         try:
-            # Get user's subscriptions
-            subs_result = await session.execute(select(Subscription.id).where(
-                Subscription.user_id == user_id
-            ))
-            sub_ids = [row[0] for row in subs_result.fetchall()]
-            if not sub_ids:
-                await update.message.reply_text("No active subscriptions found. Use /list to see your subscriptions.")
+            msg, parse_mode = await render_status(session, user_id)
+            view_cache.set(user_id, "status", (msg, parse_mode))
+            await reply(update, msg, parse_mode=parse_mode)
+        except SQLAlchemyError as e:
+            logger.error("/status DB error: %s", e)
+            await reply(update, "Failed to retrieve status. Please try again later.")
+
+async def stats_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    days = 7
+    cached = view_cache.get(user_id, "stats")
+    if cached is not None:
+        await reply(update, cached)
+        return
+    async with AsyncSessionLocal() as session:
+        try:
+            rows = await user_stats(session, user_id, days)
+            if not rows:
+                msg = f"No copy activity in the last {days} days."
+                view_cache.set(user_id, "stats", msg)
+                await reply(update, msg)
                 return
-            # Get last 5 trades
-            trades_result = await session.execute(
-                select(TradeLog).where(TradeLog.subscription_id.in_(sub_ids))
-                .order_by(TradeLog.created_at.desc())
-                .limit(5)
+            labels_result = await session.execute(
+                select(Subscription.id, Subscription.subscription_type, SourceTrader.wallet_address)
+                .outerjoin(SourceTrader)
+                .where(Subscription.id.in_({row.subscription_id for row in rows}))
             )
-            trades = trades_result.scalars().all()
-            if not trades:
-                await update.message.reply_text("No trade history yet. Trades will appear here once copying begins.")
-                return
-            msg = "Recent Trade Status\n\n"
-            for trade in trades:
-                status_text = "SUCCESS" if trade.copy_trade_status == "SUCCESS" else "FAILED" if trade.copy_trade_status == "FAILED" else "PENDING"
-                msg += f"Status: {status_text} | Side: {trade.source_side}\n"
-                msg += f"Market: {trade.source_market_id[:10]}...\n"
-                msg += f"Info: {trade.copy_trade_status}\n"
-                if trade.error_message:
-                    msg += f"Error: {trade.error_message[:50]}...\n"
+            labels = {}
+            for sub_id, sub_type, wallet in labels_result:
+                if wallet:
+                    labels[sub_id] = f"{wallet[:6]}...{wallet[-4:]}" if len(wallet) > 10 else wallet
+                else:
+                    labels[sub_id] = "Top #1 PNL Trader" if sub_type == "TOP_PNL_1" else sub_type
+            totals = {}
+            for row in rows:  # oldest first, so the last error seen is the latest one
+                t = totals.setdefault(row.subscription_id, {"success": 0, "failed": 0, "volume": 0.0, "error": None})
+                t["success"] += row.success_count
+                t["failed"] += row.failed_count
+                t["volume"] += row.volume_usdc
+                t["error"] = row.last_error or t["error"]
+            msg = f"Copy Stats (last {days} days)\n\n"
+            for sub_id, t in totals.items():
+                attempts = t["success"] + t["failed"]
+                rate = 100.0 * t["success"] / attempts if attempts else 0.0
+                msg += f"{labels.get(sub_id, sub_id)}\n"
+                msg += f"Copied: {t['success']} | Failed: {t['failed']} | Success: {rate:.0f}%\n"
+                msg += f"Volume: ${t['volume']:.2f}\n"
+                if t["error"]:
+                    msg += f"Last error: {t['error'][:50]}\n"
                 msg += "-------------------\n"
-            
-            if update.message:
-                await update.message.reply_text(msg, parse_mode='Markdown')
-            elif update.callback_query:
-                await update.callback_query.message.reply_text(msg, parse_mode='Markdown')
+            view_cache.set(user_id, "stats", msg)
+            await reply(update, msg)
         except SQLAlchemyError as e:
-            logging.error(f"/status DB error: {e}")
-            await update.message.reply_text("Failed to retrieve status. Please try again later.")
+            logger.error("/stats DB error: %s", e)
+            await update.message.reply_text("Failed to retrieve stats. Please try again later.")
 
 # Handlers for registration in main.py:
 HANDLERS = [
@@ -452,9 +732,14 @@ HANDLERS = [
     CommandHandler("copy_top_pnl", copy_top_pnl),
     CommandHandler("stop_wallet", stop_wallet),
     CommandHandler("stop_top_pnl", stop_top_pnl),
+    CommandHandler("copy_wallets", copy_wallets),
+    CommandHandler("stop_wallets", stop_wallets),
+    MessageHandler(filters.Document.FileExtension("csv") | filters.Document.FileExtension("txt"), import_wallets),
     CommandHandler("list", list_subscriptions),
     CommandHandler("config_wallet", config_wallet),
     CommandHandler("config_top_pnl", config_top_pnl),
+    CommandHandler("paper", paper_cmd),
     CommandHandler("status", status_cmd),
+    CommandHandler("stats", stats_cmd),
     CallbackQueryHandler(button_handler),
 ]
@@ -0,0 +1,66 @@
+import logging
+import os
+import threading
+import time
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Consecutive upstream failures that open a circuit, and how long it is
+# reported open before the next call is treated as a trial
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitMonitor:
+    """Tracks the circuit state of an upstream from the outcome of its calls.
+
+    After `threshold` consecutive failures the circuit is open; `reset_after`
+    seconds later it is half-open, and the next call's success closes it
+    while a failure opens it again. Callers report each call with success()
+    or failure(). The state is only reported (/ready, /metrics): nothing
+    stops calling the upstream while it is open. Thread-safe, since CLOB
+    calls run in worker threads.
+    """
+
+    def __init__(self, name: str, threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_after: float = CIRCUIT_RESET_SECONDS, clock=time.monotonic):
+        self.name = name
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0  # consecutive
+        self.opened_at = None
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return CLOSED
+        return OPEN if self._clock() - self.opened_at < self.reset_after else HALF_OPEN
+
+    def success(self) -> None:
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Circuit %s closed", self.name)
+            self.failures = 0
+            self.opened_at = None
+
+    def failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at = self._clock()
+                self.opens += 1
+                logger.warning("Circuit %s opened after %d consecutive failures", self.name, self.failures)
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "opens": self.opens}
+
+
+data_api_circuit = CircuitMonitor("data_api")
+clob_circuit = CircuitMonitor("clob")
+metrics.register("circuits", lambda: {c.name: c.stats() for c in (data_api_circuit, clob_circuit)})
@@ -2,7 +2,7 @@ import os
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
 from sqlalchemy import (
-    Column, Integer, BigInteger, String, Float, Boolean, DateTime, ForeignKey, Text, UniqueConstraint
+    event, false, Column, Integer, BigInteger, String, Float, Boolean, Date, DateTime, ForeignKey, Text, UniqueConstraint, Index
 )
 from sqlalchemy.sql import func
 from dotenv import load_dotenv
@@ -10,9 +10,27 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///polymarketbot.db")
+# "tuned" applies the per-backend settings below; "default" leaves SQLAlchemy/driver defaults
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned").lower()
+# SQLite, set on every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+# Postgres connection pool and asyncpg
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))  # 0 behind pgbouncer
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "30"))
+# Pause between batches of background maintenance (retention, key rotation)
+# so the poller, executors and bot get the database in between
+MAINTENANCE_BATCH_PAUSE = 0.2
 
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# The engine (and its DBAPI driver) is created on first use by get_engine(), normally in init_db
+engine = None
+AsyncSessionLocal = sessionmaker(class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
 # --- MODELS ---
@@ -50,11 +68,18 @@ class Subscription(Base):
     trader_id = Column(Integer, ForeignKey("source_trader.id"), nullable=True)
     trade_amount_usdc = Column(Float, default=10.0, nullable=False)
     active = Column(Boolean, default=True, nullable=False)
+    # Copies go to the simulated exchange instead of the CLOB (see simulator.py)
+    paper_trading = Column(Boolean, default=False, server_default=false(), nullable=False)
     user = relationship("User", back_populates="subscriptions")
     trader = relationship("SourceTrader", back_populates="subscriptions")
     __table_args__ = (
         UniqueConstraint('user_id', 'trader_id', name='uq_user_trader'),
-        UniqueConstraint('user_id', 'subscription_type', name='uq_user_subscriptiontype'),
+        # One dynamic (TOP_PNL_*) subscription per user and type; wallet rows are covered by uq_user_trader
+        Index('uq_subscription_user_dynamic', 'user_id', 'subscription_type', unique=True,
+              sqlite_where=trader_id.is_(None), postgresql_where=trader_id.is_(None)),
+        # Poller lookups: followers of a wallet, and all TOP_PNL_* followers
+        Index('ix_subscription_trader_active', 'trader_id', 'active'),
+        Index('ix_subscription_type_active', 'subscription_type', 'active'),
     )
 
 class TradeLog(Base):
@@ -65,10 +90,19 @@ class TradeLog(Base):
     source_market_id = Column(String, nullable=False)
     source_outcome_index = Column(Integer, nullable=False)
     source_side = Column(String, nullable=False)  # "BUY" or "SELL"
-    copy_trade_status = Column(String, nullable=False)  # "PENDING", "SUCCESS", "FAILED"
+    copy_trade_status = Column(String, nullable=False)  # "PENDING", "SUCCESS", "FAILED", "NETTED", "SIMULATED"
     copy_trade_order_id = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
+    # Shares filled and average price, when the order response reports them (simulated fills)
+    filled_size = Column(Float, nullable=True)
+    fill_price = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    __table_args__ = (
+        # One copy per subscription and source trade; also serves log_and_notify's lookup
+        Index('uq_trade_log_sub_hash', 'subscription_id', 'source_trade_hash', unique=True),
+        # /status: latest trades of a user's subscriptions
+        Index('ix_trade_log_sub_created', 'subscription_id', 'created_at'),
+    )
 
 class GlobalCache(Base):
     __tablename__ = "global_cache"
@@ -76,8 +110,84 @@ class GlobalCache(Base):
     value = Column(String, nullable=False)
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
+class SubscriptionDailyStats(Base):
+    """Per subscription and UTC day rollup of copy outcomes, maintained by log_and_notify."""
+    __tablename__ = "subscription_daily_stats"
+    subscription_id = Column(Integer, ForeignKey("subscription.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    user_id = Column(BigInteger, ForeignKey("user.telegram_user_id"), nullable=False)
+    success_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)
+    volume_usdc = Column(Float, default=0.0, nullable=False)  # USDC of successful copies
+    last_error = Column(Text, nullable=True)
+    __table_args__ = (
+        Index('ix_subscription_daily_stats_user_day', 'user_id', 'day'),
+    )
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+    version = Column(Integer, primary_key=True)
+    description = Column(String, nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
 
 # --- DB INIT/HELPERS ---
+def engine_options(url: str, profile: str = DB_PROFILE) -> dict:
+    """create_async_engine() keyword arguments of `profile` for the backend of `url`."""
+    if profile != "tuned":
+        return {}
+    if url.startswith("postgresql"):
+        options = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT,
+                   "pool_recycle": DB_POOL_RECYCLE, "pool_pre_ping": True}
+        if "+asyncpg" in url:
+            options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+                                       "command_timeout": DB_COMMAND_TIMEOUT,
+                                       "server_settings": {"application_name": "polymarketbot"}}
+        return options
+    return {}
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Connect hook: WAL lets readers run alongside the single writer, and NORMAL
+    syncs only at checkpoints instead of on every one of our many small commits."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}")
+    cursor.close()
+
+
+def make_engine(url: str, profile: str = DB_PROFILE):
+    # SQL statement logging is configured in log_config (SQL_ECHO), not with echo=True
+    new_engine = create_async_engine(url, future=True, **engine_options(url, profile))
+    if profile == "tuned" and url.startswith("sqlite"):
+        event.listen(new_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return new_engine
+
+
+def get_engine():
+    """Create the engine on first call and bind AsyncSessionLocal to it."""
+    global engine
+    if engine is None:
+        engine = make_engine(DATABASE_URL)
+        AsyncSessionLocal.configure(bind=engine)
+    return engine
+
 async def init_db():
-    async with engine.begin() as conn:
+    from migrations import run_migrations
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
+
+def dialect_insert(model):
+    """INSERT construct of the configured backend (SQLite or Postgres), which supports ON CONFLICT."""
+    if get_engine().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+def insert_ignore(model, conflict_columns):
+    """INSERT ... ON CONFLICT DO NOTHING for the configured backend."""
+    return dialect_insert(model).on_conflict_do_nothing(index_elements=conflict_columns)
@@ -0,0 +1,7 @@
+import asyncio
+
+# Events shared between the bot and the background tasks. Kept free of other
+# imports so setting one does not load the poller's dependencies.
+
+# Set by the bot after adding source traders; the poller reloads its trader list on the next cycle
+traders_changed = asyncio.Event()
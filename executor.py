@@ -1,121 +1,391 @@
 import asyncio
+import os
+import time
 from security import decrypt_data
-from database import AsyncSessionLocal, UserKeys, TradeLog
-from sqlalchemy.future import select
-from py_clob_client.client import ClobClient
+from database import AsyncSessionLocal
+from jobs import FANOUT, split_fanout, expand_fanout, queue_age
+from risk import ledger
+from rollups import record_outcome, FINAL_STATUSES
+from view_cache import view_cache
+from netting import OrderNetter, net_jobs, CLOB_BATCH_MAX_ORDERS
+from circuit import clob_circuit
+import metrics
+from metrics import histogram
+import repository
 import logging
 
+logger = logging.getLogger(__name__)
+
+# py_clob_client pulls in the web3/eth signing stack, so it is imported on the first order
+ClobClient = None
+
+# Subscribers a worker takes from a fan-out job at a time; the rest is put
+# back on the queue so idle workers can copy the same trade in parallel.
+FANOUT_CHUNK_SIZE = int(os.getenv("FANOUT_CHUNK_SIZE", "50"))
+# Subscriptions of a chunk a worker copies at once (each waits on CLOB round trips)
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "10"))
+CLOB_HOST = os.getenv("CLOB_HOST", "https://clob.polymarket.com")
+# "clob" trades for real; "simulated" sends every order to simulator.SimulatedExchange
+# (load tests, offline runs). Paper-trading subscriptions always use the simulator.
+EXECUTION_BACKEND = os.getenv("EXECUTION_BACKEND", "clob").lower()
+
 async def trade_execution_worker(job_queue, bot=None):
     while True:
         job = await job_queue.get()
-        sub_id = job["subscription_id"]
-        user_id = job["user_id"]
-        try:
-            # Load and decrypt user keys
-            async with AsyncSessionLocal() as session:
-                res = await session.get(UserKeys, user_id)
-                if not res:
-                    await log_and_notify(bot, user_id, sub_id, "FAILED", job, "No API keys found for this user.")
-                    continue
-                api_key = decrypt_data(res.api_key)
-                api_secret = decrypt_data(res.api_secret)
-                api_pass = decrypt_data(res.api_passphrase)
-            
-            # Initialize py-clob-client
-            client = ClobClient(
-                api_key=api_key,
-                api_secret=api_secret,
-                passphrase=api_pass
-            )
-            
-            # Prepare market/trade info
-            amount_usdc = job["trade_amount_usdc"]
-            market_id = job["source_market_id"]
-            out_idx = job["source_outcome_index"]
-            side = job["source_side"] # "BUY" or "SELL"
-
-            # 1. Fetch Order Book to determine price
-            # We want to execute immediately, so we cross the spread.
-            # If BUYing, we look at ASKS (lowest price sellers).
-            # If SELLing, we look at BIDS (highest price buyers).
-            
-            # Note: This assumes client.get_order_book(token_id) exists and returns standard structure.
-            # Since we don't have the exact library docs at runtime, we wrap in try/except or assume standard CLOB API.
-            # Usually market_id is the token_id for the outcome in simple markets, or we need to find the token_id.
-            # For simplicity, assuming market_id maps to the asset ID we want to trade.
-            
-            order_book = await asyncio.to_thread(client.get_order_book, market_id)
-            
-            price = None
-            if side.upper() == "BUY":
-                if order_book and order_book.asks:
-                    # best ask is the first one usually, or min price
-                    # structure: list of OrderSummary(price, size)
-                    best_ask = order_book.asks[0] # Assumes sorted
-                    price = float(best_ask.price)
-                    # Add slippage (e.g. 1%)
-                    price = min(price * 1.01, 1.0)
-            else:
-                if order_book and order_book.bids:
-                    best_bid = order_book.bids[0]
-                    price = float(best_bid.price)
-                    # Add slippage
-                    price = max(price * 0.99, 0.0)
-
-            if not price:
-                raise Exception("Could not determine market price (empty order book?)")
-
-            # 2. Calculate Size
-            # size = amount_usdc / price
-            size = amount_usdc / price
-            
-            # 3. Place Order
-            # Using FOK (Fill or Kill) or IOC (Immediate or Cancel) is safer for market orders to avoid partials if not desired,
-            # but standard Limit order crossing spread is common.
-            order = await asyncio.to_thread(client.create_and_post_order,
-                                            token_id=market_id,
-                                            price=price,
-                                            side=side.upper(),
-                                            size=size)
-            
-            # Success
-            await log_and_notify(bot, user_id, sub_id, "SUCCESS", job, None, order_id=order.get("orderID") or order.get("id"))
-        except Exception as e:
-            logging.error(f"Trade exec error for {user_id}, {e}")
-            await log_and_notify(bot, user_id, sub_id, "FAILED", job, str(e))
-        finally:
-            # Scrub decrypted keys
-            api_key = api_secret = api_pass = None
+        if "enqueued_at" in job:
+            queue_age.take(job["enqueued_at"])
+            histogram("queue_wait").observe(time.monotonic() - job["enqueued_at"])
+        if job.get("type") == FANOUT:
+            job, rest = split_fanout(job, FANOUT_CHUNK_SIZE)
+            if rest is not None:
+                job_queue.put_nowait(rest)
+                if "enqueued_at" in rest:
+                    queue_age.put(rest["enqueued_at"])
+            new_ids = await insert_pending_logs(job)
+            await submit_chunk(job, new_ids, bot)
+        else:
+            await submit_job(job, bot)
         job_queue.task_done()
 
-async def log_and_notify(bot, user_id, sub_id, status, job, error=None, order_id=None):
+async def submit_chunk(job, new_ids, bot=None):
+    """Copy a fan-out chunk, up to FANOUT_CONCURRENCY subscriptions at a time.
+
+    Sub-jobs are expanded as slots free up. `new_ids` are the subscriptions
+    that got a PENDING row (None: all of them).
+    """
+    slots = asyncio.Semaphore(FANOUT_CONCURRENCY)
+    tasks = []
+    for sub_job in expand_fanout(job):
+        if new_ids is not None and sub_job["subscription_id"] not in new_ids:
+            continue  # this trade was already copied for the subscription
+        await slots.acquire()
+        task = asyncio.create_task(submit_job(sub_job, bot))
+        task.add_done_callback(lambda _: slots.release())
+        tasks.append(task)
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.error("Copy of trade %s failed: %s", job["source_trade_hash"], result)
+
+async def submit_job(job, bot=None):
+    """Execute a copy job now, or hand it to the order netter when ORDER_NETTING_WINDOW_MS is set."""
+    if order_netter.window > 0:
+        order_netter.add(job, bot)
+    else:
+        await timed_execute(job, bot)
+
+async def timed_execute(job, bot=None):
+    """execute_job, recording its duration and the time since the trade was enqueued."""
+    start = time.monotonic()
+    await execute_job(job, bot)
+    done = time.monotonic()
+    histogram("execute").observe(done - start)
+    if "enqueued_at" in job:
+        histogram("end_to_end").observe(done - job["enqueued_at"])
+
+def clob_client_class():
+    global ClobClient
+    if ClobClient is None:
+        from py_clob_client.client import ClobClient
+    return ClobClient
+
+async def insert_pending_logs(job):
+    """Write the PENDING TradeLog rows of a fan-out chunk in one executemany.
+
+    Rows that already exist for (subscription, source trade) are skipped.
+    Returns the subscription ids that got a new row, or None if the insert
+    failed and every target should be attempted.
+    """
+    rows = [
+        dict(
+            subscription_id=sub_id,
+            source_trade_hash=job["source_trade_hash"],
+            source_market_id=job["source_market_id"],
+            source_outcome_index=job["source_outcome_index"],
+            source_side=job["source_side"],
+            copy_trade_status="PENDING",
+        )
+        for sub_id in job["targets"]["subscription_id"].tolist()
+    ]
+    try:
+        async with AsyncSessionLocal() as session:
+            new_ids = await repository.insert_pending(session, rows)
+            await session.commit()
+        return new_ids
+    except Exception as e:
+        # log_and_notify still creates the rows when the outcome is known
+        logger.error("Failed to write pending trade logs: %s", e)
+        return None
+
+async def load_client(user_id, paper=False):
+    """The execution backend for a user's orders.
+
+    That is the simulated exchange for paper trading or EXECUTION_BACKEND=simulated
+    (no keys needed), else a CLOB client authenticated with the user's decrypted
+    API keys, or None if they have none.
+    """
+    if paper or EXECUTION_BACKEND == "simulated":
+        import simulator
+        return simulator.exchange()
     async with AsyncSessionLocal() as session:
-        q = await session.execute(select(TradeLog).where(
-            TradeLog.subscription_id==sub_id,
-            TradeLog.source_trade_hash==job["source_trade_hash"]
+        keys = await repository.user_keys(session, user_id)
+    if not keys:
+        return None
+    client_class = clob_client_class()
+    return client_class(
+        host=CLOB_HOST,
+        api_key=decrypt_data(keys.api_key),
+        api_secret=decrypt_data(keys.api_secret),
+        passphrase=decrypt_data(keys.api_passphrase)
+    )
+
+async def clob_call(client, func, *args, **kwargs):
+    """Run a blocking call of `client` in a worker thread and report its outcome to the CLOB circuit.
+
+    Network errors, 5xx and 429 count as CLOB failures; rejections of a
+    single order (4xx) do not. Calls to the simulated exchange are not reported.
+    """
+    if getattr(client, "simulated", False) is True:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    try:
+        result = await asyncio.to_thread(func, *args, **kwargs)
+    except Exception as e:
+        status = getattr(e, "status_code", None)
+        if status is None or status >= 500 or status == 429:
+            clob_circuit.failure()
+        else:
+            clob_circuit.success()
+        raise
+    clob_circuit.success()
+    return result
+
+async def best_price(client, market_id, side):
+    """Price that crosses the spread for an immediate fill, or None if that side of the book is empty.
+
+    If BUYing, we look at ASKS (lowest price sellers).
+    If SELLing, we look at BIDS (highest price buyers).
+    """
+    # Note: This assumes client.get_order_book(token_id) exists and returns standard structure.
+    # Usually market_id is the token_id for the outcome in simple markets, or we need to find the token_id.
+    # For simplicity, assuming market_id maps to the asset ID we want to trade.
+    order_book = await clob_call(client, client.get_order_book, market_id)
+    if side.upper() == "BUY":
+        if order_book and order_book.asks:
+            # best ask is the first one usually, or min price
+            # structure: list of OrderSummary(price, size)
+            best_ask = order_book.asks[0] # Assumes sorted
+            # Add slippage (e.g. 1%)
+            return min(float(best_ask.price) * 1.01, 1.0)
+    else:
+        if order_book and order_book.bids:
+            best_bid = order_book.bids[0]
+            # Add slippage
+            return max(float(best_bid.price) * 0.99, 0.0)
+    return None
+
+def resized(job, amount_usdc, reason):
+    """The job with the amount the risk ledger allowed; the reason is shown to the user."""
+    return dict(job, trade_amount_usdc=amount_usdc,
+                resize_reason=f"Resized from ${job['trade_amount_usdc']:.2f}: {reason}")
+
+async def execute_job(job, bot=None):
+    sub_id = job["subscription_id"]
+    user_id = job["user_id"]
+    market_id = job["source_market_id"]
+    side = job["source_side"]
+    # Paper trades do not count against the user's real risk limits
+    paper = job.get("paper_trading", False)
+    # Pre-trade risk check against the in-memory ledger
+    if paper:
+        amount_usdc, reason = job["trade_amount_usdc"], None
+    else:
+        amount_usdc, reason = ledger.reserve(user_id, sub_id, market_id, side, job["trade_amount_usdc"])
+    if amount_usdc <= 0:
+        await log_and_notify(bot, user_id, sub_id, "FAILED", job, reason)
+        return
+    if amount_usdc != job["trade_amount_usdc"]:
+        job = resized(job, amount_usdc, reason)
+    filled = False
+    try:
+        # Initialize py-clob-client with the user's decrypted keys (or the simulator)
+        client = await load_client(user_id, paper)
+        if client is None:
+            await log_and_notify(bot, user_id, sub_id, "FAILED", job, "No API keys found for this user.")
+            return
+
+        # 1. Fetch Order Book to determine price
+        # We want to execute immediately, so we cross the spread.
+        price = await best_price(client, market_id, side)
+        if not price:
+            raise Exception("Could not determine market price (empty order book?)")
+
+        # 2. Calculate Size
+        # size = amount_usdc / price
+        size = amount_usdc / price
+        
+        # 3. Place Order
+        # Using FOK (Fill or Kill) or IOC (Immediate or Cancel) is safer for market orders to avoid partials if not desired,
+        # but standard Limit order crossing spread is common.
+        post_start = time.monotonic()
+        order = await clob_call(client, client.create_and_post_order,
+                                token_id=market_id,
+                                price=price,
+                                side=side.upper(),
+                                size=size)
+        histogram("order_post").observe(time.monotonic() - post_start)
+        if order.get("success") is False:
+            raise Exception(order.get("errorMsg") or "Order rejected by the CLOB.")
+        
+        # Success
+        filled = True
+        status = "SIMULATED" if order.get("simulated") else "SUCCESS"
+        await log_and_notify(bot, user_id, sub_id, status, job, None, order_id=order.get("orderID") or order.get("id"),
+                             fill=order)
+    except Exception as e:
+        logger.error("Trade exec error for %s, %s", user_id, e,
+                     extra={"user_id": user_id, "subscription_id": sub_id, "market_id": market_id})
+        await log_and_notify(bot, user_id, sub_id, "FAILED", job, str(e))
+    finally:
+        if not paper:
+            ledger.settle(user_id, sub_id, market_id, side, amount_usdc, filled)
+
+def post_order_batch(client, orders):
+    """Sign `orders` and post them in one CLOB request (POST /orders). Returns one response per order."""
+    from py_clob_client.clob_types import OrderArgs, PostOrdersArgs
+
+    signed = [client.create_order(OrderArgs(token_id=o["market_id"], price=o["price"], size=o["size"], side=o["side"]))
+              for o in orders]
+    responses = client.post_orders([PostOrdersArgs(order=order) for order in signed])
+    if not isinstance(responses, list):
+        raise Exception(f"Unexpected batch order response: {responses}")
+    return responses
+
+async def execute_netted(user_id, jobs, bot=None):
+    """Net a user's jobs per token and post what remains in CLOB batches.
+
+    Each job's TradeLog row gets the outcome and order id of the order its
+    token was netted into; jobs on a token whose copies cancelled out are
+    marked NETTED. Paper-trading jobs are netted separately (see OrderNetter.add).
+    Returns (orders posted, jobs offset).
+    """
+    start = time.monotonic()
+    paper = jobs[0].get("paper_trading", False)
+    accepted = []
+    for job in jobs:
+        if paper:
+            accepted.append(job)
+            continue
+        amount_usdc, reason = ledger.reserve(user_id, job["subscription_id"], job["source_market_id"],
+                                             job["source_side"], job["trade_amount_usdc"])
+        if amount_usdc <= 0:
+            await log_and_notify(bot, user_id, job["subscription_id"], "FAILED", job, reason)
+            continue
+        accepted.append(job if amount_usdc == job["trade_amount_usdc"] else resized(job, amount_usdc, reason))
+    orders = net_jobs(accepted)
+    outcomes = {}  # index in orders -> (status, error, order id, CLOB response)
+    error = "No response for this order in the batch."
+    try:
+        if any(order["side"] for order in orders):
+            client = await load_client(user_id, paper)
+            if client is None:
+                raise Exception("No API keys found for this user.")
+        batch = []
+        for i, order in enumerate(orders):
+            if order["side"] is None:
+                outcomes[i] = ("NETTED", None, None, None)
+                continue
+            price = await best_price(client, order["market_id"], order["side"])
+            if not price:
+                outcomes[i] = ("FAILED", "Could not determine market price (empty order book?)", None, None)
+                continue
+            batch.append((i, dict(order, price=price, size=order["amount_usdc"] / price)))
+        for n in range(0, len(batch), CLOB_BATCH_MAX_ORDERS):
+            chunk = batch[n:n + CLOB_BATCH_MAX_ORDERS]
+            post_start = time.monotonic()
+            responses = await clob_call(client, post_order_batch, client, [order for _, order in chunk])
+            histogram("order_post").observe(time.monotonic() - post_start)
+            for (i, _), resp in zip(chunk, responses):
+                if resp.get("success", True) and not resp.get("errorMsg"):
+                    status = "SIMULATED" if resp.get("simulated") else "SUCCESS"
+                    outcomes[i] = (status, None, resp.get("orderID") or resp.get("id"), resp)
+                else:
+                    outcomes[i] = ("FAILED", resp.get("errorMsg") or "Order rejected by the CLOB.", None, None)
+    except Exception as e:
+        logger.error("Netted order error for %s, %s", user_id, e, extra={"user_id": user_id, "jobs": len(accepted)})
+        error = str(e)
+    finally:
+        for i, order in enumerate(orders):
+            filled = outcomes.get(i, ("FAILED",))[0] in ("SUCCESS", "SIMULATED")
+            if not paper:
+                for job in order["jobs"]:
+                    ledger.settle(user_id, job["subscription_id"], job["source_market_id"], job["source_side"],
+                                  job["trade_amount_usdc"], filled)
+    logged = []
+    for i, order in enumerate(orders):
+        status, job_error, order_id, fill = outcomes.get(i, ("FAILED", error, None, None))
+        logged.extend((job["subscription_id"], status, job, job_error, order_id, fill) for job in order["jobs"])
+    await log_outcomes(bot, user_id, logged)
+    done = time.monotonic()
+    for order in orders:
+        for job in order["jobs"]:
+            if "enqueued_at" in job:
+                histogram("end_to_end").observe(done - job["enqueued_at"])
+    histogram("net_flush").observe(time.monotonic() - start)
+    posted = sum(1 for outcome in outcomes.values() if outcome[0] in ("SUCCESS", "SIMULATED"))
+    offset = sum(len(order["jobs"]) for order in orders if order["side"] is None)
+    return posted, offset
+
+order_netter = OrderNetter(execute_netted)
+metrics.register("order_netting", order_netter.stats)
+
+async def log_and_notify(bot, user_id, sub_id, status, job, error=None, order_id=None, fill=None):
+    """Record a copy outcome on its TradeLog row (and the rollups), then tell the user.
+
+    `fill` is the order response; fills of the simulated exchange carry
+    size_matched and avg_price, which are stored with the row.
+    """
+    await log_outcomes(bot, user_id, [(sub_id, status, job, error, order_id, fill)])
+
+async def log_outcomes(bot, user_id, outcomes):
+    """log_and_notify for several of a user's copies, written in one transaction.
+
+    `outcomes` are (sub_id, status, job, error, order_id, fill) tuples.
+    """
+    copies = []
+    for sub_id, status, job, error, order_id, fill in outcomes:
+        filled = fill is not None and "size_matched" in fill
+        copies.append(dict(
+            subscription_id=sub_id,
+            source_trade_hash=job["source_trade_hash"],
+            source_market_id=job["source_market_id"],
+            source_outcome_index=job["source_outcome_index"],
+            source_side=job["source_side"],
+            status=status,
+            order_id=order_id,
+            error=error,
+            size=float(fill["size_matched"]) if filled else None,
+            price=float(fill["avg_price"]) if filled else None,
         ))
-        log = q.scalars().first()
-        if not log:
-            log = TradeLog(
-                subscription_id=sub_id,
-                source_trade_hash=job["source_trade_hash"],
-                source_market_id=job["source_market_id"],
-                source_outcome_index=job["source_outcome_index"],
-                source_side=job["source_side"]
-            )
-        log.copy_trade_status = status
-        if order_id:
-            log.copy_trade_order_id = order_id
-        if error:
-            log.error_message = error
-        session.add(log)
+    async with AsyncSessionLocal() as session:
+        previous = await repository.record_copies(session, copies)
+        for (sub_id, status, job, error, _, _), before in zip(outcomes, previous):
+            if status in FINAL_STATUSES and before not in FINAL_STATUSES:
+                await record_outcome(session, sub_id, user_id, status, job["trade_amount_usdc"], error)
         await session.commit()
+    view_cache.invalidate(user_id, "status", "stats")
     # Telegram notify (if bot/context is passed)
-    if bot is not None:
+    if bot is None:
+        return
+    for (sub_id, status, job, error, _, _), copy in zip(outcomes, copies):
         txt_success = f"Trade Copied! Copied {job['source_side']} of ${job['trade_amount_usdc']:.2f} in market {job['source_market_id']}."
         txt_fail = f"Trade Failed! Could not copy {job['source_side']} in market {job['source_market_id']}. Error: {error}"
-        msg = txt_success if status == "SUCCESS" else txt_fail
+        txt_netted = f"Trade Netted! Your {job['source_side']} of ${job['trade_amount_usdc']:.2f} in market {job['source_market_id']} was offset by opposing copies; no order was needed."
+        if status == "SIMULATED":
+            fill_text = f"filled {copy['size']:.2f} shares at {copy['price']:.3f}" if copy["size"] else "filled"
+            txt_success = f"Paper Trade! Simulated {job['source_side']} of ${job['trade_amount_usdc']:.2f} in market {job['source_market_id']}: {fill_text}."
+        msg = txt_success if status in ("SUCCESS", "SIMULATED") else txt_netted if status == "NETTED" else txt_fail
+        if job.get("resize_reason"):
+            msg += f" {job['resize_reason']}"
         try:
             await bot.send_message(user_id, msg)
         except Exception as e:
-            logging.error(f"Failed to notify user {user_id} via Telegram: {e}")
+            logger.error("Failed to notify user %s via Telegram: %s", user_id, e)
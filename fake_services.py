@@ -0,0 +1,242 @@
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from types import SimpleNamespace
+import aiohttp
+import httpx
+from aiohttp import web
+
+from server import SECRET_HEADER
+
+
+async def serve(app: web.Application, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+    """Start an aiohttp app on a local port. Returns the runner (call cleanup()) and base URL."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+def make_update(update_id: int, text: str, user_id: int, chat_id: int | None = None,
+                username: str = "tester") -> dict:
+    """JSON of a Telegram message update as the Bot API would send it."""
+    chat_id = chat_id if chat_id is not None else user_id
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private", "username": username},
+        "from": {"id": user_id, "is_bot": False, "first_name": username, "username": username},
+        "text": text,
+    }
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+
+class FakeUpdateSender:
+    """POSTs synthetic updates to the webhook route, the way Telegram would."""
+
+    def __init__(self, url: str, secret_token: str, session: aiohttp.ClientSession | None = None):
+        self.url = url
+        self.secret_token = secret_token
+        self._session = session
+        self._ids = itertools.count(1)
+
+    async def send(self, text: str, user_id: int, **kwargs) -> int:
+        """Send one message update. Returns the HTTP status of the webhook."""
+        session = self._session or aiohttp.ClientSession()
+        try:
+            async with session.post(self.url, json=make_update(next(self._ids), text, user_id, **kwargs),
+                                    headers={SECRET_HEADER: self.secret_token}) as resp:
+                return resp.status
+        finally:
+            if self._session is None:
+                await session.close()
+
+
+class FakeTelegramApi:
+    """Minimal Telegram Bot API: getMe, sendMessage, and `true` for any other method.
+
+    Point a bot at it with Application.builder().base_url(f"{url}/bot").
+    Messages sent by the bot are kept in `sent` as (chat_id, text).
+    """
+
+    BOT_USER = {"id": 123456, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+    def __init__(self):
+        self.sent: list[tuple[int, str]] = []
+        self._ids = itertools.count(1)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self._handle)
+        return app
+
+    async def _handle(self, request):
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        if method == "getMe":
+            result = self.BOT_USER
+        elif method == "sendMessage":
+            chat_id = int(params["chat_id"])
+            text = params.get("text", "")
+            self.sent.append((chat_id, text))
+            result = {"message_id": next(self._ids), "date": int(time.time()),
+                      "chat": {"id": chat_id, "type": "private"}, "from": self.BOT_USER, "text": text}
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+
+class FakeDataApi:
+    """Polymarket data API `/activity` serving synthetic trades of a fixed set of wallets.
+
+    Trades are added with add_trade() or generate(); a request returns the
+    wallet's latest `limit` trades, newest first, as poll_trades expects.
+    Timestamps increase strictly per wallet.
+    """
+
+    def __init__(self, wallets: list[str], markets: int = 20, seed: int = 0):
+        self.trades: dict[str, list[dict]] = {w: [] for w in wallets}
+        self.markets = [f"{i:064x}" for i in range(1, markets + 1)]
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._clock = 0
+
+    def add_trade(self, wallet: str | None = None) -> dict:
+        wallet = wallet or self._random.choice(list(self.trades))
+        self._clock = max(self._clock + 1, int(time.time() * 1000))
+        trade = {
+            "transactionHash": f"0x{self._clock:x}{len(self.trades[wallet]):08x}",
+            "timestamp": self._clock,
+            "marketId": self._random.choice(self.markets),
+            "outcome": self._random.randint(0, 1),
+            "side": self._random.choice(("BUY", "SELL")),
+            "size": round(self._random.uniform(1, 500), 2),
+            "price": round(self._random.uniform(0.05, 0.95), 3),
+        }
+        self.trades[wallet].append(trade)
+        return trade
+
+    async def generate(self, rate: float, duration: float) -> int:
+        """Add trades at `rate` per second across all wallets for `duration` seconds. Returns the count."""
+        added = 0
+        start = time.monotonic()
+        while (elapsed := time.monotonic() - start) < duration:
+            due = int(elapsed * rate) - added
+            for _ in range(due):
+                self.add_trade()
+            added += due
+            await asyncio.sleep(0.01)
+        return added
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/activity", self._activity)
+        return app
+
+    async def _activity(self, request):
+        self.requests += 1
+        trades = self.trades.get(request.query.get("user"), [])
+        limit = int(request.query.get("limit", 100))
+        return web.json_response({"activity": trades[::-1][:limit]})
+
+
+class FakeClob:
+    """CLOB with a fixed order book per token and order endpoints (single and batch) that fill everything.
+
+    `latency` (seconds) is added to every response to stand in for the network.
+    """
+
+    def __init__(self, bid: float = 0.49, ask: float = 0.51, latency: float = 0.0):
+        self.bid, self.ask, self.latency = bid, ask, latency
+        self.orders: list[dict] = []
+        self.requests = 0  # order-posting requests; a batch counts once
+        self._ids = itertools.count(1)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/book", self._book)
+        app.router.add_post("/order", self._order)
+        app.router.add_post("/orders", self._orders)
+        return app
+
+    async def _book(self, request):
+        await asyncio.sleep(self.latency)
+        return web.json_response({
+            "asset_id": request.query.get("token_id"),
+            "bids": [{"price": str(self.bid), "size": "10000"}],
+            "asks": [{"price": str(self.ask), "size": "10000"}],
+        })
+
+    def _fill(self, order: dict) -> dict:
+        self.orders.append(order)
+        return {"success": True, "errorMsg": "", "orderID": f"0x{next(self._ids):064x}", "status": "matched"}
+
+    async def _order(self, request):
+        await asyncio.sleep(self.latency)
+        self.requests += 1
+        return web.json_response(self._fill(await request.json()))
+
+    async def _orders(self, request):
+        await asyncio.sleep(self.latency)
+        self.requests += 1
+        return web.json_response([self._fill(entry["order"]) for entry in await request.json()])
+
+
+class FakeClobClient:
+    """Stand-in for py_clob_client's ClobClient that talks to a FakeClob.
+
+    Covers the calls the executor makes. Swap it in with executor.ClobClient
+    and point executor.CLOB_HOST at the FakeClob.
+    """
+
+    _http = None  # shared, since the executor builds a client per order
+
+    def __init__(self, host: str, api_key=None, api_secret=None, passphrase=None, **kwargs):
+        self.host = host.rstrip("/")
+        if FakeClobClient._http is None:
+            FakeClobClient._http = httpx.Client(timeout=10)
+
+    def get_order_book(self, token_id):
+        book = self._http.get(f"{self.host}/book", params={"token_id": token_id}).json()
+        return SimpleNamespace(
+            asks=[SimpleNamespace(**level) for level in book["asks"]],
+            bids=[SimpleNamespace(**level) for level in book["bids"]],
+        )
+
+    def create_and_post_order(self, token_id, price, side, size):
+        order = {"token_id": token_id, "price": price, "side": side, "size": size}
+        return self._http.post(f"{self.host}/order", json=order).json()
+
+    def create_order(self, order_args):
+        """Takes py_clob_client's OrderArgs; the "signed" order is its fields."""
+        return {"token_id": order_args.token_id, "price": order_args.price,
+                "side": order_args.side, "size": order_args.size}
+
+    def post_orders(self, args):
+        """Takes a list of py_clob_client's PostOrdersArgs."""
+        body = [{"order": a.order, "orderType": str(a.orderType)} for a in args]
+        return self._http.post(f"{self.host}/orders", json=body).json()
+
+
+async def _send_cli(args):
+    sender = FakeUpdateSender(args.url, args.secret)
+    status = await sender.send(args.text, args.user_id)
+    print(f"POST {args.url} -> {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fakes of upstream services")
+    sub = parser.add_subparsers(dest="command", required=True)
+    send = sub.add_parser("send", help="Send a fake Telegram update to the webhook")
+    send.add_argument("--url", default="http://localhost:8000/telegram/webhook")
+    send.add_argument("--secret", required=True)
+    send.add_argument("--user-id", type=int, default=1)
+    send.add_argument("text")
+    args = parser.parse_args()
+    asyncio.run(_send_cli(args))
@@ -0,0 +1,66 @@
+import heapq
+from collections import Counter
+
+import numpy as np
+
+# A fan-out job carries one source trade plus every subscriber that copies it,
+# instead of one queue item per subscriber.
+FANOUT = "FANOUT"
+FANOUT_DTYPE = np.dtype([
+    ("subscription_id", np.int64),
+    ("user_id", np.int64),
+    ("trade_amount_usdc", np.float64),
+])
+
+
+def make_fanout_job(trade: dict, targets) -> dict:
+    """Build a fan-out job from trade fields and (subscription_id, user_id, amount) triples."""
+    job = dict(trade)
+    job["type"] = FANOUT
+    job["targets"] = np.array([tuple(t) for t in targets], dtype=FANOUT_DTYPE)
+    return job
+
+
+def split_fanout(job: dict, size: int) -> tuple[dict, dict | None]:
+    """Split off the first `size` targets. The remainder (or None) shares the trade fields."""
+    targets = job["targets"]
+    if len(targets) <= size:
+        return job, None
+    return dict(job, targets=targets[:size]), dict(job, targets=targets[size:])
+
+
+def expand_fanout(job: dict):
+    """Lazily yield the per-subscription job dicts the executor works on."""
+    base = {k: v for k, v in job.items() if k not in ("type", "targets")}
+    for sub_id, user_id, amount in job["targets"].tolist():
+        yield dict(base, subscription_id=sub_id, user_id=user_id, trade_amount_usdc=amount)
+
+
+class QueueAge:
+    """Enqueue times of the jobs on the executor queue, to report the oldest one.
+
+    Producers call put() with a job's enqueued_at as they queue it, the
+    worker calls take() as it gets it. Split fan-out remainders go back at
+    the tail with their original time, so the oldest job is not always at the
+    head of the queue; a heap with lazy removal keeps oldest() cheap.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counts = Counter()
+
+    def put(self, enqueued_at: float) -> None:
+        heapq.heappush(self._heap, enqueued_at)
+        self._counts[enqueued_at] += 1
+
+    def take(self, enqueued_at: float) -> None:
+        if self._counts[enqueued_at] > 0:  # jobs queued without put() are ignored
+            self._counts[enqueued_at] -= 1
+
+    def oldest(self) -> float | None:
+        while self._heap and self._counts[self._heap[0]] == 0:
+            self._counts.pop(heapq.heappop(self._heap), None)
+        return self._heap[0] if self._heap else None
+
+
+queue_age = QueueAge()
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import os
+from sqlalchemy import update
+from sqlalchemy.future import select
+from database import AsyncSessionLocal, UserKeys, MAINTENANCE_BATCH_PAUSE
+from security import reencrypt_data
+
+logger = logging.getLogger(__name__)
+
+ROTATION_BATCH = int(os.getenv("KEY_ROTATION_BATCH", "200"))
+KEY_COLUMNS = ("api_key", "api_secret", "api_passphrase")
+
+
+async def rotate_batch(after_user_id: int | None, batch_size: int = ROTATION_BATCH) -> tuple[int | None, int]:
+    """Re-encrypt one batch of UserKeys rows, ordered by user id, that aren't v2 under the current key.
+
+    Rows that no current or old key can decrypt are logged and skipped, so they
+    don't hold up everyone else's keys. Returns (last user id seen, or None
+    when there are no more rows; rows rewritten).
+    """
+    async with AsyncSessionLocal() as session:
+        query = select(UserKeys.user_id, *(getattr(UserKeys, c) for c in KEY_COLUMNS)).order_by(UserKeys.user_id)
+        if after_user_id is not None:
+            query = query.where(UserKeys.user_id > after_user_id)
+        rows = (await session.execute(query.limit(batch_size))).all()
+        if not rows:
+            return None, 0
+        rotated = 0
+        for row in rows:
+            old = dict(zip(KEY_COLUMNS, row[1:]))
+            try:
+                new = {c: reencrypt_data(v) for c, v in old.items()}
+            except ValueError as e:
+                logger.error("Cannot re-encrypt API keys of user %s: %s", row.user_id, e,
+                             extra={"user_id": row.user_id})
+                continue
+            if all(v is None for v in new.values()):
+                continue
+            # Only replace what we read: keys saved by /add_keys in the meantime win
+            result = await session.execute(
+                update(UserKeys)
+                .where(UserKeys.user_id == row.user_id, *(getattr(UserKeys, c) == v for c, v in old.items()))
+                .values({c: v for c, v in new.items() if v is not None})
+                .execution_options(synchronize_session=False)
+            )
+            rotated += result.rowcount
+        await session.commit()
+    return rows[-1].user_id, rotated
+
+
+async def rotate_all(batch_size: int = ROTATION_BATCH, pause: float = MAINTENANCE_BATCH_PAUSE) -> int:
+    """Bring every UserKeys row to the v2 format under the current key. Returns rows rewritten."""
+    after, total = None, 0
+    while True:
+        after, rotated = await rotate_batch(after, batch_size)
+        total += rotated
+        if after is None:
+            return total
+        await asyncio.sleep(pause)
+
+
+async def run_key_rotation():
+    """Startup task: re-encrypt stored keys after a key change or an upgrade from the original format."""
+    try:
+        rotated = await rotate_all()
+        if rotated:
+            logger.info("Re-encrypted API keys of %d users", rotated)
+    except Exception as e:
+        logger.error("Key rotation failed: %s", e)
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import TYPE_CHECKING
+from database import AsyncSessionLocal, GlobalCache
+
+logger = logging.getLogger(__name__)
+
+DUNE_API_KEY = os.getenv("DUNE_API_KEY")
+# To be set by the user/dev:
+DUNE_QUERY_ID = os.getenv("DUNE_PNL_QUERY_ID", "PLACEHOLDER_QUERY_ID") # set this in .env
+DUNE_BASE = "https://api.dune.com/api/v1/query/"
+TOP_N = int(os.getenv("LEADERBOARD_TOP_N", "10"))
+REFRESH_INTERVAL = int(os.getenv("LEADERBOARD_REFRESH_SECONDS", "3600"))
+# "dune" ranks wallets from the Dune query, "local" from pnl_engine (observed fills)
+LEADERBOARD_SOURCE = os.getenv("LEADERBOARD_SOURCE", "dune").lower()
+
+# GlobalCache keys. "top_pnl_1_wallet" is kept so older deployments keep working.
+TOP_WALLET_KEY = "top_pnl_1_wallet"
+RANKING_KEY = "leaderboard_top_n"
+VERSION_KEY = "leaderboard_version"
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class Leaderboard:
+    """In-memory top-N PNL ranking shared by the refresher and the poller.
+
+    The ranking is persisted to GlobalCache, but readers use this object
+    directly. `changed` is set whenever a rank changes so the poller can react
+    without re-reading the database every cycle.
+    """
+
+    def __init__(self, size: int = TOP_N):
+        self.size = size
+        self.wallets: list[str] = []
+        self.version: str | None = None  # Dune execution id of the current ranking
+        self.etag: str | None = None
+        self.changed = asyncio.Event()
+
+    def wallet_at(self, rank: int) -> str | None:
+        """Wallet at a 1-based rank, e.g. rank 1 for TOP_PNL_1 subscriptions."""
+        if 1 <= rank <= len(self.wallets):
+            return self.wallets[rank - 1]
+        return None
+
+    def rank_of(self, wallet: str) -> int | None:
+        try:
+            return self.wallets.index(wallet) + 1
+        except ValueError:
+            return None
+
+    def apply(self, wallets: list[str], version: str | None = None) -> list[int]:
+        """Replace the ranking and return the 1-based ranks whose wallet changed."""
+        wallets = [w for w in wallets if w][:self.size]
+        self.version = version
+        longest = max(len(wallets), len(self.wallets))
+        changed = [
+            rank for rank in range(1, longest + 1)
+            if (wallets[rank - 1] if rank <= len(wallets) else None) != self.wallet_at(rank)
+        ]
+        if changed:
+            self.wallets = wallets
+            self.changed.set()
+        return changed
+
+    async def load(self) -> None:
+        """Restore the last persisted ranking (called once at startup)."""
+        async with AsyncSessionLocal() as session:
+            ranking = await session.get(GlobalCache, RANKING_KEY)
+            version = await session.get(GlobalCache, VERSION_KEY)
+            top = await session.get(GlobalCache, TOP_WALLET_KEY)
+        if ranking and ranking.value:
+            wallets = json.loads(ranking.value)
+        elif top and top.value:
+            wallets = [top.value]
+        else:
+            wallets = []
+        self.apply(wallets, version.value if version else None)
+
+    async def save(self) -> None:
+        now = datetime.utcnow()
+        values = {
+            RANKING_KEY: json.dumps(self.wallets),
+            VERSION_KEY: self.version or "",
+        }
+        if self.wallets:
+            values[TOP_WALLET_KEY] = self.wallets[0]
+        async with AsyncSessionLocal() as session:
+            for key, value in values.items():
+                cache = await session.get(GlobalCache, key)
+                if cache:
+                    cache.value = value
+                    cache.last_updated = now
+                else:
+                    session.add(GlobalCache(key=key, value=value, last_updated=now))
+            await session.commit()
+
+
+leaderboard = Leaderboard()
+
+
+async def fetch_dune_ranking(client: "httpx.AsyncClient", board: Leaderboard = leaderboard):
+    """Fetch the top rows of the Dune PNL query.
+
+    Returns (wallets, execution_id), or None when Dune reports the same result
+    we already hold (304 on the ETag, or an unchanged execution id).
+    """
+    url = f"{DUNE_BASE}{DUNE_QUERY_ID}/results"
+    headers = {"x-dune-api-key": DUNE_API_KEY}
+    if board.etag:
+        headers["If-None-Match"] = board.etag
+    # Only the top N rows are needed, so don't download the full result set.
+    resp = await client.get(url, headers=headers, params={"limit": board.size}, timeout=45)
+    if resp.status_code == 304:
+        return None
+    resp.raise_for_status()
+    board.etag = resp.headers.get("etag")
+    results = resp.json()
+    execution_id = results.get("execution_id")
+    if execution_id and execution_id == board.version:
+        return None
+    rows = (results.get("result") or {}).get("rows") or []
+    return [row.get("wallet_address") for row in rows], execution_id
+
+
+async def update_leaderboard_cache(board: Leaderboard = leaderboard):
+    import httpx
+
+    while True:
+        try:
+            async with httpx.AsyncClient() as client:
+                fetched = await fetch_dune_ranking(client, board)
+            if fetched is None:
+                logger.debug("Dune result unchanged, skipping")
+            else:
+                wallets, execution_id = fetched
+                if not any(wallets):
+                    logger.warning("No wallet found in Dune result")
+                else:
+                    changed = board.apply(wallets, execution_id)
+                    await board.save()
+                    if changed:
+                        logger.info("Ranks changed: %s, top_pnl_1_wallet: %s", changed, board.wallet_at(1),
+                                    extra={"version": board.version})
+        except Exception as e:
+            logger.error("Leaderboard refresh failed: %s", e)
+        await asyncio.sleep(REFRESH_INTERVAL)
@@ -0,0 +1,120 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-component levels, e.g. "poller=DEBUG,executor=WARNING,sqlalchemy.engine=INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "json" (one object per line) or "text"
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Log every SQL statement (through the queue, unlike the engine's echo=True)
+SQL_ECHO = os.getenv("SQL_ECHO", "").lower() in ("1", "true", "yes")
+# INFO/DEBUG records let through per logger and message template in each window; 0 disables sampling
+SAMPLE_BURST = int(os.getenv("LOG_SAMPLE_BURST", "20"))
+SAMPLE_WINDOW = float(os.getenv("LOG_SAMPLE_WINDOW_SECONDS", "10"))
+
+# httpx logs every request at INFO, i.e. every poll of every wallet
+DEFAULT_LEVELS = {"httpx": "WARNING", "httpcore": "WARNING", "aiosqlite": "WARNING"}
+
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line. Fields passed with `extra=` become top-level keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in vars(record).items() if k not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Lets `burst` records per logger and message template through every `window` seconds.
+
+    Only INFO and DEBUG records are sampled: warnings and errors often share
+    one template across users (executor errors) and matter most when they
+    repeat. Templates are the unformatted `msg`, so hot paths log with
+    %-style arguments rather than f-strings. The first record let through
+    after a window with drops carries `sampled_out`, the number dropped.
+    """
+
+    MAX_KEYS = 4096
+
+    def __init__(self, burst: int = SAMPLE_BURST, window: float = SAMPLE_WINDOW, clock=time.monotonic):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._clock = clock
+        self._state: dict[tuple, list] = {}  # (logger, msg) -> [window start, passed, dropped]
+
+    def filter(self, record) -> bool:
+        if self.burst <= 0 or record.levelno >= logging.WARNING:
+            return True
+        now = self._clock()
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg).__name__)
+        state = self._state.get(key)
+        if state is None or now - state[0] >= self.window:
+            if state is not None and state[2]:
+                record.sampled_out = state[2]
+            if state is None and len(self._state) >= self.MAX_KEYS:
+                self._state = {k: s for k, s in self._state.items() if now - s[0] < self.window}
+            state = self._state[key] = [now, 0, 0]
+        if state[1] < self.burst:
+            state[1] += 1
+            return True
+        state[2] += 1
+        return False
+
+
+def parse_levels(spec: str) -> dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(stream=None) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to a background thread that formats and writes it.
+
+    Log calls on the event loop then only filter and enqueue a record.
+    Returns the started listener; stop() flushes what is still queued.
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+    levels = dict(DEFAULT_LEVELS)
+    if SQL_ECHO:
+        levels["sqlalchemy.engine"] = "INFO"
+    levels.update(parse_levels(LOG_LEVELS))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import os
+import time
+import metrics
+from metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+# How often the loop is probed, and the lag at which a warning is logged
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL_SECONDS", "0.5"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "100"))
+# asyncio debug mode: logs callbacks that hold the loop longer than LOOP_SLOW_CALLBACK_MS
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "").lower() in ("1", "true", "yes")
+LOOP_SLOW_CALLBACK_MS = float(os.getenv("LOOP_SLOW_CALLBACK_MS", "100"))
+# Run on uvloop instead of the default asyncio loop (needs the uvloop package)
+USE_UVLOOP = os.getenv("USE_UVLOOP", "").lower() in ("1", "true", "yes")
+
+
+def install_event_loop_policy(use_uvloop: bool = USE_UVLOOP) -> str:
+    """Select the event loop implementation before asyncio.run(). Returns its name.
+
+    Falls back to asyncio when uvloop is requested but not installed.
+    """
+    if use_uvloop:
+        try:
+            import uvloop
+        except ImportError:
+            logger.warning("USE_UVLOOP is set but uvloop is not installed; using asyncio")
+        else:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            return "uvloop"
+    return "asyncio"
+
+
+def configure_debug(loop: asyncio.AbstractEventLoop, debug: bool = LOOP_DEBUG) -> None:
+    """Enable asyncio debug mode, which logs slow callbacks (blocking calls) on the `asyncio` logger."""
+    if debug:
+        loop.set_debug(True)
+        loop.slow_callback_duration = LOOP_SLOW_CALLBACK_MS / 1000
+        logging.getLogger("asyncio").setLevel(logging.WARNING)
+
+
+class LoopMonitor:
+    """Measures event-loop lag: how late a sleep of `interval` seconds wakes up.
+
+    Telegram, the poller, executors and the health server share one loop, so
+    lag here delays all of them. Samples go to the "loop_lag" histogram;
+    samples over `warn_ms` are counted and logged.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, warn_ms: float = LOOP_LAG_WARN_MS):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self.last_ms = 0.0
+        self.slow = 0
+        self.loop_name = None
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.loop_name = f"{type(loop).__module__}.{type(loop).__name__}"
+        lag_histogram = histogram("loop_lag")
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            lag_histogram.observe(lag)
+            self.last_ms = lag * 1000
+            if self.last_ms >= self.warn_ms:
+                self.slow += 1
+                logger.warning("Event loop lagged %.0f ms (%d tasks)", self.last_ms, len(asyncio.all_tasks()))
+
+    def stats(self) -> dict:
+        return {"loop": self.loop_name, "lag_ms": round(self.last_ms, 3), "slow": self.slow,
+                "warn_ms": self.warn_ms}
+
+
+loop_monitor = LoopMonitor()
+metrics.register("event_loop", loop_monitor.stats)
@@ -2,11 +2,19 @@ import os
 import asyncio
 import sys
 from dotenv import load_dotenv
+from log_config import setup_logging
 from database import init_db
 from bot import HANDLERS
 from telegram.ext import Application
-from poller import update_leaderboard_cache, poll_trades
-from executor import trade_execution_worker
+from update_processor import PerUserUpdateProcessor
+from poller import poll_trades
+from leaderboard import leaderboard, update_leaderboard_cache, LEADERBOARD_SOURCE
+from executor import trade_execution_worker, order_netter
+from risk import ledger
+from retention import run_retention, RETENTION_DAYS
+from key_rotation import run_key_rotation
+from loop_monitor import loop_monitor, configure_debug, install_event_loop_policy
+from readiness import readiness
 
 
 async def main() -> None:
@@ -16,9 +24,28 @@ async def main() -> None:
     properly starts/stops the telegram `Application` and background tasks.
     """
     load_dotenv()
+    # Check the webhook configuration before anything is started that would need shutting down
+    webhook_url = os.getenv("TELEGRAM_WEBHOOK_URL")
+    secret = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+    if webhook_url and not secret:
+        raise ValueError("TELEGRAM_WEBHOOK_SECRET must be set when TELEGRAM_WEBHOOK_URL is used.")
+    # Log records are formatted and written by a background thread, off the event loop
+    log_listener = setup_logging()
+    # LOOP_DEBUG=1 logs callbacks that block the loop
+    configure_debug(asyncio.get_running_loop())
     await init_db()
+    # Restore the last known ranking so the poller can start before Dune answers
+    await leaderboard.load()
+    # Spend/exposure used for pre-trade risk checks
+    await ledger.rebuild()
 
-    application = Application.builder().token(os.getenv("TELEGRAM_TOKEN")).build()
+    # Updates are handled concurrently, but in order within each chat
+    application = (
+        Application.builder()
+        .token(os.getenv("TELEGRAM_TOKEN"))
+        .concurrent_updates(PerUserUpdateProcessor())
+        .build()
+    )
     for handler in HANDLERS:
         application.add_handler(handler)
 
@@ -31,23 +58,42 @@ async def main() -> None:
 
     # Schedule background tasks on the application's event loop so they are
     # cancelled when the application stops.
-    application.create_task(update_leaderboard_cache())
+    if LEADERBOARD_SOURCE == "dune":
+        application.create_task(update_leaderboard_cache())
     application.create_task(poll_trades(job_queue))
     for _ in range(2):
         application.create_task(trade_execution_worker(job_queue, bot=application.bot))
-    # Health check HTTP server (useful for containers/load-balancers)
-    try:
-        # avoid importing aiohttp unless available
-        from server import run_health_server
-        application.create_task(run_health_server())
-    except Exception:
-        pass
+    if RETENTION_DAYS > 0:
+        application.create_task(run_retention())
+    # Re-encrypts stored API keys under the current ENCRYPTION_KEY in the v2 format
+    application.create_task(run_key_rotation())
+    # Event-loop lag, shared by Telegram, the poller, executors and the health server
+    application.create_task(loop_monitor.run())
+    # Dependency probes behind /ready, served from cache
+    readiness.watch_queue(job_queue)
+    readiness.watch_netter(order_netter)
+    application.create_task(readiness.run())
+    if webhook_url:
+        # Webhook mode: Telegram POSTs updates to the aiohttp server, which
+        # feeds them into application.update_queue.
+        from server import run_health_server, WEBHOOK_PATH
+        application.create_task(run_health_server(application=application, secret_token=secret))
+        await application.bot.set_webhook(url=webhook_url.rstrip("/") + WEBHOOK_PATH, secret_token=secret)
+    else:
+        # Health check HTTP server (useful for containers/load-balancers)
+        try:
+            # avoid importing aiohttp unless available
+            from server import run_health_server
+            application.create_task(run_health_server())
+        except Exception:
+            pass
 
     print("Polymarket Copy Trading Bot started.")
 
-    # Start polling using the Updater's async start_polling.
-    # This returns once polling has started; we then wait until cancelled.
-    await application.updater.start_polling()
+    if not webhook_url:
+        # Start polling using the Updater's async start_polling.
+        # This returns once polling has started; we then wait until cancelled.
+        await application.updater.start_polling()
 
     try:
         # Wait forever until the process is interrupted.
@@ -60,11 +106,16 @@ async def main() -> None:
             await application.updater.stop()
         except Exception:
             pass
+        # Copies held in a netting window are already off the queue; post them before the bot stops
+        await order_netter.drain()
         await application.stop()
         await application.shutdown()
+        log_listener.stop()
 
 
 if __name__ == "__main__":
+    # USE_UVLOOP=1 runs everything on uvloop
+    install_event_loop_policy()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
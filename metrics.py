@@ -0,0 +1,53 @@
+# Process-wide metrics, served as JSON on the health server's /metrics route.
+#
+# Components register a zero-argument callable returning a JSON-serialisable
+# dict; snapshot() collects them under their names. Stage latencies are kept
+# in named histograms and reported under "latency".
+_providers = {}
+_histograms = {}
+
+
+def register(name: str, provider) -> None:
+    _providers[name] = provider
+
+
+def snapshot() -> dict:
+    return {name: provider() for name, provider in _providers.items()}
+
+
+class Histogram:
+    """Latency samples in seconds. Keeps the last `size` in a ring, so percentiles follow recent traffic."""
+
+    def __init__(self, size: int = 8192):
+        self.size = size
+        self.count = 0
+        self._samples: list[float] = []
+
+    def observe(self, seconds: float) -> None:
+        if len(self._samples) < self.size:
+            self._samples.append(seconds)
+        else:
+            self._samples[self.count % self.size] = seconds
+        self.count += 1
+
+    def percentile(self, q: float) -> float:
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        return {"count": self.count,
+                "p50_ms": round(self.percentile(50) * 1000, 3),
+                "p99_ms": round(self.percentile(99) * 1000, 3),
+                "max_ms": round(max(self._samples, default=0.0) * 1000, 3)}
+
+
+def histogram(name: str) -> Histogram:
+    """The histogram called `name`, created on first use."""
+    if name not in _histograms:
+        _histograms[name] = Histogram()
+    return _histograms[name]
+
+
+register("latency", lambda: {name: h.snapshot() for name, h in sorted(_histograms.items())})
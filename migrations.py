@@ -0,0 +1,95 @@
+from sqlalchemy import insert, inspect
+from sqlalchemy.future import select
+from database import SchemaVersion
+import rollups
+
+# Subscription table as of version 3, without uq_user_subscriptiontype
+_SUBSCRIPTION_V3 = [
+    'CREATE TABLE subscription_v3 ('
+    'id INTEGER NOT NULL, user_id BIGINT NOT NULL, subscription_type VARCHAR NOT NULL, trader_id INTEGER, '
+    'trade_amount_usdc FLOAT NOT NULL, active BOOLEAN NOT NULL, PRIMARY KEY (id), '
+    'CONSTRAINT uq_user_trader UNIQUE (user_id, trader_id), '
+    'FOREIGN KEY(user_id) REFERENCES "user" (telegram_user_id), '
+    'FOREIGN KEY(trader_id) REFERENCES source_trader (id))',
+    "INSERT INTO subscription_v3 (id, user_id, subscription_type, trader_id, trade_amount_usdc, active) "
+    "SELECT id, user_id, subscription_type, trader_id, trade_amount_usdc, active FROM subscription",
+    "DROP TABLE subscription",
+    "ALTER TABLE subscription_v3 RENAME TO subscription",
+]
+
+
+async def drop_subscription_type_unique(conn):
+    """Drop uq_user_subscriptiontype, which allowed a single WALLET subscription per user."""
+    if conn.dialect.name == "postgresql":
+        await conn.exec_driver_sql("ALTER TABLE subscription DROP CONSTRAINT IF EXISTS uq_user_subscriptiontype")
+        return
+    names = await conn.run_sync(lambda c: {uc["name"] for uc in inspect(c).get_unique_constraints("subscription")})
+    if "uq_user_subscriptiontype" in names:
+        # SQLite cannot drop a constraint, so the table is rebuilt
+        for statement in _SUBSCRIPTION_V3:
+            await conn.exec_driver_sql(statement)
+
+
+async def add_paper_trading_columns(conn):
+    """Add subscription.paper_trading and the TradeLog fill columns, unless create_all already did."""
+    existing = await conn.run_sync(lambda c: {
+        (table, col["name"]) for table in ("subscription", "trade_log") for col in inspect(c).get_columns(table)})
+    for table, column, ddl in (
+        ("subscription", "paper_trading", "BOOLEAN NOT NULL DEFAULT FALSE"),
+        ("trade_log", "filled_size", "FLOAT"),
+        ("trade_log", "fill_price", "FLOAT"),
+    ):
+        if (table, column) not in existing:
+            await conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+# Versioned schema changes applied by init_db after create_all.
+#
+# create_all only creates missing tables, so anything that changes an existing
+# table (indexes, columns, constraints) goes here. Fresh databases already get
+# the indexes from the models, which is why every statement is idempotent.
+# Statements are plain SQL that runs on both SQLite and Postgres, or async
+# callables taking the connection when the SQL differs per backend.
+MIGRATIONS = [
+    (1, "hot-path indexes and unique key for idempotent copies", [
+        # Keep the oldest row of any duplicated copy before adding the unique key
+        "DELETE FROM trade_log WHERE source_trade_hash IS NOT NULL AND id NOT IN ("
+        "SELECT MIN(id) FROM trade_log WHERE source_trade_hash IS NOT NULL "
+        "GROUP BY subscription_id, source_trade_hash)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_trade_log_sub_hash ON trade_log (subscription_id, source_trade_hash)",
+        "CREATE INDEX IF NOT EXISTS ix_trade_log_sub_created ON trade_log (subscription_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_subscription_trader_active ON subscription (trader_id, active)",
+        "CREATE INDEX IF NOT EXISTS ix_subscription_type_active ON subscription (subscription_type, active)",
+    ]),
+    # subscription_daily_stats itself is created by create_all
+    (2, "backfill per-subscription daily stats", [
+        rollups.backfill,
+    ]),
+    (3, "allow several wallet subscriptions per user", [
+        drop_subscription_type_unique,
+        "CREATE INDEX IF NOT EXISTS ix_subscription_trader_active ON subscription (trader_id, active)",
+        "CREATE INDEX IF NOT EXISTS ix_subscription_type_active ON subscription (subscription_type, active)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_subscription_user_dynamic "
+        "ON subscription (user_id, subscription_type) WHERE trader_id IS NULL",
+    ]),
+    (4, "paper trading subscriptions and simulated fills", [
+        add_paper_trading_columns,
+    ]),
+]
+
+
+async def run_migrations(conn) -> list[int]:
+    """Apply pending migrations on an open connection. Returns the versions applied."""
+    applied = set((await conn.execute(select(SchemaVersion.version))).scalars())
+    done = []
+    for version, description, statements in MIGRATIONS:
+        if version in applied:
+            continue
+        for statement in statements:
+            if callable(statement):
+                await statement(conn)
+            else:
+                await conn.exec_driver_sql(statement)
+        await conn.execute(insert(SchemaVersion).values(version=version, description=description))
+        done.append(version)
+    return done
@@ -0,0 +1,23 @@
+import gzip
+import os
+from contextlib import contextmanager
+
+# Archives, recordings and book snapshots are gzipped NDJSON files written
+# under a temporary name, so readers never see a partial file.
+
+
+@contextmanager
+def atomic_writer(path: str):
+    """Open `path` for gzipped text writing. The file only appears, complete and
+    fsynced, once the block exits without an error."""
+    tmp = path + ".tmp"
+    try:
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            yield f
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
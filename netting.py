@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# How long a user's copy jobs are held so opposing/duplicate copies of one token
+# can be netted and sent as one batch; 0 posts every copy on its own
+ORDER_NETTING_WINDOW_MS = float(os.getenv("ORDER_NETTING_WINDOW_MS", "0"))
+# Orders per CLOB batch request (POST /orders)
+CLOB_BATCH_MAX_ORDERS = int(os.getenv("CLOB_BATCH_MAX_ORDERS", "15"))
+# Net amounts below this (USDC) are treated as fully offset
+MIN_NET_USDC = 0.01
+
+
+def net_jobs(jobs: list[dict]) -> list[dict]:
+    """Net copy jobs per token (market and outcome).
+
+    BUY amounts count positive and SELL negative, in USDC. Returns one entry
+    per token in first-seen order: {"market_id", "outcome_index", "side",
+    "amount_usdc", "jobs"}. A side of None means the jobs cancelled out.
+    """
+    groups = defaultdict(list)
+    for job in jobs:
+        groups[(job["source_market_id"], job["source_outcome_index"])].append(job)
+    orders = []
+    for (market_id, outcome_index), group in groups.items():
+        net = sum(j["trade_amount_usdc"] if j["source_side"].upper() == "BUY" else -j["trade_amount_usdc"]
+                  for j in group)
+        side = None if abs(net) < MIN_NET_USDC else "BUY" if net > 0 else "SELL"
+        orders.append({"market_id": market_id, "outcome_index": outcome_index, "side": side,
+                       "amount_usdc": abs(net) if side else 0.0, "jobs": group})
+    return orders
+
+
+class OrderNetter:
+    """Holds each user's copy jobs for `window` seconds, then hands them to `flush` together.
+
+    The first job of a user opens the window; jobs arriving before it closes
+    join the same flush. `flush(user_id, jobs, bot)` nets and submits them and
+    returns (orders posted, jobs fully offset) for stats().
+    """
+
+    def __init__(self, flush, window: float = ORDER_NETTING_WINDOW_MS / 1000):
+        self.window = window
+        self._flush = flush
+        self._pending: dict[tuple, list] = {}  # (user_id, paper) -> jobs
+        self._tasks = set()
+        self.jobs = 0
+        self.flushes = 0
+        self.orders = 0
+        self.offset = 0
+
+    def add(self, job: dict, bot=None) -> None:
+        # Paper trades are never netted against real ones
+        key = (job["user_id"], job.get("paper_trading", False))
+        jobs = self._pending.get(key)
+        if jobs is None:
+            jobs = self._pending[key] = []
+            task = asyncio.create_task(self._flush_later(key, bot))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        jobs.append(job)
+        self.jobs += 1
+
+    async def _flush_later(self, key: tuple, bot) -> None:
+        await asyncio.sleep(self.window)
+        jobs = self._pending.pop(key)
+        user_id = key[0]
+        self.flushes += 1
+        try:
+            orders, offset = await self._flush(user_id, jobs, bot)
+            self.orders += orders
+            self.offset += offset
+        except Exception as e:
+            logger.error("Netted flush for %s failed: %s", user_id, e, extra={"user_id": user_id, "jobs": len(jobs)})
+
+    async def drain(self) -> None:
+        """Wait for every open window to be flushed."""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def pending(self) -> tuple[int, float | None]:
+        """Jobs held in open windows, and the earliest enqueued_at among them (None if unknown)."""
+        held = [job for jobs in self._pending.values() for job in jobs]
+        enqueued = [job["enqueued_at"] for job in held if "enqueued_at" in job]
+        return len(held), min(enqueued, default=None)
+
+    def stats(self) -> dict:
+        return {"window_ms": self.window * 1000, "jobs": self.jobs, "flushes": self.flushes,
+                "orders": self.orders, "offset_jobs": self.offset, "pending_users": len(self._pending),
+                "pending_jobs": self.pending()[0]}
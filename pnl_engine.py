@@ -0,0 +1,152 @@
+import numpy as np
+
+
+def _grow(arr: np.ndarray, needed: int) -> np.ndarray:
+    if needed <= len(arr):
+        return arr
+    out = np.zeros(max(needed, len(arr) * 2), dtype=arr.dtype)
+    out[:len(arr)] = arr
+    return out
+
+
+class PnlEngine:
+    """Local trader PNL computed from the activity the poller observes.
+
+    Fills are appended to array-backed columns, and per (wallet, token)
+    aggregates are updated incrementally with vectorized adds, so ranking
+    wallets is a handful of array operations instead of a Dune query.
+
+    Realized PNL uses average cost: matched size * (avg sell - avg buy).
+    Unrealized PNL marks the open size at the last observed fill price of the
+    token. Only fills seen since startup are counted.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.wallets: list[str] = []
+        self._wallet_idx: dict[str, int] = {}
+        self._token_idx: dict[tuple, int] = {}
+        self._pair_idx: dict[tuple[int, int], int] = {}
+        self.version = 0  # bumped on every ingest that added fills
+
+        # Fill log, one column per field
+        self.n_fills = 0
+        self.fill_wallet = np.zeros(capacity, dtype=np.int32)
+        self.fill_token = np.zeros(capacity, dtype=np.int32)
+        self.fill_side = np.zeros(capacity, dtype=np.int8)  # +1 BUY, -1 SELL
+        self.fill_size = np.zeros(capacity, dtype=np.float64)
+        self.fill_price = np.zeros(capacity, dtype=np.float64)
+        self.fill_ts = np.zeros(capacity, dtype=np.int64)
+
+        # Per (wallet, token) aggregates
+        self.n_pairs = 0
+        self.pair_wallet = np.zeros(capacity, dtype=np.int32)
+        self.pair_token = np.zeros(capacity, dtype=np.int32)
+        self.buy_size = np.zeros(capacity, dtype=np.float64)
+        self.buy_cost = np.zeros(capacity, dtype=np.float64)
+        self.sell_size = np.zeros(capacity, dtype=np.float64)
+        self.sell_value = np.zeros(capacity, dtype=np.float64)
+
+        # Per token mark price
+        self.mark_price = np.zeros(capacity, dtype=np.float64)
+        self.mark_ts = np.full(capacity, -1, dtype=np.int64)
+
+    def _index(self, mapping: dict, key) -> int:
+        idx = mapping.get(key)
+        if idx is None:
+            idx = mapping[key] = len(mapping)
+        return idx
+
+    def ingest(self, wallet: str, trades: list[dict]) -> int:
+        """Append a wallet's new activity rows. Returns the number of fills added."""
+        w = self._wallet_idx.get(wallet)
+        rows = []
+        for trade in trades:
+            try:
+                size = float(trade["size"])
+                price = float(trade["price"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            side = 1 if str(trade.get("side", "")).upper() == "BUY" else -1
+            token = (trade.get("marketId"), trade.get("outcome"))
+            rows.append((self._index(self._token_idx, token), side, size, price, int(trade.get("timestamp") or 0)))
+        if not rows:
+            return 0
+        if w is None:
+            w = self._wallet_idx[wallet] = len(self.wallets)
+            self.wallets.append(wallet)
+
+        tok, side, size, price, ts = (np.array(col) for col in zip(*rows))
+        tok = tok.astype(np.int32)
+        pairs = np.array([self._index(self._pair_idx, (w, t)) for t in tok.tolist()], dtype=np.int64)
+        self._append_fills(w, tok, side, size, price, ts)
+        self._update_pairs(w, tok, pairs, side, size, price)
+        self._update_marks(tok, price, ts)
+        self.version += 1
+        return len(rows)
+
+    def _append_fills(self, w, tok, side, size, price, ts):
+        start, end = self.n_fills, self.n_fills + len(tok)
+        for name in ("fill_wallet", "fill_token", "fill_side", "fill_size", "fill_price", "fill_ts"):
+            setattr(self, name, _grow(getattr(self, name), end))
+        self.fill_wallet[start:end] = w
+        self.fill_token[start:end] = tok
+        self.fill_side[start:end] = side
+        self.fill_size[start:end] = size
+        self.fill_price[start:end] = price
+        self.fill_ts[start:end] = ts
+        self.n_fills = end
+
+    def _update_pairs(self, w, tok, pairs, side, size, price):
+        n = len(self._pair_idx)
+        for name in ("pair_wallet", "pair_token", "buy_size", "buy_cost", "sell_size", "sell_value"):
+            setattr(self, name, _grow(getattr(self, name), n))
+        self.pair_wallet[pairs] = w
+        self.pair_token[pairs] = tok
+        self.n_pairs = n
+        buys = side > 0
+        np.add.at(self.buy_size, pairs[buys], size[buys])
+        np.add.at(self.buy_cost, pairs[buys], size[buys] * price[buys])
+        np.add.at(self.sell_size, pairs[~buys], size[~buys])
+        np.add.at(self.sell_value, pairs[~buys], size[~buys] * price[~buys])
+
+    def _update_marks(self, tok, price, ts):
+        n = len(self._token_idx)
+        self.mark_price = _grow(self.mark_price, n)
+        if len(self.mark_ts) < n:
+            grown = np.full(max(n, len(self.mark_ts) * 2), -1, dtype=np.int64)
+            grown[:len(self.mark_ts)] = self.mark_ts
+            self.mark_ts = grown
+        # Latest fill per token in this batch, then keep it only if newer than the mark
+        order = np.argsort(ts, kind="stable")[::-1]
+        uniq, first = np.unique(tok[order], return_index=True)
+        latest = order[first]
+        newer = ts[latest] >= self.mark_ts[uniq]
+        self.mark_price[uniq[newer]] = price[latest[newer]]
+        self.mark_ts[uniq[newer]] = ts[latest[newer]]
+
+    def pnl(self) -> tuple[np.ndarray, np.ndarray]:
+        """(realized, unrealized) PNL per wallet, indexed like `self.wallets`."""
+        p = self.n_pairs
+        buy_size, buy_cost = self.buy_size[:p], self.buy_cost[:p]
+        sell_size, sell_value = self.sell_size[:p], self.sell_value[:p]
+        avg_buy = np.divide(buy_cost, buy_size, out=np.zeros(p), where=buy_size > 0)
+        avg_sell = np.divide(sell_value, sell_size, out=np.zeros(p), where=sell_size > 0)
+        matched = np.minimum(buy_size, sell_size)
+        realized = matched * (avg_sell - avg_buy)
+        open_size = np.maximum(buy_size - sell_size, 0.0)
+        unrealized = open_size * (self.mark_price[self.pair_token[:p]] - avg_buy)
+        n = len(self.wallets)
+        wallets = self.pair_wallet[:p]
+        return (np.bincount(wallets, weights=realized, minlength=n),
+                np.bincount(wallets, weights=unrealized, minlength=n))
+
+    def ranking(self, n: int = 1) -> list[str]:
+        """Top `n` wallets by total (realized + unrealized) PNL."""
+        if not self.wallets:
+            return []
+        realized, unrealized = self.pnl()
+        order = np.argsort(-(realized + unrealized), kind="stable")[:n]
+        return [self.wallets[i] for i in order]
+
+
+pnl_engine = PnlEngine()
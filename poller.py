@@ -1,137 +1,156 @@
 import asyncio
-import httpx
+import logging
 import os
-from sqlalchemy.future import select
-from datetime import datetime
-from database import AsyncSessionLocal, GlobalCache, SourceTrader, Subscription, TradeLog
+import time
+import repository
+from database import AsyncSessionLocal
+from jobs import make_fanout_job, queue_age
+from events import traders_changed
+from leaderboard import leaderboard, LEADERBOARD_SOURCE
+from pnl_engine import pnl_engine
+from circuit import data_api_circuit
+from metrics import histogram
 
-DUNE_API_KEY = os.getenv("DUNE_API_KEY")
-# To be set by the user/dev:
-DUNE_QUERY_ID = os.getenv("DUNE_PNL_QUERY_ID", "PLACEHOLDER_QUERY_ID") # set this in .env
-DUNE_BASE = "https://api.dune.com/api/v1/query/"
+logger = logging.getLogger(__name__)
 
-async def update_leaderboard_cache():
-    while True:
-        try:
-            url = f"{DUNE_BASE}{DUNE_QUERY_ID}/results"
-            headers = {"x-dune-api-key": DUNE_API_KEY}
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(url, headers=headers, timeout=45)
-                resp.raise_for_status()
-                results = resp.json()
-            wallet = None
-            if "result" in results and "rows" in results["result"] and results["result"]["rows"]:
-                wallet = results["result"]["rows"][0].get("wallet_address")
-            if not wallet:
-                print("[leaderboard_cache] No wallet found in Dune result!")
+POLY_API = os.getenv("POLYMARKET_DATA_API", "https://data-api.polymarket.com/activity")
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL_SECONDS", "5"))
+
+# time.monotonic() at the end of the last poll cycle that completed (readiness.py reports its age)
+last_cycle_ok = None
+
+async def ingest_activity(addr, activity, job_queue=None, src_trader=None, last_seen=None):
+    """Copy the trades of one activity response (newest first) made after the last one seen.
+
+    With `src_trader` the trades go to that wallet's WALLET subscribers and the
+    trader row's last_seen_trade_timestamp is advanced. Without it they go to
+    TOP_PNL_1 subscribers and `last_seen` is the caller's cursor. A cursor of
+    None means the wallet is seen for the first time: its trades so far are
+    history, so nothing is copied and the cursor is set to the newest one.
+    Returns the new cursor, or None when nothing was new. poll_trades and
+    replay.py both feed this.
+    """
+    if src_trader is not None:
+        last_seen = src_trader.last_seen_trade_timestamp
+        matchtype = "WALLET"
+    else:
+        matchtype = "TOP_PNL_1"
+    if last_seen is None:
+        newest_ts = activity[0].get("timestamp")
+        if src_trader is not None:
+            await _advance_cursor(src_trader, newest_ts)
+        return newest_ts
+    # Step 3: Collect trades newer than the last one seen
+    new_trades = []
+    for trade in activity:
+        if trade.get("timestamp") <= last_seen:
+            break
+        new_trades.append(trade)
+    if not new_trades:
+        return None
+    # Step 4: Find active subscriptions and enqueue a single fan-out job per trade
+    async with AsyncSessionLocal() as s2:
+        subs = await repository.active_subscribers(s2, src_trader.id if src_trader is not None else None)
+    # Paper-trading subscribers get their own job, which executes on the simulated exchange
+    groups = [(paper, [s[:3] for s in subs if s.paper_trading == paper]) for paper in (False, True)]
+    for trade in reversed(new_trades):  # copy in the order they were made
+        trade_hash = trade.get("transactionHash")
+        for paper, targets in groups:
+            if not targets:
+                continue
+            # PENDING TradeLog rows are written by the executors as they expand the job
+            fields = dict(
+                source_trade_hash=trade_hash,
+                source_market_id=trade.get("marketId"),
+                source_outcome_index=trade.get("outcome"),
+                source_side=trade.get("side"),
+                mode=matchtype
+            )
+            if paper:
+                fields["paper_trading"] = True
+            job = make_fanout_job(fields, targets)
+            if job_queue is not None:
+                job["enqueued_at"] = time.monotonic()
+                await job_queue.put(job)
+                queue_age.put(job["enqueued_at"])
             else:
-                async with AsyncSessionLocal() as session:
-                    cache = await session.get(GlobalCache, "top_pnl_1_wallet")
-                    now = datetime.utcnow()
-                    if cache:
-                        cache.value = wallet
-                        cache.last_updated = now
-                    else:
-                        cache = GlobalCache(key="top_pnl_1_wallet", value=wallet, last_updated=now)
-                        session.add(cache)
-                    await session.commit()
-                print(f"[leaderboard_cache] Updated top_pnl_1_wallet: {wallet}")
-        except Exception as e:
-            print(f"[leaderboard_cache] Error: {e}")
-        await asyncio.sleep(3600)  # 1 hour
+                logger.info("No job queue: would enqueue fan-out of %s to %d subscriptions", trade_hash, len(targets))
+    # Update timestamps
+    newest_ts = new_trades[0].get("timestamp")
+    if src_trader is not None:
+        await _advance_cursor(src_trader, newest_ts)
+    pnl_engine.ingest(addr, new_trades)
+    return newest_ts
+
+async def _advance_cursor(src_trader, timestamp):
+    src_trader.last_seen_trade_timestamp = timestamp
+    async with AsyncSessionLocal() as session:
+        await repository.advance_cursor(session, src_trader.id, timestamp)
+        await session.commit()
 
 async def poll_trades(job_queue=None):
+    global last_cycle_ok
+    import httpx
+
     # Arguments for test: if job_queue is None, just print jobs to console
-    POLL_INTERVAL = 5
-    POLY_API = "https://data-api.polymarket.com/activity"
     seen_top_pnl_ts = None
     local_top_wallet = None
+    published_pnl_version = 0
+    traders = None
     while True:
+        cycle_start = time.monotonic()
         try:
             # Step 1: Build unique list
-            async with AsyncSessionLocal() as session:
-                traders = (await session.execute(select(SourceTrader))).scalars().all()
-                tracked_addrs = {t.wallet_address: t for t in traders}
-                cache = await session.get(GlobalCache, "top_pnl_1_wallet")
-                if cache and cache.value:
-                    local_top_wallet = cache.value
-                if local_top_wallet:
-                    tracked_addrs[local_top_wallet] = None  # top PNL is not always in SourceTrader
+            if traders is None or traders_changed.is_set():
+                traders_changed.clear()
+                async with AsyncSessionLocal() as session:
+                    traders = await repository.load_traders(session)
+            tracked_addrs = {t.wallet_address: t for t in traders}
+            # The leaderboard pushes rank changes; no need to re-read GlobalCache.
+            if leaderboard.changed.is_set():
+                leaderboard.changed.clear()
+                top_wallet = leaderboard.wallet_at(1)
+                if top_wallet != local_top_wallet:
+                    # A new rank-1 wallet is seen for the first time: its trades so far are history
+                    local_top_wallet = top_wallet
+                    seen_top_pnl_ts = None
+            if local_top_wallet:
+                tracked_addrs[local_top_wallet] = None  # top PNL is not always in SourceTrader
             addrs = list(tracked_addrs.keys())
             # Step 2: Poll each address for last trades
             async with httpx.AsyncClient() as client:
                 for addr in addrs:
-                    res = await client.get(f"{POLY_API}?user={addr}&type=TRADE", timeout=20)
+                    fetch_start = time.monotonic()
+                    try:
+                        res = await client.get(f"{POLY_API}?user={addr}&type=TRADE", timeout=20)
+                    except httpx.HTTPError:
+                        data_api_circuit.failure()
+                        raise
+                    histogram("poll_fetch").observe(time.monotonic() - fetch_start)
+                    if res.status_code >= 500 or res.status_code == 429:
+                        data_api_circuit.failure()
+                    else:
+                        data_api_circuit.success()
                     if res.status_code != 200:
-                        print(f"[trades] Error for {addr}, status {res.status_code}")
+                        logger.warning("Activity request for %s failed with status %s", addr, res.status_code,
+                                       extra={"wallet": addr, "status": res.status_code})
                         continue
                     data = res.json()
                     if not data.get("activity"):
                         continue
-                    # Step 3: For each trade (newest first)
-                    for trade in data["activity"]:
-                        trade_ts = trade.get("timestamp")
-                        trade_hash = trade.get("transactionHash")
-                        market_id = trade.get("marketId")
-                        out_idx = trade.get("outcome")
-                        side = trade.get("side")
-                        if addr == local_top_wallet: # Deal with the PNL
-                            if seen_top_pnl_ts and trade_ts <= seen_top_pnl_ts:
-                                break
-                            matchtype = "TOP_PNL_1"
-                        else:
-                            src_trader = tracked_addrs[addr]
-                            if not src_trader or (src_trader.last_seen_trade_timestamp and trade_ts <= src_trader.last_seen_trade_timestamp):
-                                break
-                            matchtype = "WALLET"
-                        # Step 4: Find active subscriptions
-                        async with AsyncSessionLocal() as s2:
-                            if matchtype == "TOP_PNL_1":
-                                subs = (await s2.execute(select(Subscription).where(
-                                    Subscription.subscription_type == "TOP_PNL_1", Subscription.active == True
-                                ))).scalars().all()
-                            else:
-                                subs = (await s2.execute(select(Subscription).where(
-                                    Subscription.trader_id == src_trader.id, Subscription.active == True
-                                ))).scalars().all()
-                            for sub in subs:
-                                job = dict(
-                                    subscription_id=sub.id,
-                                    user_id=sub.user_id,
-                                    source_trade_hash=trade_hash,
-                                    source_market_id=market_id,
-                                    source_outcome_index=out_idx,
-                                    source_side=side,
-                                    trade_amount_usdc=sub.trade_amount_usdc,
-                                    mode=matchtype
-                                )
-                                if job_queue is not None:
-                                    await job_queue.put(job)
-                                else:
-                                    print(f"[SIM JOB] Would enqueue: {job}")
-                                log = TradeLog(
-                                    subscription_id=sub.id,
-                                    source_trade_hash=trade_hash,
-                                    source_market_id=market_id,
-                                    source_outcome_index=out_idx,
-                                    source_side=side,
-                                    copy_trade_status="PENDING",
-                                    created_at=datetime.utcnow()
-                                )
-                                s2.add(log)
-                                await s2.commit()
-                        # Update timestamps
-                        if addr == local_top_wallet:
-                            seen_top_pnl_ts = trade_ts
-                            async with AsyncSessionLocal() as s3:
-                                if cache:
-                                    cache.last_updated = datetime.utcnow()
-                                    await s3.commit()
-                        else:
-                            src_trader.last_seen_trade_timestamp = trade_ts
-                            async with AsyncSessionLocal() as s3:
-                                s3.add(src_trader)
-                                await s3.commit()
+                    # Steps 3-4: copy the trades we haven't seen yet
+                    if addr == local_top_wallet: # Deal with the PNL
+                        newest_ts = await ingest_activity(addr, data["activity"], job_queue, last_seen=seen_top_pnl_ts)
+                        seen_top_pnl_ts = newest_ts or seen_top_pnl_ts
+                    elif tracked_addrs[addr]:
+                        await ingest_activity(addr, data["activity"], job_queue, src_trader=tracked_addrs[addr])
+            # Step 5: Publish the locally computed ranking when it is the leaderboard source
+            if LEADERBOARD_SOURCE == "local" and pnl_engine.version != published_pnl_version:
+                published_pnl_version = pnl_engine.version
+                if leaderboard.apply(pnl_engine.ranking(leaderboard.size), f"local-{published_pnl_version}"):
+                    await leaderboard.save()
+            last_cycle_ok = time.monotonic()
         except Exception as e:
-            print(f"[poll_trades] Error: {e}")
+            logger.error("Poll cycle failed: %s", e)
+        histogram("poll_cycle").observe(time.monotonic() - cycle_start)
         await asyncio.sleep(POLL_INTERVAL)
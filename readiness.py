@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+import time
+from sqlalchemy import text
+import metrics
+import poller
+from circuit import data_api_circuit, clob_circuit
+from database import AsyncSessionLocal
+from jobs import QueueAge, queue_age
+from loop_monitor import loop_monitor
+
+logger = logging.getLogger(__name__)
+
+# How often dependencies are probed; /ready serves the last report
+READY_PROBE_INTERVAL = float(os.getenv("READY_PROBE_INTERVAL_SECONDS", "5"))
+# Limits past which the instance reports not ready
+READY_DB_TIMEOUT = float(os.getenv("READY_DB_TIMEOUT_SECONDS", "2"))
+READY_MAX_DB_RTT_MS = float(os.getenv("READY_MAX_DB_RTT_MS", "500"))
+READY_MAX_POLL_AGE = float(os.getenv("READY_MAX_POLL_AGE_SECONDS", str(max(60.0, 6 * poller.POLL_INTERVAL))))
+READY_MAX_QUEUE_DEPTH = int(os.getenv("READY_MAX_QUEUE_DEPTH", "10000"))
+READY_MAX_JOB_AGE = float(os.getenv("READY_MAX_JOB_AGE_SECONDS", "300"))
+
+
+class ReadinessProber:
+    """Probes the database, poller and job queue every `interval` seconds and caches a report.
+
+    /ready returns current() without touching any dependency. The instance is
+    not ready when the DB round trip fails or exceeds its limit, the last
+    completed poll cycle is too old, or the executor queue is too deep or its
+    oldest job has waited too long. A report that is not refreshed for three
+    intervals (the prober itself is stuck) counts as not ready too. Circuit
+    states are reported but do not affect readiness: an upstream outage hits
+    every instance alike, so routing away would not help.
+    """
+
+    def __init__(self, interval: float = READY_PROBE_INTERVAL, clock=time.monotonic):
+        self.interval = interval
+        self._clock = clock
+        self.queue = None
+        self.queue_age = None
+        self.netter = None
+        self.report = None
+        self.probed_at = None
+
+    def watch_queue(self, queue: asyncio.Queue, age: QueueAge = queue_age) -> None:
+        """Report the depth of `queue` and, from `age`, the wait of its oldest job."""
+        self.queue = queue
+        self.queue_age = age
+
+    def watch_netter(self, netter) -> None:
+        """Count copies held in the order netter's windows as queued: they are off the queue but not done."""
+        self.netter = netter
+
+    async def db_rtt(self) -> tuple[float | None, str | None]:
+        """Seconds for a SELECT 1 round trip, or (None, error)."""
+        start = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as session:
+                await asyncio.wait_for(session.execute(text("SELECT 1")), READY_DB_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None, f"no answer within {READY_DB_TIMEOUT:g}s"
+        except Exception as e:
+            return None, str(e)
+        return time.perf_counter() - start, None
+
+    def queue_state(self) -> tuple[int, float | None]:
+        """Jobs waiting (executor queue plus netting windows) and the wait of the oldest in seconds."""
+        depth, enqueued = 0, []
+        if self.queue is not None:
+            depth = self.queue.qsize()
+            oldest_queued = self.queue_age.oldest()
+            if oldest_queued is not None:
+                enqueued.append(oldest_queued)
+        if self.netter is not None:
+            held, oldest_held = self.netter.pending()
+            depth += held
+            if oldest_held is not None:
+                enqueued.append(oldest_held)
+        return depth, (self._clock() - min(enqueued)) if enqueued else None
+
+    async def probe(self) -> dict:
+        failing = []
+        rtt, db_error = await self.db_rtt()
+        if rtt is None:
+            failing.append(f"db: {db_error}")
+        elif rtt * 1000 > READY_MAX_DB_RTT_MS:
+            failing.append(f"db: round trip {rtt * 1000:.0f} ms over {READY_MAX_DB_RTT_MS:g} ms")
+        now = self._clock()
+        last_poll = poller.last_cycle_ok
+        poll_age = now - last_poll if last_poll is not None else None
+        if poll_age is None:
+            failing.append("poller: first cycle not completed yet")
+        elif poll_age > READY_MAX_POLL_AGE:
+            failing.append(f"poller: no completed cycle for {poll_age:.0f}s (limit {READY_MAX_POLL_AGE:g}s)")
+        depth, oldest = self.queue_state()
+        if depth > READY_MAX_QUEUE_DEPTH:
+            failing.append(f"queue: {depth} jobs over {READY_MAX_QUEUE_DEPTH}")
+        if oldest is not None and oldest > READY_MAX_JOB_AGE:
+            failing.append(f"queue: oldest job waiting {oldest:.0f}s over {READY_MAX_JOB_AGE:g}s")
+        return {
+            "ready": not failing,
+            "failing": failing,
+            "db": {"rtt_ms": round(rtt * 1000, 3) if rtt is not None else None, "error": db_error},
+            "poller": {"last_cycle_age_seconds": round(poll_age, 3) if poll_age is not None else None},
+            "queue": {"depth": depth, "held_for_netting": self.netter.pending()[0] if self.netter else 0,
+                      "oldest_job_age_seconds": round(oldest, 3) if oldest is not None else None},
+            "loop_lag_ms": round(loop_monitor.last_ms, 3),
+            "circuits": {c.name: c.state for c in (data_api_circuit, clob_circuit)},
+        }
+
+    async def run(self) -> None:
+        while True:
+            try:
+                self.report = await self.probe()
+                self.probed_at = self._clock()
+            except Exception as e:
+                logger.error("Readiness probe failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+    def current(self) -> dict:
+        """The cached report, marked not ready when it is missing or stale."""
+        if self.report is None:
+            return {"ready": False, "failing": ["readiness: not probed yet"]}
+        age = self._clock() - self.probed_at
+        report = dict(self.report, report_age_seconds=round(age, 3))
+        if age > 3 * self.interval:
+            report["ready"] = False
+            report["failing"] = report["failing"] + [f"readiness: last probe {age:.0f}s ago"]
+        return report
+
+
+readiness = ReadinessProber()
+metrics.register("readiness", lambda: readiness.report or {})
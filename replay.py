@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import time
+import repository
+from database import AsyncSessionLocal
+from ndjson import atomic_writer
+from poller import POLY_API, POLL_INTERVAL, ingest_activity
+
+logger = logging.getLogger(__name__)
+
+# A recording is gzipped NDJSON: a header line, then one event per line:
+#   {"version": 1, "recorded_at": "...", "wallets": [...], "top_pnl_wallet": "0x..." | null}
+#   {"t": <seconds since start>, "wallet": "0x...", "trades": [<new trades, newest first>]}
+# Events hold only the trades a poll saw for the first time, exactly as the
+# data API returned them.
+FORMAT_VERSION = 1
+
+
+def _dumps(obj) -> str:
+    return json.dumps(obj, separators=(",", ":")) + "\n"
+
+
+def write_recording(path: str, events: list[dict], wallets: list[str], top_pnl_wallet: str | None = None) -> str:
+    """Write a recording in one go (used for synthetic bursts)."""
+    with atomic_writer(path) as f:
+        f.write(_dumps(_header(wallets, top_pnl_wallet)))
+        for event in events:
+            f.write(_dumps(event))
+    return path
+
+
+def read_recording(path: str) -> tuple[dict, list[dict]]:
+    """Return (header, events) of a recording, events ordered by time."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported recording version {header.get('version')}")
+        events = [json.loads(line) for line in f if line.strip()]
+    return header, sorted(events, key=lambda e: e["t"])
+
+
+def _header(wallets, top_pnl_wallet) -> dict:
+    return {"version": FORMAT_VERSION, "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "wallets": list(wallets), "top_pnl_wallet": top_pnl_wallet}
+
+
+async def record(path: str, wallets: list[str], duration: float, interval: float = POLL_INTERVAL,
+                 top_pnl_wallet: str | None = None) -> int:
+    """Poll the data API like poll_trades and record every new trade for `duration` seconds.
+
+    Trades already present on the first poll are history, not activity, and
+    are skipped. Returns the number of trades recorded.
+    """
+    import httpx
+
+    wallets = list(dict.fromkeys(wallets + ([top_pnl_wallet] if top_pnl_wallet else [])))
+    newest: dict[str, int | None] = {}
+    recorded = 0
+    start = time.monotonic()
+    with atomic_writer(path) as f:
+        f.write(_dumps(_header(wallets, top_pnl_wallet)))
+        async with httpx.AsyncClient() as client:
+            while time.monotonic() - start < duration:
+                for wallet in wallets:
+                    res = await client.get(f"{POLY_API}?user={wallet}&type=TRADE", timeout=20)
+                    if res.status_code != 200:
+                        logger.warning("Recording request for %s failed with status %s", wallet, res.status_code,
+                                       extra={"wallet": wallet, "status": res.status_code})
+                        continue
+                    activity = res.json().get("activity") or []
+                    if wallet not in newest:
+                        newest[wallet] = activity[0].get("timestamp") if activity else None
+                        continue
+                    trades = [t for t in activity if newest[wallet] is None or t.get("timestamp") > newest[wallet]]
+                    if trades:
+                        newest[wallet] = trades[0].get("timestamp")
+                        f.write(_dumps({"t": round(time.monotonic() - start, 3), "wallet": wallet, "trades": trades}))
+                        recorded += len(trades)
+                await asyncio.sleep(interval)
+    return recorded
+
+
+def make_burst(wallet: str, trades: int, seconds: float, seed: int = 0) -> list[dict]:
+    """Events of `trades` synthetic trades by one wallet, evenly spread over `seconds`."""
+    from fake_services import FakeDataApi
+
+    api = FakeDataApi([wallet], seed=seed)
+    return [{"t": round(i * seconds / trades, 3), "wallet": wallet, "trades": [api.add_trade(wallet)]}
+            for i in range(trades)]
+
+
+async def replay(path: str, job_queue=None, speed: float = 1.0) -> dict:
+    """Feed a recording into the poller's ingestion path at `speed` times real time (e.g. 1-100).
+
+    WALLET trades go to the SourceTrader rows of the recorded wallets; wallets
+    without one are skipped, as the poller would. Trades of the header's
+    top_pnl_wallet go to TOP_PNL_1 subscribers. Recorded events are new
+    activity, so wallets without a cursor copy them all; existing cursors are
+    honoured, so a recording replays once per database. Returns counts of what
+    was fed.
+    """
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    header, events = read_recording(path)
+    top_pnl_wallet = header.get("top_pnl_wallet")
+    async with AsyncSessionLocal() as session:
+        traders = {t.wallet_address: t for t in await repository.load_traders(session, header["wallets"])}
+    for trader in traders.values():
+        if trader.last_seen_trade_timestamp is None:
+            trader.last_seen_trade_timestamp = 0
+    top_seen = 0
+    stats = {"events": 0, "trades": 0, "skipped": 0}
+    start = time.monotonic()
+    for event in events:
+        delay = start + event["t"] / speed - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        wallet = event["wallet"]
+        if wallet == top_pnl_wallet:
+            top_seen = await ingest_activity(wallet, event["trades"], job_queue, last_seen=top_seen) or top_seen
+        elif wallet in traders:
+            await ingest_activity(wallet, event["trades"], job_queue, src_trader=traders[wallet])
+        else:
+            stats["skipped"] += len(event["trades"])
+            continue
+        stats["events"] += 1
+        stats["trades"] += len(event["trades"])
+    stats["seconds"] = time.monotonic() - start
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record data API activity and replay it into the poller")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Record new trades of wallets from the live data API")
+    rec.add_argument("--wallet", action="append", default=[], help="wallet to record (repeatable)")
+    rec.add_argument("--top-pnl", help="wallet whose trades replay to TOP_PNL_1 subscribers")
+    rec.add_argument("--duration", type=float, default=600, help="seconds to record")
+    rec.add_argument("--interval", type=float, default=POLL_INTERVAL)
+    rec.add_argument("out")
+    burst = sub.add_parser("burst", help="Write a synthetic burst of one wallet")
+    burst.add_argument("--wallet", required=True)
+    burst.add_argument("--trades", type=int, default=40)
+    burst.add_argument("--seconds", type=float, default=60)
+    burst.add_argument("--top-pnl", action="store_true", help="replay the burst to TOP_PNL_1 subscribers")
+    burst.add_argument("out")
+    args = parser.parse_args()
+    if args.command == "record":
+        from log_config import setup_logging
+        listener = setup_logging()
+        try:
+            n = asyncio.run(record(args.out, args.wallet, args.duration, args.interval, args.top_pnl))
+        finally:
+            listener.stop()
+        print(f"Recorded {n} trades to {args.out}")
+    else:
+        write_recording(args.out, make_burst(args.wallet, args.trades, args.seconds), [args.wallet],
+                        args.wallet if args.top_pnl else None)
+        print(f"Wrote {args.trades} trades over {args.seconds:g}s to {args.out}")
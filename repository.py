@@ -0,0 +1,135 @@
+from types import SimpleNamespace
+from sqlalchemy import Float, String, Text, bindparam, func, insert, select, tuple_, update
+from database import SourceTrader, Subscription, TradeLog, UserKeys, insert_ignore
+
+# Data access of the poller and executor hot paths. These are Core statements on
+# the tables, built once and executed with bind parameters: rows come back as
+# plain tuples, without ORM entities, identity map or unit-of-work flushes.
+# Every function runs in the caller's session and transaction.
+
+traders = SourceTrader.__table__
+subscriptions = Subscription.__table__
+trade_logs = TradeLog.__table__
+user_keys_table = UserKeys.__table__
+
+SELECT_TRADERS = select(traders.c.id, traders.c.wallet_address, traders.c.last_seen_trade_timestamp)
+SELECT_TRADERS_BY_WALLET = SELECT_TRADERS.where(traders.c.wallet_address.in_(bindparam("wallets", expanding=True)))
+ADVANCE_CURSOR = (
+    update(traders)
+    .where(traders.c.id == bindparam("trader_id"))
+    .values(last_seen_trade_timestamp=bindparam("timestamp"))
+)
+
+_SUBSCRIBER_COLUMNS = (subscriptions.c.id, subscriptions.c.user_id, subscriptions.c.trade_amount_usdc,
+                       subscriptions.c.paper_trading)
+SELECT_WALLET_SUBSCRIBERS = select(*_SUBSCRIBER_COLUMNS).where(
+    subscriptions.c.trader_id == bindparam("trader_id"), subscriptions.c.active == True
+)
+SELECT_TOP_PNL_SUBSCRIBERS = select(*_SUBSCRIBER_COLUMNS).where(
+    subscriptions.c.subscription_type == "TOP_PNL_1", subscriptions.c.active == True
+)
+
+SELECT_USER_KEYS = select(
+    user_keys_table.c.api_key, user_keys_table.c.api_secret, user_keys_table.c.api_passphrase
+).where(user_keys_table.c.user_id == bindparam("user_id"))
+
+SELECT_COPY_LOGS = select(
+    trade_logs.c.id, trade_logs.c.subscription_id, trade_logs.c.source_trade_hash, trade_logs.c.copy_trade_status
+).where(tuple_(trade_logs.c.subscription_id, trade_logs.c.source_trade_hash).in_(bindparam("keys", expanding=True)))
+# Order id, error and fill only overwrite the stored values when given
+UPDATE_COPY_LOG = (
+    update(trade_logs)
+    .where(trade_logs.c.id == bindparam("log_id"))
+    .values(
+        copy_trade_status=bindparam("status"),
+        copy_trade_order_id=func.coalesce(bindparam("order_id", type_=String), trade_logs.c.copy_trade_order_id),
+        error_message=func.coalesce(bindparam("error", type_=Text), trade_logs.c.error_message),
+        filled_size=func.coalesce(bindparam("size", type_=Float), trade_logs.c.filled_size),
+        fill_price=func.coalesce(bindparam("price", type_=Float), trade_logs.c.fill_price),
+    )
+)
+INSERT_COPY_LOG = insert(trade_logs)
+
+# Dialect-specific (ON CONFLICT), so built on first use once the engine exists
+_insert_pending = None
+
+
+async def load_traders(session, wallets=None) -> list[SimpleNamespace]:
+    """Source traders (all, or those of `wallets`) as objects with id, wallet_address and
+    last_seen_trade_timestamp; ingest_activity advances the latter in place."""
+    if wallets is None:
+        result = await session.execute(SELECT_TRADERS)
+    else:
+        result = await session.execute(SELECT_TRADERS_BY_WALLET, {"wallets": list(wallets)})
+    return [SimpleNamespace(**row._mapping) for row in result]
+
+
+async def advance_cursor(session, trader_id, timestamp) -> None:
+    """Store the newest trade timestamp seen for a source trader."""
+    await session.execute(ADVANCE_CURSOR, {"trader_id": trader_id, "timestamp": timestamp})
+
+
+async def active_subscribers(session, trader_id=None) -> list:
+    """(id, user_id, trade_amount_usdc, paper_trading) rows of the active subscriptions
+    following `trader_id`, or of the TOP_PNL_1 subscriptions when it is None."""
+    if trader_id is None:
+        result = await session.execute(SELECT_TOP_PNL_SUBSCRIBERS)
+    else:
+        result = await session.execute(SELECT_WALLET_SUBSCRIBERS, {"trader_id": trader_id})
+    return result.all()
+
+
+async def user_keys(session, user_id):
+    """The user's encrypted (api_key, api_secret, api_passphrase) row, or None."""
+    return (await session.execute(SELECT_USER_KEYS, {"user_id": user_id})).first()
+
+
+async def insert_pending(session, rows: list[dict]) -> set:
+    """INSERT the PENDING TradeLog `rows` in one executemany, skipping (subscription, source trade)
+    pairs that already have a row. Returns the subscription ids that got a new row."""
+    global _insert_pending
+    if _insert_pending is None:
+        _insert_pending = insert_ignore(trade_logs, ["subscription_id", "source_trade_hash"]).returning(
+            trade_logs.c.subscription_id)
+    result = await session.execute(_insert_pending, rows)
+    return set(result.scalars())
+
+
+async def record_copies(session, copies: list[dict]) -> list:
+    """Write copy outcomes to their TradeLog rows, creating the rows that are missing.
+
+    Each copy has subscription_id, the source_* trade fields, status, and
+    optionally order_id, error, size and price (the fill). One SELECT finds the
+    existing rows, then one executemany UPDATE and one INSERT write them.
+    Returns each row's status before the write, None for new rows.
+    """
+    keys = [(c["subscription_id"], c["source_trade_hash"]) for c in copies]
+    found = {(row.subscription_id, row.source_trade_hash): (row.id, row.copy_trade_status)
+             for row in await session.execute(SELECT_COPY_LOGS, {"keys": keys})}
+    updates, inserts, previous = [], [], []
+    for key, copy in zip(keys, copies):
+        existing = found.get(key)
+        values = {"status": copy["status"], "order_id": copy.get("order_id") or None,
+                  "error": copy.get("error") or None, "size": copy.get("size"), "price": copy.get("price")}
+        if existing is not None:
+            updates.append(dict(values, log_id=existing[0]))
+            previous.append(existing[1])
+            continue
+        inserts.append({
+            "subscription_id": copy["subscription_id"],
+            "source_trade_hash": copy["source_trade_hash"],
+            "source_market_id": copy["source_market_id"],
+            "source_outcome_index": copy["source_outcome_index"],
+            "source_side": copy["source_side"],
+            "copy_trade_status": values["status"],
+            "copy_trade_order_id": values["order_id"],
+            "error_message": values["error"],
+            "filled_size": values["size"],
+            "fill_price": values["price"],
+        })
+        previous.append(None)
+    if updates:
+        await session.execute(UPDATE_COPY_LOG, updates)
+    if inserts:
+        await session.execute(INSERT_COPY_LOG, inserts)
+    return previous
@@ -0,0 +1,147 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import delete, or_, tuple_
+from sqlalchemy.future import select
+from database import AsyncSessionLocal, Subscription, TradeLog, MAINTENANCE_BATCH_PAUSE
+from ndjson import atomic_writer
+from risk import settled_markets
+
+logger = logging.getLogger(__name__)
+
+# TradeLog rows older than this are moved to archive files; unset or 0 keeps everything.
+# Successful copies stay while their market still counts toward the risk ledger's exposure.
+RETENTION_DAYS = int(os.getenv("TRADELOG_RETENTION_DAYS") or "0")
+ARCHIVE_DIR = os.getenv("TRADELOG_ARCHIVE_DIR", "data/archive")
+BATCH_SIZE = int(os.getenv("TRADELOG_RETENTION_BATCH", "5000"))
+RETENTION_INTERVAL = int(os.getenv("TRADELOG_RETENTION_INTERVAL_SECONDS", "3600"))
+
+_FILE_PREFIX = "trade_log-"
+_FILE_SUFFIX = ".ndjson.gz"
+
+
+def _archive_name(records: list[dict]) -> str:
+    days = sorted(r["created_at"][:10].replace("-", "") for r in records)
+    return f"{_FILE_PREFIX}{days[0]}-{days[-1]}-{records[0]['id']}-{records[-1]['id']}{_FILE_SUFFIX}"
+
+
+def write_archive(archive_dir: str, records: list[dict]) -> str:
+    """Write records to a new archive file and return its path."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, _archive_name(records))
+    with atomic_writer(path) as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+    return path
+
+
+async def archive_batch(cutoff: datetime, batch_size: int = BATCH_SIZE, archive_dir: str = ARCHIVE_DIR) -> int:
+    """Move one batch of rows created before `cutoff` to an archive file.
+
+    Successful copies are only moved once their (user, market) is settled
+    (risk.settled_markets), since ExposureLedger.rebuild() reads trade_log
+    alone. The file is written before the rows are deleted, so a crash in
+    between only leaves rows that are archived again (read_archive drops
+    duplicates). Returns the number of rows moved.
+    """
+    settled = settled_markets(cutoff)
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(
+            select(*TradeLog.__table__.columns)
+            .join(Subscription, Subscription.id == TradeLog.subscription_id)
+            .where(TradeLog.created_at < cutoff, or_(
+                TradeLog.copy_trade_status != "SUCCESS",
+                tuple_(Subscription.user_id, TradeLog.source_market_id).in_(settled)))
+            .order_by(TradeLog.id)
+            .limit(batch_size)
+        )).all()
+        if not rows:
+            return 0
+        records = []
+        for row in rows:
+            record = row._asdict()
+            record["created_at"] = record["created_at"].isoformat(" ")
+            records.append(record)
+        # Compression and disk I/O stay off the event loop
+        await asyncio.to_thread(write_archive, archive_dir, records)
+        await session.execute(delete(TradeLog).where(TradeLog.id.in_([r["id"] for r in records])))
+        await session.commit()
+    return len(records)
+
+
+async def archive_older_than(days: int = RETENTION_DAYS, batch_size: int = BATCH_SIZE,
+                             archive_dir: str = ARCHIVE_DIR, pause: float = MAINTENANCE_BATCH_PAUSE) -> int:
+    if days <= 0:
+        return 0  # retention is off
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    total = 0
+    while True:
+        moved = await archive_batch(cutoff, batch_size, archive_dir)
+        total += moved
+        if moved < batch_size:
+            return total
+        await asyncio.sleep(pause)
+
+
+async def run_retention(days: int = RETENTION_DAYS):
+    while True:
+        try:
+            moved = await archive_older_than(days)
+            if moved:
+                logger.info("Archived %d trade_log rows older than %d days", moved, days)
+        except Exception as e:
+            logger.error("Retention run failed: %s", e)
+        await asyncio.sleep(RETENTION_INTERVAL)
+
+
+def read_archive(archive_dir: str = ARCHIVE_DIR, subscription_ids=None, since: datetime | None = None,
+                 until: datetime | None = None):
+    """Yield archived TradeLog rows as dicts, oldest file first.
+
+    Files whose date range (from the file name) falls outside [since, until]
+    are skipped without being opened.
+    """
+    if not os.path.isdir(archive_dir):
+        return
+    wanted = set(subscription_ids) if subscription_ids is not None else None
+    since_day = since.strftime("%Y%m%d") if since else None
+    until_day = until.strftime("%Y%m%d") if until else None
+    seen = set()
+    names = sorted(n for n in os.listdir(archive_dir) if n.startswith(_FILE_PREFIX) and n.endswith(_FILE_SUFFIX))
+    for name in names:
+        first_day, last_day = name[len(_FILE_PREFIX):].split("-")[:2]
+        if (since_day and last_day < since_day) or (until_day and first_day > until_day):
+            continue
+        with gzip.open(os.path.join(archive_dir, name), "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["id"] in seen or (wanted is not None and record["subscription_id"] not in wanted):
+                    continue
+                record["created_at"] = datetime.fromisoformat(record["created_at"])
+                if (since and record["created_at"] < since) or (until and record["created_at"] > until):
+                    continue
+                seen.add(record["id"])
+                yield record
+
+
+async def query_history(session, subscription_ids, limit: int = 20, archive_dir: str = ARCHIVE_DIR) -> list[dict]:
+    """Latest trades for the given subscriptions, newest first, falling back to
+    the archive when the hot table holds fewer than `limit` rows (/status)."""
+    rows = (await session.execute(
+        select(*TradeLog.__table__.columns)
+        .where(TradeLog.subscription_id.in_(subscription_ids))
+        .order_by(TradeLog.created_at.desc())
+        .limit(limit)
+    )).all()
+    history = [row._asdict() for row in rows]
+    if len(history) < limit:
+        archived = await asyncio.to_thread(
+            lambda: list(read_archive(archive_dir, subscription_ids)))
+        hot_ids = {r["id"] for r in history}
+        archived = [r for r in archived if r["id"] not in hot_ids]
+        archived.sort(key=lambda r: r["created_at"], reverse=True)
+        history.extend(archived[:limit - len(history)])
+    return history
@@ -0,0 +1,151 @@
+import os
+from collections import defaultdict
+from datetime import datetime, date
+from sqlalchemy import case, func
+from sqlalchemy.future import select
+from database import AsyncSessionLocal, Subscription, TradeLog
+
+
+def _env_float(name: str) -> float | None:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+# All caps are optional; unset means unlimited.
+DAILY_CAP_USDC = _env_float("RISK_DAILY_CAP_USDC")                # BUY spend per user per UTC day
+SUBSCRIPTION_DAILY_CAP_USDC = _env_float("RISK_SUB_DAILY_CAP_USDC")  # BUY spend per subscription per day
+MARKET_CAP_USDC = _env_float("RISK_MARKET_CAP_USDC")              # open BUY exposure per user per market
+MAX_OPEN_ORDERS = int(os.getenv("RISK_MAX_OPEN_ORDERS", "0")) or None  # in-flight orders per user
+# BUY orders (after resizing) below this are rejected instead; 0 disables
+MIN_ORDER_USDC = float(os.getenv("RISK_MIN_ORDER_USDC", "0"))
+
+
+class ExposureLedger:
+    """In-memory spend and exposure per user, subscription and market.
+
+    Every check is a few dict lookups, so `trade_execution_worker` can reject
+    or resize an order before touching the CLOB. Amounts are reserved when an
+    order starts and released again if it fails.
+    """
+
+    def __init__(self, daily_cap=DAILY_CAP_USDC, subscription_daily_cap=SUBSCRIPTION_DAILY_CAP_USDC,
+                 market_cap=MARKET_CAP_USDC, max_open_orders=MAX_OPEN_ORDERS, min_order=MIN_ORDER_USDC):
+        self.daily_cap = daily_cap
+        self.subscription_daily_cap = subscription_daily_cap
+        self.market_cap = market_cap
+        self.max_open_orders = max_open_orders
+        self.min_order = min_order
+        self._reset()
+
+    def _reset(self) -> None:
+        self.day = datetime.utcnow().date()
+        self.user_spend = defaultdict(float)
+        self.sub_spend = defaultdict(float)
+        self.market_exposure = defaultdict(float)  # (user_id, market_id) -> USDC
+        self.open_orders = defaultdict(int)
+
+    def _roll_day(self, today: date | None = None) -> None:
+        today = today or datetime.utcnow().date()
+        if today != self.day:
+            self.day = today
+            self.user_spend.clear()
+            self.sub_spend.clear()
+
+    def reserve(self, user_id, sub_id, market_id, side, amount) -> tuple[float, str | None]:
+        """Reserve room for an order.
+
+        Returns (amount, reason): the possibly resized amount to trade, and why
+        it was resized (None if it was not). An amount of 0 means the order
+        must be rejected; the reason then says why.
+        """
+        self._roll_day()
+        if self.max_open_orders and self.open_orders[user_id] >= self.max_open_orders:
+            return 0.0, f"Risk limit: {self.max_open_orders} orders already in flight."
+        reason = None
+        if side.upper() == "BUY":
+            limits = [
+                (self.daily_cap, self.user_spend[user_id], "daily cap"),
+                (self.subscription_daily_cap, self.sub_spend[sub_id], "subscription daily cap"),
+                (self.market_cap, self.market_exposure[(user_id, market_id)], "market cap"),
+            ]
+            for cap, used, name in limits:
+                if cap is not None and used + amount > cap:
+                    amount = max(cap - used, 0.0)
+                    reason = f"Risk limit: {name} of ${cap:.2f} reached."
+            if amount <= 0:
+                return 0.0, reason or "Order amount must be positive."
+            if amount < self.min_order:
+                below = f"Order of ${amount:.2f} is below the minimum of ${self.min_order:.2f}."
+                return 0.0, f"{reason} {below}" if reason else below
+            self.user_spend[user_id] += amount
+            self.sub_spend[sub_id] += amount
+            self.market_exposure[(user_id, market_id)] += amount
+        self.open_orders[user_id] += 1
+        return amount, reason
+
+    def settle(self, user_id, sub_id, market_id, side, amount, filled: bool) -> None:
+        """Record the outcome of a reserved order."""
+        self.open_orders[user_id] = max(self.open_orders[user_id] - 1, 0)
+        key = (user_id, market_id)
+        if side.upper() == "BUY":
+            if not filled:
+                self.user_spend[user_id] = max(self.user_spend[user_id] - amount, 0.0)
+                self.sub_spend[sub_id] = max(self.sub_spend[sub_id] - amount, 0.0)
+                self.market_exposure[key] = max(self.market_exposure[key] - amount, 0.0)
+        elif filled:
+            self.market_exposure[key] = max(self.market_exposure[key] - amount, 0.0)
+
+    async def rebuild(self) -> None:
+        """Reload spend and exposure from successful TradeLog rows.
+
+        TradeLog does not store the copied amount, so the subscription's
+        current trade_amount_usdc is used for each row.
+        """
+        self._reset()
+        day_start = datetime.combine(self.day, datetime.min.time())
+        amount = func.sum(Subscription.trade_amount_usdc)
+        async with AsyncSessionLocal() as session:
+            daily = await session.execute(
+                select(Subscription.user_id, TradeLog.subscription_id, amount)
+                .join(Subscription, Subscription.id == TradeLog.subscription_id)
+                .where(TradeLog.copy_trade_status == "SUCCESS", TradeLog.source_side == "BUY",
+                       TradeLog.created_at >= day_start)
+                .group_by(Subscription.user_id, TradeLog.subscription_id)
+            )
+            markets = await session.execute(
+                select(Subscription.user_id, TradeLog.source_market_id, TradeLog.source_side, amount)
+                .join(Subscription, Subscription.id == TradeLog.subscription_id)
+                .where(TradeLog.copy_trade_status == "SUCCESS")
+                .group_by(Subscription.user_id, TradeLog.source_market_id, TradeLog.source_side)
+            )
+        for user_id, sub_id, total in daily:
+            self.user_spend[user_id] += total or 0.0
+            self.sub_spend[sub_id] += total or 0.0
+        for user_id, market_id, side, total in markets:
+            sign = 1 if side.upper() == "BUY" else -1
+            self.market_exposure[(user_id, market_id)] += sign * (total or 0.0)
+        for key, value in list(self.market_exposure.items()):
+            self.market_exposure[key] = max(value, 0.0)
+
+
+def settled_markets(cutoff: datetime):
+    """(user_id, market_id) pairs whose successful TradeLog rows can leave the table
+    without loosening what ExposureLedger.rebuild() restores.
+
+    That is the case when every such row is older than `cutoff` and the net
+    exposure they add up to is not positive: rebuild() would count the market
+    as 0 with or without them, and later rows count fully instead of being
+    offset by earlier SELLs.
+    """
+    amount = Subscription.trade_amount_usdc
+    signed = case((func.upper(TradeLog.source_side) == "BUY", amount), else_=-amount)
+    return (
+        select(Subscription.user_id, TradeLog.source_market_id)
+        .join(Subscription, Subscription.id == TradeLog.subscription_id)
+        .where(TradeLog.copy_trade_status == "SUCCESS")
+        .group_by(Subscription.user_id, TradeLog.source_market_id)
+        .having(func.max(TradeLog.created_at) < cutoff, func.sum(signed) <= 0)
+    )
+
+
+ledger = ExposureLedger()
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from sqlalchemy import Date, case, cast, func, insert
+from sqlalchemy.future import select
+from database import dialect_insert, Subscription, SubscriptionDailyStats, TradeLog
+
+# NETTED: the copy was offset by an opposing copy of the same token (see netting.py); no order was placed.
+# SIMULATED: filled by the simulated exchange (paper trading); not counted as real volume.
+FINAL_STATUSES = ("SUCCESS", "FAILED", "NETTED", "SIMULATED")
+
+
+async def record_outcome(session, sub_id, user_id, status, amount_usdc, error=None, when=None):
+    """Add one copy outcome to the subscription's daily rollup (in the caller's transaction)."""
+    success = status == "SUCCESS"
+    stmt = dialect_insert(SubscriptionDailyStats).values(
+        subscription_id=sub_id,
+        day=(when or datetime.utcnow()).date(),
+        user_id=user_id,
+        success_count=1 if success else 0,
+        failed_count=1 if status == "FAILED" else 0,
+        volume_usdc=amount_usdc if success else 0.0,
+        last_error=error,
+    )
+    stats = SubscriptionDailyStats
+    await session.execute(stmt.on_conflict_do_update(
+        index_elements=["subscription_id", "day"],
+        set_={
+            "success_count": stats.success_count + stmt.excluded.success_count,
+            "failed_count": stats.failed_count + stmt.excluded.failed_count,
+            "volume_usdc": stats.volume_usdc + stmt.excluded.volume_usdc,
+            "last_error": func.coalesce(stmt.excluded.last_error, stats.last_error),
+        },
+    ))
+
+
+async def user_stats(session, user_id, days=7):
+    """Rollup rows of a user's subscriptions for the last `days` days, oldest first."""
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    result = await session.execute(
+        select(SubscriptionDailyStats)
+        .where(SubscriptionDailyStats.user_id == user_id, SubscriptionDailyStats.day >= since)
+        .order_by(SubscriptionDailyStats.day)
+    )
+    return result.scalars().all()
+
+
+async def backfill(conn):
+    """Build rollups from the existing trade log (migration 2).
+
+    TradeLog has no amount column, so volume uses the subscription's current
+    trade_amount_usdc.
+    """
+    if conn.dialect.name == "sqlite":
+        day = func.date(TradeLog.created_at)
+    else:
+        day = cast(TradeLog.created_at, Date)
+    success = TradeLog.copy_trade_status == "SUCCESS"
+    failed = TradeLog.copy_trade_status == "FAILED"
+    rows = select(
+        TradeLog.subscription_id,
+        day,
+        Subscription.user_id,
+        func.sum(case((success, 1), else_=0)),
+        func.sum(case((failed, 1), else_=0)),
+        func.sum(case((success, Subscription.trade_amount_usdc), else_=0.0)),
+    ).join(Subscription, Subscription.id == TradeLog.subscription_id).where(
+        TradeLog.copy_trade_status.in_(FINAL_STATUSES)
+    ).group_by(TradeLog.subscription_id, day, Subscription.user_id)
+    await conn.execute(insert(SubscriptionDailyStats).from_select(
+        ["subscription_id", "day", "user_id", "success_count", "failed_count", "volume_usdc"], rows))
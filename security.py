@@ -1,54 +1,93 @@
 import os
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, MultiFernet, InvalidToken
 from dotenv import load_dotenv
 import base64
 
 load_dotenv()
 
+# Stored format v2 is "v2:" + the Fernet token, which is already URL-safe
+# base64. Values without the prefix are the original format: the token
+# base64-encoded a second time. Both are read; only v2 is written.
+V2_PREFIX = "v2:"
+GENERATE_HINT = "Generate a new key with: python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())'"
+
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 if ENCRYPTION_KEY is None:
     raise ValueError("ENCRYPTION_KEY not set in .env file!")
+# Retired keys, comma-separated, still accepted for decryption until key_rotation.py has re-encrypted every row
+ENCRYPTION_OLD_KEYS = os.getenv("ENCRYPTION_OLD_KEYS", "")
+
 
-# Strip whitespace and remove quotes if present
-ENCRYPTION_KEY = ENCRYPTION_KEY.strip().strip('"').strip("'")
+def load_fernet(key: str, name: str = "ENCRYPTION_KEY") -> Fernet:
+    """Validate a Fernet key from the environment and build a Fernet for it."""
+    # Strip whitespace and remove quotes if present
+    key = key.strip().strip('"').strip("'")
+
+    # Validate key format before creating Fernet instance
+    try:
+        # Try to decode as base64 to validate format
+        decoded = base64.urlsafe_b64decode(key.encode())
+        if len(decoded) != 32:
+            raise ValueError(
+                f"Fernet key must be 32 bytes when decoded, got {len(decoded)} bytes. "
+                f"Your key is {len(key)} characters long. "
+                f"First 20 chars: {key[:20]}...\n"
+                f"{GENERATE_HINT}"
+            )
+    except Exception as e:
+        raise ValueError(
+            f"Invalid Fernet key format in {name}: {e}\n"
+            f"Key length: {len(key)}, First 20 chars: {key[:20] if len(key) >= 20 else key}...\n"
+            f"{GENERATE_HINT}"
+        )
 
-# Validate key format before creating Fernet instance
-try:
-    # Try to decode as base64 to validate format
-    decoded = base64.urlsafe_b64decode(ENCRYPTION_KEY.encode())
-    if len(decoded) != 32:
+    try:
+        return Fernet(key)
+    except ValueError as e:
         raise ValueError(
-            f"Fernet key must be 32 bytes when decoded, got {len(decoded)} bytes. "
-            f"Your key is {len(ENCRYPTION_KEY)} characters long. "
-            f"First 20 chars: {ENCRYPTION_KEY[:20]}...\n"
-            f"Generate a new key with: python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())'"
+            f"Failed to initialize Fernet with {name}: {e}\n"
+            f"Key length: {len(key)} characters. "
+            f"Please check your .env file and ensure the key is properly formatted."
         )
-except Exception as e:
-    raise ValueError(
-        f"Invalid Fernet key format in .env file: {e}\n"
-        f"Key length: {len(ENCRYPTION_KEY)}, First 20 chars: {ENCRYPTION_KEY[:20] if len(ENCRYPTION_KEY) >= 20 else ENCRYPTION_KEY}...\n"
-        f"Generate a new key with: python -c 'from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())'"
-    )
-
-try:
-    fernet = Fernet(ENCRYPTION_KEY)
-except ValueError as e:
-    raise ValueError(
-        f"Failed to initialize Fernet with ENCRYPTION_KEY: {e}\n"
-        f"Key length: {len(ENCRYPTION_KEY)} characters. "
-        f"Please check your .env file and ensure the key is properly formatted."
-    )
+
+
+# The current key encrypts; the keyring (current key first) decrypts and rotates
+fernet = load_fernet(ENCRYPTION_KEY)
+keyring = MultiFernet([fernet] + [
+    load_fernet(k, "ENCRYPTION_OLD_KEYS") for k in ENCRYPTION_OLD_KEYS.split(",") if k.strip()
+])
+
+
+def _token(encrypted_data: str) -> bytes:
+    if encrypted_data.startswith(V2_PREFIX):
+        return encrypted_data[len(V2_PREFIX):].encode()
+    return base64.urlsafe_b64decode(encrypted_data.encode())
 
 def encrypt_data(data: str) -> str:
-    """Encrypts string data. Returns base64-encoded, encrypted string."""
-    encrypted = fernet.encrypt(data.encode())
-    # Return base64 string to avoid issues with binary storage
-    return base64.urlsafe_b64encode(encrypted).decode()
+    """Encrypts string data with the current key. Returns a v2 value."""
+    return V2_PREFIX + fernet.encrypt(data.encode()).decode()
 
 def decrypt_data(encrypted_data: str) -> str:
-    """Decrypts base64-encoded, encrypted string to plaintext."""
+    """Decrypts a stored value (v2 or original format) with any key in the keyring."""
+    try:
+        return keyring.decrypt(_token(encrypted_data)).decode()
+    except (InvalidToken, base64.binascii.Error):
+        raise ValueError("Failed to decrypt data. Key is wrong or data is corrupted.")
+
+def reencrypt_data(encrypted_data: str) -> str | None:
+    """The value as v2 under the current key, or None if it already is.
+
+    Only verifies the token's signature for values that are already current,
+    so checking rows that need no change is cheap.
+    """
     try:
-        encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
-        return fernet.decrypt(encrypted_bytes).decode()
+        token = _token(encrypted_data)
+        if encrypted_data.startswith(V2_PREFIX):
+            try:
+                fernet.extract_timestamp(token)  # checks the HMAC against the current key
+                return None
+            except InvalidToken:
+                pass
+        return V2_PREFIX + keyring.rotate(token).decode()
     except (InvalidToken, base64.binascii.Error):
         raise ValueError("Failed to decrypt data. Key is wrong or data is corrupted.")
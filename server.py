@@ -1,23 +1,76 @@
 import os
+import hmac
 import asyncio
 from aiohttp import web
 
+# Route Telegram POSTs updates to in webhook mode (see main.py)
+WEBHOOK_PATH = os.getenv("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+TELEGRAM_APP = web.AppKey("telegram_app")
+WEBHOOK_SECRET = web.AppKey("webhook_secret", str)
+
 
 async def _health(request):
     return web.json_response({"status": "ok"})
 
 
-async def run_health_server(host: str | None = None, port: int | None = None) -> None:
+async def _ready(request):
+    """The readiness prober's cached report: 200 when ready, else 503."""
+    from readiness import readiness
+
+    report = readiness.current()
+    return web.json_response(report, status=200 if report["ready"] else 503)
+
+
+async def _metrics(request):
+    import metrics
+
+    return web.json_response(metrics.snapshot())
+
+
+async def _telegram_webhook(request):
+    """Verify the secret token and hand the update to the Application's update queue."""
+    secret = request.app[WEBHOOK_SECRET]
+    if not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret):
+        return web.Response(status=403)
+    try:
+        data = await request.json()
+    except ValueError:
+        return web.Response(status=400)
+    from telegram import Update
+
+    application = request.app[TELEGRAM_APP]
+    await application.update_queue.put(Update.de_json(data, application.bot))
+    return web.Response(status=200)
+
+
+def build_app(application=None, secret_token: str | None = None) -> web.Application:
+    """Build the aiohttp app. Passing a telegram `Application` enables the webhook route."""
+    app = web.Application()
+    app.router.add_get("/health", _health)
+    app.router.add_get("/ready", _ready)
+    app.router.add_get("/metrics", _metrics)
+    if application is not None:
+        if not secret_token:
+            raise ValueError("A webhook secret token is required to accept Telegram updates.")
+        app[TELEGRAM_APP] = application
+        app[WEBHOOK_SECRET] = secret_token
+        app.router.add_post(WEBHOOK_PATH, _telegram_webhook)
+    return app
+
+
+async def run_health_server(host: str | None = None, port: int | None = None,
+                            application=None, secret_token: str | None = None) -> None:
     """Run a minimal aiohttp health server until cancelled.
 
     This function is intended to be scheduled as a background task so it
-    doesn't block the main application loop.
+    doesn't block the main application loop. When `application` is given the
+    same server also receives Telegram webhook updates.
     """
     host = host or os.getenv("HEALTH_HOST", "0.0.0.0")
     port = port or int(os.getenv("PORT", os.getenv("HEALTH_PORT", 8000)))
 
-    app = web.Application()
-    app.router.add_get("/health", _health)
+    app = build_app(application, secret_token)
 
     runner = web.AppRunner(app)
     await runner.setup()
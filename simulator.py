@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+import metrics
+from ndjson import atomic_writer
+
+# Added to every simulated CLOB call, standing in for the network round-trip
+SIM_LATENCY_MS = float(os.getenv("SIM_LATENCY_MS", "50"))
+# Where order books come from: "synthetic", "clob" (public CLOB books, cached
+# for SIM_BOOK_TTL_SECONDS) or the path of a recording made with `record-books`
+SIM_BOOK_SOURCE = os.getenv("SIM_BOOK_SOURCE", "synthetic")
+SIM_BOOK_TTL = float(os.getenv("SIM_BOOK_TTL_SECONDS", "5"))
+
+# A book recording is gzipped NDJSON: a header line, then one snapshot per line:
+#   {"version": 1, "recorded_at": "...", "tokens": [...]}
+#   {"t": <seconds since start>, "token_id": "...", "bids": [[price, size], ...], "asks": [[price, size], ...]}
+# Bids are best (highest) first, asks best (lowest) first.
+BOOKS_FORMAT_VERSION = 1
+
+
+def synthetic_book(token_id: str, levels: int = 5, step: float = 0.01, depth: float = 200.0) -> dict:
+    """A book with `levels` levels of `depth` shares per side around a mid price derived from the token id."""
+    mid = round(random.Random(token_id).uniform(0.1, 0.9), 2)
+    return {"bids": [[round(mid - step * (i + 1), 4), depth] for i in range(levels)],
+            "asks": [[round(mid + step * (i + 1), 4), depth] for i in range(levels)]}
+
+
+def read_books(path: str) -> dict[str, list]:
+    """Snapshots of a book recording per token, as (t, book) ordered by time."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != BOOKS_FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported book recording version {header.get('version')}")
+        books: dict[str, list] = {}
+        for line in f:
+            if line.strip():
+                snap = json.loads(line)
+                books.setdefault(snap["token_id"], []).append((snap["t"], {"bids": snap["bids"], "asks": snap["asks"]}))
+    for snaps in books.values():
+        snaps.sort(key=lambda s: s[0])
+    return books
+
+
+class SimulatedExchange:
+    """Fills copy orders against synthetic, cached or replayed order books instead of the CLOB.
+
+    Implements the ClobClient calls the executor makes (get_order_book,
+    create_and_post_order, create_order, post_orders), so it stands in for
+    a user's client. Calls block for `latency` seconds, as the real client
+    does in its worker thread. An order fills against the opposite side of
+    the book up to its limit price; what those levels cannot absorb stays
+    unfilled (a partial fill). Fills do not deplete the book.
+    Replayed books advance in real time from when the recording is loaded.
+    """
+
+    simulated = True  # not a real upstream: its calls are not reported to the CLOB circuit
+
+    def __init__(self, source: str = SIM_BOOK_SOURCE, latency: float = SIM_LATENCY_MS / 1000,
+                 book_ttl: float = SIM_BOOK_TTL, clock=time.monotonic):
+        self.source = source
+        self.latency = latency
+        self.book_ttl = book_ttl
+        self._clock = clock
+        self._cache: dict[str, tuple[float, dict]] = {}  # token -> (fetched at, book)
+        self._replay = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.counts = {"orders": 0, "filled": 0, "partial": 0, "unfilled": 0}
+        if source not in ("synthetic", "clob"):
+            self._replay = read_books(source)
+            self._replay_start = clock()
+
+    def book(self, token_id: str) -> dict:
+        if self._replay is not None and token_id in self._replay:
+            elapsed = self._clock() - self._replay_start
+            snaps = self._replay[token_id]
+            current = snaps[0][1]
+            for t, snap in snaps:
+                if t > elapsed:
+                    break
+                current = snap
+            return current
+        with self._lock:
+            cached = self._cache.get(token_id)
+            if cached is not None and (self.source != "clob" or self._clock() - cached[0] < self.book_ttl):
+                return cached[1]
+        book = fetch_book(token_id) if self.source == "clob" else synthetic_book(token_id)
+        with self._lock:
+            self._cache[token_id] = (self._clock(), book)
+        return book
+
+    def match(self, token_id: str, price: float, side: str, size: float) -> dict:
+        """Fill `size` shares against the book up to the limit `price`. Returns a CLOB-style response."""
+        buy = side.upper() == "BUY"
+        book = self.book(token_id)
+        filled = cost = 0.0
+        for level_price, level_size in (book["asks"] if buy else book["bids"]):
+            level_price, level_size = float(level_price), float(level_size)
+            if (buy and level_price > price) or (not buy and level_price < price):
+                break
+            take = min(level_size, size - filled)
+            filled += take
+            cost += take * level_price
+            if filled >= size - 1e-9:
+                break
+        with self._lock:
+            self.counts["orders"] += 1
+            if filled <= 0:
+                self.counts["unfilled"] += 1
+            else:
+                self.counts["filled" if filled >= size - 1e-9 else "partial"] += 1
+        if filled <= 0:
+            return {"success": False, "simulated": True, "status": "unmatched",
+                    "errorMsg": "Simulated order not filled: no liquidity within the limit price."}
+        return {"success": True, "simulated": True, "errorMsg": "", "orderID": f"sim-{next(self._ids)}",
+                "status": "matched" if filled >= size - 1e-9 else "partially_filled",
+                "size_matched": filled, "avg_price": cost / filled}
+
+    def get_order_book(self, token_id):
+        time.sleep(self.latency)
+        book = self.book(token_id)
+        return SimpleNamespace(
+            asks=[SimpleNamespace(price=str(p), size=str(s)) for p, s in book["asks"]],
+            bids=[SimpleNamespace(price=str(p), size=str(s)) for p, s in book["bids"]],
+        )
+
+    def create_and_post_order(self, token_id, price, side, size):
+        time.sleep(self.latency)
+        return self.match(token_id, price, side, size)
+
+    def create_order(self, order_args):
+        """Takes py_clob_client's OrderArgs; nothing is signed."""
+        return {"token_id": order_args.token_id, "price": order_args.price,
+                "side": order_args.side, "size": order_args.size}
+
+    def post_orders(self, args):
+        """Takes a list of py_clob_client's PostOrdersArgs; one latency for the whole batch."""
+        time.sleep(self.latency)
+        return [self.match(**a.order) for a in args]
+
+    def stats(self) -> dict:
+        return {"source": self.source, "latency_ms": self.latency * 1000, **self.counts}
+
+
+def fetch_book(token_id: str) -> dict:
+    """The live book of a token from the CLOB's public /book endpoint (no credentials needed)."""
+    import httpx
+    from executor import CLOB_HOST
+
+    data = httpx.get(f"{CLOB_HOST.rstrip('/')}/book", params={"token_id": token_id}, timeout=10).json()
+    bids = sorted(([float(l["price"]), float(l["size"])] for l in data.get("bids", [])), reverse=True)
+    asks = sorted([float(l["price"]), float(l["size"])] for l in data.get("asks", []))
+    return {"bids": bids, "asks": asks}
+
+
+_exchange = None
+
+
+def exchange() -> SimulatedExchange:
+    """The process-wide simulated exchange, created on first use from the SIM_* settings."""
+    global _exchange
+    if _exchange is None:
+        _exchange = SimulatedExchange()
+        metrics.register("simulated_exchange", _exchange.stats)
+    return _exchange
+
+
+async def record_books(path: str, tokens: list[str], duration: float, interval: float = 1.0) -> int:
+    """Snapshot the live books of `tokens` every `interval` seconds for `duration` seconds. Returns the count."""
+    snapshots = 0
+    start = time.monotonic()
+    with atomic_writer(path) as f:
+        f.write(json.dumps({"version": BOOKS_FORMAT_VERSION, "tokens": tokens,
+                            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}) + "\n")
+        while time.monotonic() - start < duration:
+            for token_id in tokens:
+                book = await asyncio.to_thread(fetch_book, token_id)
+                f.write(json.dumps({"t": round(time.monotonic() - start, 3), "token_id": token_id, **book},
+                                   separators=(",", ":")) + "\n")
+                snapshots += 1
+            await asyncio.sleep(interval)
+    return snapshots
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record CLOB order books for the simulated exchange")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record-books", help="Snapshot live order books (use as SIM_BOOK_SOURCE)")
+    rec.add_argument("--token", action="append", required=True, help="token id to record (repeatable)")
+    rec.add_argument("--duration", type=float, default=600, help="seconds to record")
+    rec.add_argument("--interval", type=float, default=1.0)
+    rec.add_argument("out")
+    args = parser.parse_args()
+    n = asyncio.run(record_books(args.out, args.token, args.duration, args.interval))
+    print(f"Recorded {n} book snapshots to {args.out}")
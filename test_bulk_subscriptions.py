@@ -0,0 +1,126 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+os.environ.setdefault("ENCRYPTION_KEY", "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398=")
+
+import bot
+from database import Base, SourceTrader, Subscription
+from view_cache import ViewCache
+
+WALLETS = [f"0x{i:040x}" for i in range(1, 31)]
+
+
+def _update(text, user_id=1):
+    message = SimpleNamespace(text=text, reply_text=AsyncMock())
+    return SimpleNamespace(message=message, callback_query=None,
+                           effective_user=SimpleNamespace(id=user_id, username="tester"))
+
+
+def _context(text):
+    return SimpleNamespace(args=text.split()[1:])
+
+
+class TestParseWalletList(unittest.TestCase):
+    def test_formats(self):
+        print("\nTesting wallet list parsing...")
+        text = "wallet,amount\n" + f"{WALLETS[0]},5\n{WALLETS[1]}\n{WALLETS[2]} 7.5, {WALLETS[3]}"
+        amounts, invalid = bot.parse_wallet_list(text, 10.0)
+        self.assertEqual(amounts, {WALLETS[0]: 5.0, WALLETS[1]: 10.0, WALLETS[2]: 7.5, WALLETS[3]: 10.0})
+        self.assertEqual(invalid, [])
+
+        amounts, invalid = bot.parse_wallet_list(f"{WALLETS[0]}\n0x123\n{WALLETS[1]},3", None)
+        self.assertEqual(amounts, {WALLETS[1]: 3.0})
+        self.assertEqual(invalid, ["0x123", f"{WALLETS[0]} (no amount)"])
+        print("✅ Pasted lists and CSV rows parsed, bad entries reported")
+
+
+class TestBulkCommands(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.cache = ViewCache(ttl=60)
+        self.patches = [patch.object(bot, "AsyncSessionLocal", self.Session),
+                        patch.object(bot, "view_cache", self.cache)]
+        for p in self.patches:
+            p.start()
+        bot.traders_changed.clear()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        await self.engine.dispose()
+
+    async def _active(self):
+        async with self.Session() as session:
+            rows = await session.execute(
+                select(SourceTrader.wallet_address, Subscription.trade_amount_usdc).join(Subscription.trader)
+                .where(Subscription.user_id == 1, Subscription.active == True))
+            return dict(rows.all())
+
+    async def test_copy_and_stop_wallets(self):
+        print("\nTesting /copy_wallets and /stop_wallets...")
+        # One existing subscription is resized and kept, not duplicated
+        await bot.copy_wallet(_update(""), SimpleNamespace(args=[WALLETS[0], "1"]))
+        bot.traders_changed.clear()
+        self.cache.set(1, "subs", "stale")
+
+        text = "/copy_wallets 10 " + "\n".join(WALLETS[:-1]) + f"\n{WALLETS[-1]},25"
+        update = _update(text)
+        await bot.copy_wallets(update, _context(text))
+        self.assertIn("30 Wallets", update.message.reply_text.call_args.args[0])
+        active = await self._active()
+        self.assertEqual(len(active), 30)
+        self.assertEqual(active[WALLETS[0]], 10.0)
+        self.assertEqual(active[WALLETS[-1]], 25.0)
+        self.assertTrue(bot.traders_changed.is_set())
+        self.assertIsNone(self.cache.get(1, "subs"))
+
+        text = "/stop_wallets " + ",".join(WALLETS[:20])
+        update = _update(text)
+        await bot.stop_wallets(update, _context(text))
+        self.assertIn("no longer copying 20 of 20", update.message.reply_text.call_args.args[0])
+        self.assertEqual(set(await self._active()), set(WALLETS[20:]))
+        print("✅ Bulk commands upsert and deactivate subscriptions in one transaction")
+
+    async def test_copy_wallet_reload_race(self):
+        print("\nTesting /copy_wallet against a concurrent poller reload...")
+        reloads = []
+        commit = AsyncSession.commit
+
+        async def commit_after_poller(session):
+            # The poller's reload step runs while the handler awaits its commit
+            if bot.traders_changed.is_set():
+                bot.traders_changed.clear()
+                reloads.append("before commit")
+            await commit(session)
+
+        with patch.object(AsyncSession, "commit", commit_after_poller):
+            await bot.copy_wallet(_update(""), SimpleNamespace(args=[WALLETS[0], "5"]))
+        self.assertEqual(reloads, [])
+        self.assertTrue(bot.traders_changed.is_set())  # the next cycle reloads and sees the trader
+        self.assertEqual(await self._active(), {WALLETS[0]: 5.0})
+        print("✅ The reload signal is only raised once the new trader is committed")
+
+    async def test_invalid_entry_rejects_whole_batch(self):
+        print("\nTesting bulk validation...")
+        text = f"/copy_wallets 10 {WALLETS[0]} 0xnotawallet {WALLETS[1]}"
+        update = _update(text)
+        await bot.copy_wallets(update, _context(text))
+        self.assertIn("0xnotawallet", update.message.reply_text.call_args.args[0])
+        self.assertEqual(await self._active(), {})
+        async with self.Session() as session:
+            self.assertEqual((await session.execute(select(func.count(SourceTrader.id)))).scalar(), 0)
+        self.assertFalse(bot.traders_changed.is_set())
+        print("✅ Nothing written when any entry is invalid")
+
+
+if __name__ == "__main__":
+    unittest.main()
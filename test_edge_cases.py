@@ -60,7 +60,7 @@ class TestExecutorEdgeCases(unittest.IsolatedAsyncioTestCase):
         mock_keys.api_key = "enc"
         mock_keys.api_secret = "enc"
         mock_keys.api_passphrase = "enc"
-        mock_session.get.return_value = mock_keys
+        mock_session.execute.return_value = MagicMock(first=MagicMock(return_value=mock_keys))
         
         mock_client = MagicMock()
         mock_client_cls.return_value = mock_client
@@ -116,7 +116,7 @@ class TestExecutorEdgeCases(unittest.IsolatedAsyncioTestCase):
         mock_decrypt.return_value = "dummy_key"
         mock_session = AsyncMock()
         mock_db_cls.return_value.__aenter__.return_value = mock_session
-        mock_session.get.return_value = MagicMock()
+        mock_session.execute.return_value = MagicMock(first=MagicMock(return_value=MagicMock()))
         
         mock_client = MagicMock()
         mock_client_cls.return_value = mock_client
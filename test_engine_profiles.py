@@ -0,0 +1,33 @@
+import tempfile
+import unittest
+from sqlalchemy import text
+
+import database
+
+
+class TestEngineProfiles(unittest.IsolatedAsyncioTestCase):
+    async def test_sqlite_pragmas(self):
+        print("\nTesting SQLite engine profiles...")
+        with tempfile.TemporaryDirectory() as tmp:
+            for profile, journal, synchronous in (("tuned", "wal", 1), ("default", "delete", 2)):
+                engine = database.make_engine(f"sqlite+aiosqlite:///{tmp}/{profile}.db", profile)
+                async with engine.connect() as conn:
+                    self.assertEqual((await conn.execute(text("PRAGMA journal_mode"))).scalar(), journal)
+                    self.assertEqual((await conn.execute(text("PRAGMA synchronous"))).scalar(), synchronous)
+                await engine.dispose()
+        print("✅ Tuned SQLite connections use WAL and synchronous=NORMAL")
+
+    def test_postgres_options(self):
+        print("\nTesting Postgres engine options...")
+        options = database.engine_options("postgresql+asyncpg://u:p@localhost/db", "tuned")
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertEqual(options["pool_size"], database.DB_POOL_SIZE)
+        self.assertEqual(options["connect_args"]["prepared_statement_cache_size"], database.DB_STATEMENT_CACHE_SIZE)
+        self.assertNotIn("connect_args", database.engine_options("postgresql+psycopg://u:p@localhost/db", "tuned"))
+        self.assertEqual(database.engine_options("postgresql+asyncpg://u:p@localhost/db", "default"), {})
+        self.assertEqual(database.engine_options("sqlite+aiosqlite:///x.db", "tuned"), {})
+        print("✅ Pool and asyncpg settings applied only to the tuned Postgres profile")
+
+
+if __name__ == "__main__":
+    unittest.main()
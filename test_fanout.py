@@ -0,0 +1,78 @@
+import unittest
+import asyncio
+import os
+from unittest.mock import AsyncMock, patch
+
+os.environ["ENCRYPTION_KEY"] = "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398="
+
+import executor
+from jobs import make_fanout_job, expand_fanout
+
+TRADE = dict(
+    source_trade_hash="hash1",
+    source_market_id="mkt1",
+    source_outcome_index=0,
+    source_side="BUY",
+    mode="TOP_PNL_1",
+)
+
+
+class TestFanout(unittest.IsolatedAsyncioTestCase):
+    def test_expand(self):
+        print("\nTesting fan-out expansion...")
+        job = make_fanout_job(TRADE, [(1, 100, 10.0), (2, 200, 25.5)])
+        self.assertEqual(len(job["targets"]), 2)
+        jobs = list(expand_fanout(job))
+        self.assertEqual(jobs[1], dict(TRADE, subscription_id=2, user_id=200, trade_amount_usdc=25.5))
+        self.assertNotIn("targets", jobs[0])
+        print("✅ Fan-out job expands to per-subscription jobs")
+
+    @patch("executor.FANOUT_CHUNK_SIZE", 2)
+    @patch("executor.insert_pending_logs", new_callable=AsyncMock, return_value=None)
+    @patch("executor.execute_job", new_callable=AsyncMock)
+    async def test_worker_splits_chunks(self, mock_execute, mock_pending):
+        print("\nTesting fan-out chunking in the worker...")
+        job_queue = asyncio.Queue()
+        await job_queue.put(make_fanout_job(TRADE, [(1, 100, 10.0), (2, 200, 10.0), (3, 300, 10.0)]))
+
+        original_get = job_queue.get
+        async def side_effect():
+            if job_queue.empty():
+                raise asyncio.CancelledError("Stop worker")
+            return await original_get()
+        job_queue.get = side_effect
+
+        try:
+            await executor.trade_execution_worker(job_queue, bot=None)
+        except asyncio.CancelledError:
+            pass
+
+        # First chunk of 2, remainder of 1 re-queued and picked up again
+        self.assertEqual([len(c.args[0]["targets"]) for c in mock_pending.call_args_list], [2, 1])
+        self.assertEqual([c.args[0]["subscription_id"] for c in mock_execute.call_args_list], [1, 2, 3])
+        self.assertEqual(job_queue._unfinished_tasks, 0)
+        print("✅ Fan-out chunks shared through the queue")
+
+    @patch("executor.FANOUT_CONCURRENCY", 3)
+    async def test_chunk_copied_concurrently(self):
+        print("\nTesting bounded concurrency within a chunk...")
+        running, peak, done = 0, 0, []
+
+        async def slow_execute(job, bot=None):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            done.append(job["subscription_id"])
+
+        job = make_fanout_job(TRADE, [(i, i * 100, 10.0) for i in range(1, 9)])
+        with patch("executor.execute_job", side_effect=slow_execute):
+            await executor.submit_chunk(job, new_ids={1, 2, 3, 4, 5, 6, 8})
+        self.assertEqual(sorted(done), [1, 2, 3, 4, 5, 6, 8])
+        self.assertEqual(peak, 3)
+        print("✅ Chunk targets copied in parallel, at most FANOUT_CONCURRENCY at a time")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import MagicMock, AsyncMock
+
+from leaderboard import Leaderboard, fetch_dune_ranking
+
+
+def _response(status, payload=None, etag=None):
+    resp = MagicMock()
+    resp.status_code = status
+    resp.headers = {"etag": etag} if etag else {}
+    resp.json.return_value = payload
+    return resp
+
+
+class TestLeaderboard(unittest.IsolatedAsyncioTestCase):
+    def test_apply_reports_changed_ranks(self):
+        print("\nTesting Leaderboard rank changes...")
+        board = Leaderboard(size=3)
+        self.assertEqual(board.apply(["0xa", "0xb", "0xc", "0xd"], "e1"), [1, 2, 3])
+        self.assertTrue(board.changed.is_set())
+        self.assertEqual(board.wallets, ["0xa", "0xb", "0xc"])
+
+        board.changed.clear()
+        # Same ranking under a new execution id: nothing to push to the poller
+        self.assertEqual(board.apply(["0xa", "0xb", "0xc"], "e2"), [])
+        self.assertFalse(board.changed.is_set())
+        self.assertEqual(board.version, "e2")
+
+        # Swap at the top and a shorter result
+        self.assertEqual(board.apply(["0xb", "0xa"], "e3"), [1, 2, 3])
+        self.assertEqual(board.wallet_at(1), "0xb")
+        self.assertIsNone(board.wallet_at(3))
+        self.assertEqual(board.rank_of("0xa"), 2)
+        print("✅ Rank changes detected correctly")
+
+    async def test_unchanged_result_is_skipped(self):
+        print("\nTesting conditional Dune refresh...")
+        board = Leaderboard(size=2)
+        client = AsyncMock()
+        payload = {"execution_id": "e1", "result": {"rows": [{"wallet_address": "0xa"}, {"wallet_address": "0xb"}]}}
+        client.get.return_value = _response(200, payload, etag='"v1"')
+
+        self.assertEqual(await fetch_dune_ranking(client, board), (["0xa", "0xb"], "e1"))
+        self.assertEqual(client.get.call_args.kwargs["params"], {"limit": 2})
+        board.apply(["0xa", "0xb"], "e1")
+
+        # ETag is sent back and a 304 short-circuits
+        client.get.return_value = _response(304)
+        self.assertIsNone(await fetch_dune_ranking(client, board))
+        self.assertEqual(client.get.call_args.kwargs["headers"]["If-None-Match"], '"v1"')
+
+        # Same execution id without ETag support is also skipped
+        client.get.return_value = _response(200, payload)
+        self.assertIsNone(await fetch_dune_ranking(client, board))
+        print("✅ Unchanged Dune results skipped")
+
+
+if __name__ == "__main__":
+    unittest.main()
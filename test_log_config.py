@@ -0,0 +1,68 @@
+import io
+import json
+import logging
+import unittest
+
+import log_config
+from log_config import JsonFormatter, SamplingFilter
+
+
+def _record(msg="Activity request for %s failed", args=("0xabc",), name="poller", level=logging.INFO, **extra):
+    record = logging.makeLogRecord({"name": name, "msg": msg, "args": args, "levelno": level,
+                                    "levelname": logging.getLevelName(level)})
+    record.__dict__.update(extra)
+    return record
+
+
+class TestLogConfig(unittest.TestCase):
+    def test_sampling_per_template(self):
+        print("\nTesting log sampling per message template...")
+        now = [0.0]
+        sampler = SamplingFilter(burst=3, window=10, clock=lambda: now[0])
+        passed = [sampler.filter(_record(args=(f"0x{i}",))) for i in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+        self.assertTrue(sampler.filter(_record(msg="Other message %s")))
+        self.assertTrue(sampler.filter(_record(name="executor")))
+        now[0] = 10
+        record = _record()
+        self.assertTrue(sampler.filter(record))
+        self.assertEqual(record.sampled_out, 7)
+        self.assertTrue(SamplingFilter(burst=0).filter(_record()))
+        print("✅ Bursts pass, repeats are dropped and counted per window")
+
+    def test_errors_never_sampled(self):
+        print("\nTesting that warnings and errors bypass sampling...")
+        sampler = SamplingFilter(burst=3, window=10, clock=lambda: 0.0)
+        errors = [_record(msg="Trade exec error for %s, %s", args=(i, "boom"), name="executor", level=logging.ERROR)
+                  for i in range(50)]
+        self.assertTrue(all(sampler.filter(record) for record in errors))
+        self.assertTrue(all(sampler.filter(_record(level=logging.WARNING)) for _ in range(10)))
+        print("✅ Every ERROR and WARNING record is kept")
+
+    def test_json_format_and_queue(self):
+        print("\nTesting JSON records through the log queue...")
+        line = JsonFormatter().format(_record(level=logging.WARNING, wallet="0xabc", trades=3))
+        entry = json.loads(line)
+        self.assertEqual(entry["msg"], "Activity request for 0xabc failed")
+        self.assertEqual((entry["logger"], entry["level"]), ("poller", "WARNING"))
+        self.assertEqual((entry["wallet"], entry["trades"]), ("0xabc", 3))
+
+        root = logging.getLogger()
+        saved = root.handlers[:], root.level
+        stream = io.StringIO()
+        try:
+            listener = log_config.setup_logging(stream)
+            logging.getLogger("poller").warning("Poll cycle took %.1fs", 2.5, extra={"wallets": 4})
+            logging.getLogger("httpx").info("HTTP Request: GET /activity")
+            listener.stop()
+        finally:
+            root.handlers[:], level = saved
+            root.setLevel(level)
+        lines = [json.loads(l) for l in stream.getvalue().splitlines()]
+        self.assertEqual(len(lines), 1)
+        self.assertEqual((lines[0]["msg"], lines[0]["wallets"]), ("Poll cycle took 2.5s", 4))
+        print("✅ Records are written as JSON by the listener thread, httpx noise filtered")
+
+
+if __name__ == "__main__":
+    unittest.main()
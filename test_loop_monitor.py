@@ -0,0 +1,44 @@
+import asyncio
+import contextlib
+import time
+import unittest
+from unittest.mock import patch
+
+from loop_monitor import LoopMonitor, configure_debug, install_event_loop_policy
+from metrics import histogram
+
+
+class TestLoopMonitor(unittest.IsolatedAsyncioTestCase):
+    async def test_lag_detected(self):
+        print("\nTesting event-loop lag detection...")
+        monitor = LoopMonitor(interval=0.005, warn_ms=30)
+        before = histogram("loop_lag").count
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.03)
+        with self.assertLogs("loop_monitor", "WARNING") as logs:
+            time.sleep(0.08)  # blocks the loop
+            await asyncio.sleep(0.03)
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+        self.assertGreaterEqual(monitor.slow, 1)
+        self.assertIn("Event loop lagged", logs.output[0])
+        self.assertGreater(histogram("loop_lag").count, before + 2)
+        self.assertIn("EventLoop", monitor.stats()["loop"])
+        print("✅ Blocking call counted as lag and logged")
+
+    async def test_debug_and_policy(self):
+        print("\nTesting loop debug mode and policy fallback...")
+        loop = asyncio.get_running_loop()
+        configure_debug(loop, debug=True)
+        self.assertTrue(loop.get_debug())
+        self.assertGreater(loop.slow_callback_duration, 0)
+        loop.set_debug(False)
+        with patch.dict("sys.modules", {"uvloop": None}):
+            self.assertEqual(install_event_loop_policy(True), "asyncio")
+        self.assertEqual(install_event_loop_policy(False), "asyncio")
+        print("✅ Debug mode enabled; missing uvloop falls back to asyncio")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.schema import CreateTable
+
+from database import Base
+from migrations import MIGRATIONS, run_migrations
+
+
+class TestMigrations(unittest.IsolatedAsyncioTestCase):
+    async def test_upgrade_existing_database(self):
+        print("\nTesting schema migrations on a pre-index database...")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            # Tables as create_all built them before the indexes existed
+            for table in ("user", "source_trader", "subscription", "trade_log"):
+                await conn.execute(CreateTable(Base.metadata.tables[table]))
+            await conn.exec_driver_sql(
+                "INSERT INTO trade_log (subscription_id, source_trade_hash, source_market_id, source_outcome_index, "
+                "source_side, copy_trade_status, created_at) VALUES "
+                "(1, 'h1', 'm', 0, 'BUY', 'SUCCESS', CURRENT_TIMESTAMP), "
+                "(1, 'h1', 'm', 0, 'BUY', 'PENDING', CURRENT_TIMESTAMP), "
+                "(1, NULL, 'm', 0, 'BUY', 'FAILED', CURRENT_TIMESTAMP), "
+                "(1, NULL, 'm', 0, 'BUY', 'FAILED', CURRENT_TIMESTAMP)")
+
+            await conn.run_sync(Base.metadata.create_all)
+            self.assertEqual(await run_migrations(conn), [v for v, _, _ in MIGRATIONS])
+            self.assertEqual(await run_migrations(conn), [])
+
+            indexes = await conn.run_sync(lambda c: {
+                ix["name"] for t in ("trade_log", "subscription") for ix in inspect(c).get_indexes(t)})
+            self.assertTrue({"uq_trade_log_sub_hash", "ix_trade_log_sub_created",
+                             "ix_subscription_trader_active", "ix_subscription_type_active"} <= indexes)
+            rows = (await conn.execute(text("SELECT copy_trade_status FROM trade_log ORDER BY id"))).scalars().all()
+            # Duplicate copy collapsed to the oldest row; rows without a hash are untouched
+            self.assertEqual(rows, ["SUCCESS", "FAILED", "FAILED"])
+        await engine.dispose()
+        print("✅ Migrations applied once and idempotently")
+
+    async def test_several_wallet_subscriptions_per_user(self):
+        print("\nTesting removal of the one-subscription-per-type constraint...")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            # subscription as originally created, with uq_user_subscriptiontype
+            await conn.exec_driver_sql("DROP TABLE subscription")
+            await conn.exec_driver_sql(
+                'CREATE TABLE subscription (id INTEGER NOT NULL, user_id BIGINT NOT NULL, '
+                'subscription_type VARCHAR NOT NULL, trader_id INTEGER, trade_amount_usdc FLOAT NOT NULL, '
+                'active BOOLEAN NOT NULL, PRIMARY KEY (id), CONSTRAINT uq_user_trader UNIQUE (user_id, trader_id), '
+                'CONSTRAINT uq_user_subscriptiontype UNIQUE (user_id, subscription_type), '
+                'FOREIGN KEY(user_id) REFERENCES "user" (telegram_user_id), '
+                'FOREIGN KEY(trader_id) REFERENCES source_trader (id))')
+            await conn.exec_driver_sql(
+                "INSERT INTO subscription VALUES (1, 7, 'WALLET', 1, 5.0, 1), (2, 7, 'TOP_PNL_1', NULL, 9.0, 1)")
+            await run_migrations(conn)
+
+            # Migration 4 added paper_trading, so columns are listed
+            columns = "(id, user_id, subscription_type, trader_id, trade_amount_usdc, active)"
+            await conn.exec_driver_sql(f"INSERT INTO subscription {columns} VALUES (3, 7, 'WALLET', 2, 5.0, 1)")
+            with self.assertRaises(IntegrityError):
+                await conn.exec_driver_sql(f"INSERT INTO subscription {columns} VALUES (4, 7, 'TOP_PNL_1', NULL, 1.0, 1)")
+            rows = (await conn.execute(text(
+                "SELECT id, trade_amount_usdc, paper_trading FROM subscription ORDER BY id"))).all()
+            self.assertEqual([tuple(r) for r in rows], [(1, 5.0, 0), (2, 9.0, 0), (3, 5.0, 0)])
+            indexes = await conn.run_sync(lambda c: {ix["name"] for ix in inspect(c).get_indexes("subscription")})
+            self.assertIn("ix_subscription_trader_active", indexes)
+        await engine.dispose()
+        print("✅ Users can follow several wallets but keep one Top PNL subscription")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.future import select
+
+os.environ.setdefault("ENCRYPTION_KEY", "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398=")
+
+import executor
+from database import Base, TradeLog, SubscriptionDailyStats
+from netting import OrderNetter, net_jobs
+from risk import ledger
+
+
+def _job(sub_id, side, amount, market="mkt1", outcome=0, user_id=1):
+    return dict(source_trade_hash=f"hash{sub_id}", source_market_id=market, source_outcome_index=outcome,
+                source_side=side, subscription_id=sub_id, user_id=user_id, trade_amount_usdc=amount)
+
+
+class TestNetting(unittest.IsolatedAsyncioTestCase):
+    def test_net_jobs(self):
+        print("\nTesting netting of copy jobs per token...")
+        orders = net_jobs([_job(1, "BUY", 10), _job(2, "SELL", 10), _job(3, "BUY", 10, market="mkt2"),
+                           _job(4, "BUY", 5, market="mkt2"), _job(5, "SELL", 3, market="mkt2"),
+                           _job(6, "SELL", 4, market="mkt2", outcome=1)])
+        self.assertEqual([(o["market_id"], o["outcome_index"], o["side"], o["amount_usdc"]) for o in orders],
+                         [("mkt1", 0, None, 0.0), ("mkt2", 0, "BUY", 12), ("mkt2", 1, "SELL", 4)])
+        self.assertEqual([j["subscription_id"] for j in orders[1]["jobs"]], [3, 4, 5])
+        print("✅ Opposing copies cancel, same-token copies merge")
+
+    async def test_netter_groups_per_user(self):
+        print("\nTesting the netting window...")
+        flush = AsyncMock(return_value=(1, 0))
+        netter = OrderNetter(flush, window=0.01)
+        for job in (_job(1, "BUY", 10), _job(2, "BUY", 5, user_id=2), dict(_job(3, "SELL", 5), enqueued_at=7.0)):
+            netter.add(job)
+        self.assertEqual(netter.pending(), (3, 7.0))
+        await netter.drain()
+        self.assertEqual(netter.pending(), (0, None))
+        batches = {c.args[0]: [j["subscription_id"] for j in c.args[1]] for c in flush.call_args_list}
+        self.assertEqual(batches, {1: [1, 3], 2: [2]})
+        self.assertEqual(netter.stats()["orders"], 2)
+        print("✅ Jobs of one user flushed together after the window")
+
+    async def test_execute_netted(self):
+        print("\nTesting netted batch execution and attribution...")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        client = MagicMock()
+        client.get_order_book.return_value = SimpleNamespace(asks=[SimpleNamespace(price="0.5")],
+                                                             bids=[SimpleNamespace(price="0.5")])
+        client.post_orders.return_value = [{"success": True, "errorMsg": "", "orderID": "0xorder"}]
+        jobs = [_job(1, "BUY", 10), _job(2, "SELL", 10), _job(3, "BUY", 10, market="mkt2"),
+                _job(4, "BUY", 5, market="mkt2")]
+        with patch("executor.AsyncSessionLocal", Session), \
+                patch("executor.load_client", new_callable=AsyncMock, return_value=client):
+            posted, offset = await executor.execute_netted(1, jobs)
+        self.assertEqual((posted, offset), (1, 2))
+        client.post_orders.assert_called_once()
+        self.assertEqual(len(client.post_orders.call_args.args[0]), 1)
+        client.create_order.assert_called_once()
+        order_args = client.create_order.call_args.args[0]
+        self.assertEqual((order_args.token_id, order_args.side), ("mkt2", "BUY"))
+        self.assertAlmostEqual(order_args.size, 15 / 0.505)
+        async with Session() as session:
+            logs = {log.subscription_id: log for log in (await session.execute(select(TradeLog))).scalars()}
+            stats = (await session.execute(select(SubscriptionDailyStats))).scalars().all()
+        self.assertEqual({s: (l.copy_trade_status, l.copy_trade_order_id) for s, l in logs.items()},
+                         {1: ("NETTED", None), 2: ("NETTED", None), 3: ("SUCCESS", "0xorder"), 4: ("SUCCESS", "0xorder")})
+        self.assertEqual(sum(s.failed_count for s in stats), 0)
+        self.assertEqual(ledger.open_orders[1], 0)
+        await engine.dispose()
+        print("✅ One batched order, every TradeLog row attributed")
+
+
+if __name__ == "__main__":
+    unittest.main()
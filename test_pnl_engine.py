@@ -0,0 +1,45 @@
+import unittest
+
+from pnl_engine import PnlEngine
+
+
+def _fill(side, size, price, ts, market="mkt1", outcome=0):
+    return {"side": side, "size": size, "price": price, "timestamp": ts, "marketId": market, "outcome": outcome}
+
+
+class TestPnlEngine(unittest.TestCase):
+    def test_realized_and_unrealized(self):
+        print("\nTesting local PNL computation...")
+        engine = PnlEngine(capacity=2)
+        engine.ingest("0xa", [
+            _fill("BUY", 100, 0.40, 1),
+            _fill("BUY", 100, 0.60, 2),
+            _fill("SELL", 50, 0.70, 3),
+        ])
+        realized, unrealized = engine.pnl()
+        # avg buy 0.50, 50 sold at 0.70 -> +10; 150 open marked at 0.70 -> +30
+        self.assertAlmostEqual(realized[0], 10.0)
+        self.assertAlmostEqual(unrealized[0], 30.0)
+        self.assertEqual(engine.n_fills, 3)
+        print("✅ Realized/unrealized PNL correct")
+
+    def test_incremental_ranking(self):
+        print("\nTesting incremental ranking...")
+        engine = PnlEngine(capacity=1)
+        engine.ingest("0xa", [_fill("BUY", 10, 0.5, 1)])
+        engine.ingest("0xb", [_fill("BUY", 10, 0.2, 1, market="mkt2")])
+        # A later fill by another wallet moves the mark of mkt1 down
+        engine.ingest("0xc", [_fill("SELL", 10, 0.1, 5), _fill("BUY", 5, 0.3, 4)])
+        self.assertEqual(engine.ranking(3)[0], "0xb")
+        # 0xb's market moves up; bad rows are ignored
+        version = engine.version
+        self.assertEqual(engine.ingest("0xb", [_fill("SELL", 5, 0.9, 6, market="mkt2"), {"side": "BUY"}]), 1)
+        self.assertEqual(engine.version, version + 1)
+        self.assertEqual(engine.ingest("0xd", [{"side": "BUY"}]), 0)
+        self.assertEqual(engine.ranking(1), ["0xb"])
+        self.assertNotIn("0xd", engine.wallets)
+        print("✅ Incremental ranking correct")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import poller
+from leaderboard import Leaderboard
+from database import Base, User, SourceTrader, Subscription
+from fake_services import serve, FakeDataApi
+
+WALLET = "0x" + "cd" * 20
+TOP_A, TOP_B = "0x" + "a1" * 20, "0x" + "b2" * 20
+
+
+class TestPollTrades(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.Session() as session:
+            session.add(User(telegram_user_id=1))
+            session.add(SourceTrader(id=1, wallet_address=WALLET))
+            session.add(Subscription(id=10, user_id=1, subscription_type="WALLET", trader_id=1, trade_amount_usdc=5.0))
+            session.add(Subscription(id=11, user_id=1, subscription_type="TOP_PNL_1", trade_amount_usdc=5.0))
+            await session.commit()
+        self.api = FakeDataApi([WALLET, TOP_A, TOP_B])
+        self.leaderboard = Leaderboard(size=1)
+        self.runner, url = await serve(self.api.app())
+        self.patches = [patch.object(poller, "AsyncSessionLocal", self.Session),
+                        patch.object(poller, "POLY_API", f"{url}/activity"),
+                        patch.object(poller, "POLL_INTERVAL", 0.01),
+                        patch.object(poller, "leaderboard", self.leaderboard)]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        await self.runner.cleanup()
+        await self.engine.dispose()
+
+    async def _collect(self, queue, count):
+        return [(await asyncio.wait_for(queue.get(), 5))["source_trade_hash"] for _ in range(count)]
+
+    async def _cursor(self):
+        async with self.Session() as session:
+            return (await session.get(SourceTrader, 1)).last_seen_trade_timestamp
+
+    async def test_every_new_trade_is_copied_oldest_first(self):
+        print("\nTesting poller picks up every new trade...")
+        history = [self.api.add_trade(WALLET) for _ in range(3)]
+        queue = asyncio.Queue()
+        task = asyncio.create_task(poller.poll_trades(queue))
+        try:
+            # The first poll only sets the cursor: earlier trades are history
+            for _ in range(500):
+                if await self._cursor() is not None:
+                    break
+                await asyncio.sleep(0.01)
+            self.assertEqual(await self._cursor(), history[-1]["timestamp"])
+            self.assertTrue(queue.empty())
+            later = [self.api.add_trade(WALLET)["transactionHash"] for _ in range(2)]
+            self.assertEqual(await self._collect(queue, 2), later)
+            await asyncio.sleep(0.05)
+            self.assertTrue(queue.empty())
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        print("✅ History skipped; new trades enqueued once, in the order they were made")
+
+    async def _polled(self, cycles=2):
+        """Wait until the poller has finished `cycles` more poll cycles."""
+        for _ in range(cycles):
+            done = poller.last_cycle_ok
+            for _ in range(500):
+                if poller.last_cycle_ok != done:
+                    break
+                await asyncio.sleep(0.01)
+
+    async def test_new_top_wallet_history_not_copied(self):
+        print("\nTesting a rank-1 change of the leaderboard...")
+        self.api.add_trade(TOP_A)
+        self.leaderboard.apply([TOP_A])
+        queue = asyncio.Queue()
+        task = asyncio.create_task(poller.poll_trades(queue))
+        try:
+            await self._polled()
+            self.api.add_trade(TOP_B)  # newer than the cursor kept for TOP_A
+            self.leaderboard.apply([TOP_B])
+            await self._polled()
+            self.assertTrue(queue.empty())
+            later = self.api.add_trade(TOP_B)["transactionHash"]
+            job = await asyncio.wait_for(queue.get(), 5)
+            self.assertEqual((job["source_trade_hash"], job["mode"]), (later, "TOP_PNL_1"))
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        print("✅ The new top wallet's earlier trades are history; only its later ones are copied")
+
+if __name__ == "__main__":
+    unittest.main()
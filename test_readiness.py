@@ -0,0 +1,131 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import poller
+import readiness
+from netting import OrderNetter
+from circuit import CircuitMonitor, CLOSED, OPEN, HALF_OPEN
+from jobs import QueueAge
+from server import build_app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitMonitor(unittest.TestCase):
+    def test_open_half_open_close(self):
+        print("\nTesting circuit states...")
+        clock = FakeClock()
+        circuit = CircuitMonitor("test", threshold=3, reset_after=10, clock=clock)
+        for _ in range(2):
+            circuit.failure()
+        circuit.success()  # a success resets the consecutive count
+        for _ in range(3):
+            self.assertEqual(circuit.state, CLOSED)
+            circuit.failure()
+        self.assertEqual(circuit.state, OPEN)
+        circuit.failure()
+        self.assertEqual(circuit.stats()["opens"], 1)  # failures while open do not reopen it
+        clock.now += 10
+        self.assertEqual(circuit.state, HALF_OPEN)
+        circuit.failure()
+        self.assertEqual(circuit.state, OPEN)
+        clock.now += 10
+        circuit.success()
+        self.assertEqual(circuit.state, CLOSED)
+        self.assertEqual(circuit.stats()["opens"], 2)
+        print("✅ Open after consecutive failures, closed after a success once half-open")
+
+
+class TestQueueAge(unittest.TestCase):
+    def test_oldest(self):
+        print("\nTesting queue age tracking...")
+        age = QueueAge()
+        self.assertIsNone(age.oldest())
+        for t in (5.0, 3.0, 3.0, 8.0):
+            age.put(t)
+        age.take(99.0)  # queued without put()
+        self.assertEqual(age.oldest(), 3.0)
+        age.take(3.0)
+        self.assertEqual(age.oldest(), 3.0)  # a second job from the same time
+        age.take(3.0)
+        self.assertEqual(age.oldest(), 5.0)
+        age.take(5.0)
+        age.take(8.0)
+        self.assertIsNone(age.oldest())
+        print("✅ Oldest enqueue time follows puts and takes in any order")
+
+
+class TestReadiness(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        Session = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.clock = FakeClock()
+        self.prober = readiness.ReadinessProber(interval=5, clock=self.clock)
+        self.queue = asyncio.Queue()
+        self.queue_age = QueueAge()
+        self.prober.watch_queue(self.queue, self.queue_age)
+        self.patches = [patch.object(readiness, "AsyncSessionLocal", Session),
+                        patch.object(readiness, "readiness", self.prober),
+                        patch.object(poller, "last_cycle_ok", self.clock.now)]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        await self.engine.dispose()
+
+    async def test_probe(self):
+        print("\nTesting readiness probes...")
+        self.assertFalse(self.prober.current()["ready"])  # nothing probed yet
+        self.prober.report = await self.prober.probe()
+        self.prober.probed_at = self.clock.now
+        report = self.prober.current()
+        self.assertTrue(report["ready"], report["failing"])
+        self.assertIsNotNone(report["db"]["rtt_ms"])
+        self.assertEqual(report["circuits"], {"data_api": CLOSED, "clob": CLOSED})
+
+        for enqueued_at in (self.clock.now, self.clock.now - 400):  # a split fan-out put back at the tail
+            self.queue.put_nowait({"enqueued_at": enqueued_at})
+            self.queue_age.put(enqueued_at)
+        netter = OrderNetter(None, window=1)
+        netter._pending[(1, False)] = [{"enqueued_at": self.clock.now - 500}]
+        self.prober.watch_netter(netter)
+        self.clock.now += readiness.READY_MAX_POLL_AGE + 1
+        report = await self.prober.probe()
+        self.assertFalse(report["ready"])
+        self.assertEqual((report["queue"]["depth"], report["queue"]["held_for_netting"]), (3, 1))
+        self.assertGreater(report["queue"]["oldest_job_age_seconds"], 500)  # held jobs count too
+        self.assertEqual([f.split(":")[0] for f in report["failing"]], ["poller", "queue"])
+        print("✅ Stalled poller and old queued jobs make the instance not ready")
+
+    async def test_ready_endpoint_serves_cache(self):
+        print("\nTesting /ready...")
+        async with TestClient(TestServer(build_app())) as client:
+            resp = await client.get("/ready")
+            self.assertEqual(resp.status, 503)
+            self.prober.report = await self.prober.probe()
+            self.prober.probed_at = self.clock.now
+            with patch.object(self.prober, "probe", side_effect=AssertionError("probed on request")):
+                resp = await client.get("/ready")
+                self.assertEqual(resp.status, 200)
+                self.assertTrue((await resp.json())["ready"])
+                self.clock.now += 16  # the prober stopped refreshing
+                resp = await client.get("/ready")
+                self.assertEqual(resp.status, 503)
+                self.assertIn("readiness", (await resp.json())["failing"][-1])
+        print("✅ /ready answers from the cached report, 503 when it is stale")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.future import select
+
+import repository
+from database import Base, User, SourceTrader, Subscription, TradeLog
+
+WALLET = "0x" + "ab" * 20
+
+
+def _pending(sub_id, trade_hash="0xhash"):
+    return dict(subscription_id=sub_id, source_trade_hash=trade_hash, source_market_id="mkt1",
+                source_outcome_index=0, source_side="BUY", copy_trade_status="PENDING")
+
+
+class TestRepository(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.Session() as session:
+            session.add_all([User(telegram_user_id=1), User(telegram_user_id=2),
+                             SourceTrader(id=1, wallet_address=WALLET, last_seen_trade_timestamp=5)])
+            await session.flush()
+            session.add_all([
+                Subscription(id=10, user_id=1, subscription_type="WALLET", trader_id=1, trade_amount_usdc=5.0),
+                Subscription(id=11, user_id=2, subscription_type="WALLET", trader_id=1, paper_trading=True),
+                Subscription(id=12, user_id=2, subscription_type="TOP_PNL_1", active=False),
+            ])
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_poller_reads_and_cursor(self):
+        print("\nTesting poller queries of the repository...")
+        async with self.Session() as session:
+            (trader,) = await repository.load_traders(session)
+            self.assertEqual((trader.id, trader.wallet_address, trader.last_seen_trade_timestamp), (1, WALLET, 5))
+            self.assertEqual(await repository.load_traders(session, ["0xother"]), [])
+            subs = await repository.active_subscribers(session, 1)
+            self.assertEqual([tuple(s) for s in subs], [(10, 1, 5.0, False), (11, 2, 10.0, True)])
+            self.assertEqual(await repository.active_subscribers(session), [])  # TOP_PNL_1 row is inactive
+            await repository.advance_cursor(session, 1, 99)
+            await session.commit()
+        async with self.Session() as session:
+            self.assertEqual((await repository.load_traders(session, [WALLET]))[0].last_seen_trade_timestamp, 99)
+            self.assertIsNone(await repository.user_keys(session, 1))
+        print("✅ Traders, subscribers and cursor updates go through Core statements")
+
+    async def test_copy_logs(self):
+        print("\nTesting pending inserts and outcome writes...")
+        async with self.Session() as session:
+            self.assertEqual(await repository.insert_pending(session, [_pending(10), _pending(11)]), {10, 11})
+            self.assertEqual(await repository.insert_pending(session, [_pending(10), _pending(11, "0xnew")]), {11})
+            await session.commit()
+        copy = dict(source_trade_hash="0xhash", source_market_id="mkt1", source_outcome_index=0, source_side="BUY")
+        async with self.Session() as session:
+            previous = await repository.record_copies(session, [
+                dict(copy, subscription_id=10, status="SIMULATED", order_id="sim-1", size=20.0, price=0.5),
+                dict(copy, subscription_id=11, status="FAILED", error="boom"),
+                dict(copy, subscription_id=10, source_trade_hash="0xother", status="SUCCESS", order_id="0x1"),
+            ])
+            self.assertEqual(previous, ["PENDING", "PENDING", None])
+            # A later write without order id or fill keeps the stored ones
+            self.assertEqual(await repository.record_copies(session, [dict(copy, subscription_id=10, status="FAILED")]),
+                             ["SIMULATED"])
+            await session.commit()
+        async with self.Session() as session:
+            rows = (await session.execute(select(
+                TradeLog.subscription_id, TradeLog.source_trade_hash, TradeLog.copy_trade_status,
+                TradeLog.copy_trade_order_id, TradeLog.error_message, TradeLog.filled_size, TradeLog.fill_price
+            ).order_by(TradeLog.id))).all()
+        self.assertEqual([tuple(r) for r in rows], [
+            (10, "0xhash", "FAILED", "sim-1", None, 20.0, 0.5),
+            (11, "0xhash", "FAILED", None, "boom", None, None),
+            (11, "0xnew", "PENDING", None, None, None, None),
+            (10, "0xother", "SUCCESS", "0x1", None, None, None),
+        ])
+        print("✅ Outcomes update existing rows in one executemany and insert the missing ones")
+
+
+if __name__ == "__main__":
+    unittest.main()
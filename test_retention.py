@@ -0,0 +1,101 @@
+import unittest
+import os
+import tempfile
+from datetime import datetime, timedelta
+from functools import partial
+from unittest.mock import patch
+from sqlalchemy import func
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+os.environ.setdefault("ENCRYPTION_KEY", "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398=")
+
+import bot
+import retention
+import risk
+from database import Base, User, Subscription, TradeLog
+
+ROWS = [
+    # hash, subscription, market, side, status, age in days
+    ("h0", 1, "closed", "BUY", "SUCCESS", 100),
+    ("h1", 2, "closed", "SELL", "SUCCESS", 101),  # user 1 is flat in "closed": both rows can go
+    ("h2", 1, "open", "BUY", "SUCCESS", 102),     # still counts toward exposure
+    ("h3", 2, "open", "BUY", "FAILED", 103),      # never counted
+    ("h4", 1, "late", "SELL", "SUCCESS", 104),    # offsets the recent BUY below
+    ("h5", 1, "late", "BUY", "SUCCESS", 1),
+    ("h6", 2, "open", "BUY", "SUCCESS", 2),
+]
+
+
+class TestRetention(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.archive_dir = tempfile.mkdtemp()
+        now = datetime.utcnow()
+        async with self.Session() as session:
+            session.add(User(telegram_user_id=1))
+            session.add_all([Subscription(id=1, user_id=1, subscription_type="WALLET", trade_amount_usdc=10.0),
+                             Subscription(id=2, user_id=1, subscription_type="TOP_PNL_1", trade_amount_usdc=10.0)])
+            for trade_hash, sub_id, market, side, status, age in ROWS:
+                session.add(TradeLog(subscription_id=sub_id, source_trade_hash=trade_hash, source_market_id=market,
+                                     source_outcome_index=0, source_side=side, copy_trade_status=status,
+                                     created_at=now - timedelta(days=age)))
+            await session.commit()
+        self.patchers = [patch("retention.AsyncSessionLocal", self.Session),
+                         patch("risk.AsyncSessionLocal", self.Session)]
+        for p in self.patchers:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patchers:
+            p.stop()
+        await self.engine.dispose()
+
+    async def _exposure(self):
+        ledger = risk.ExposureLedger()
+        await ledger.rebuild()
+        return {key: value for key, value in ledger.market_exposure.items() if value}
+
+    async def test_archive_and_read_back(self):
+        print("\nTesting TradeLog archival...")
+        exposure = await self._exposure()
+        self.assertEqual(exposure, {(1, "open"): 20.0})
+        moved = await retention.archive_older_than(days=90, batch_size=2, archive_dir=self.archive_dir, pause=0)
+        self.assertEqual(moved, 3)
+        self.assertEqual(len(os.listdir(self.archive_dir)), 2)
+        async with self.Session() as session:
+            hot = (await session.execute(select(TradeLog.source_trade_hash).order_by(TradeLog.id))).scalars().all()
+        self.assertEqual(hot, ["h2", "h4", "h5", "h6"])
+        self.assertEqual(await self._exposure(), exposure)  # a restart restores the same caps
+
+        archived = list(retention.read_archive(self.archive_dir, subscription_ids=[1]))
+        self.assertEqual([r["source_trade_hash"] for r in archived], ["h0"])
+        # Date pruning skips everything older than the window
+        recent = datetime.utcnow() - timedelta(days=10)
+        self.assertEqual(list(retention.read_archive(self.archive_dir, since=recent)), [])
+
+        async with self.Session() as session:
+            history = await retention.query_history(session, [1, 2], limit=6, archive_dir=self.archive_dir)
+        self.assertEqual([r["source_trade_hash"] for r in history], ["h5", "h6", "h2", "h4", "h0", "h1"])
+        print("✅ Settled and failed rows archived and still queryable; open exposure kept")
+
+    async def test_status_reads_archive(self):
+        print("\nTesting /status after archival...")
+        async with self.Session() as session:
+            await session.execute(TradeLog.__table__.delete().where(TradeLog.source_trade_hash.notin_(["h0", "h1"])))
+            await session.commit()
+        await retention.archive_older_than(days=90, archive_dir=self.archive_dir, pause=0)
+        async with self.Session() as session:
+            self.assertEqual(await session.scalar(select(func.count()).select_from(TradeLog)), 0)
+            with patch.object(bot, "query_history", partial(retention.query_history, archive_dir=self.archive_dir)):
+                msg, _ = await bot.render_status(session, 1)
+        self.assertEqual(msg.count("Status: SUCCESS"), 2)
+        print("✅ /status shows trades that were moved to the archive")
+
+
+if __name__ == "__main__":
+    unittest.main()
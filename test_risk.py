@@ -0,0 +1,82 @@
+import unittest
+from datetime import date
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, User, Subscription, TradeLog
+from risk import ExposureLedger
+
+
+class TestExposureLedger(unittest.IsolatedAsyncioTestCase):
+    def test_caps_resize_and_reject(self):
+        print("\nTesting risk caps...")
+        ledger = ExposureLedger(daily_cap=25.0, subscription_daily_cap=None, market_cap=15.0,
+                                max_open_orders=2, min_order=1.0)
+        self.assertEqual(ledger.reserve(1, 10, "mkt1", "BUY", 10.0), (10.0, None))
+        # Market cap resizes the second order
+        amount, reason = ledger.reserve(1, 10, "mkt1", "BUY", 10.0)
+        self.assertEqual(amount, 5.0)
+        self.assertIn("market cap", reason)
+        # Two orders in flight -> rejected
+        amount, reason = ledger.reserve(1, 10, "mkt2", "BUY", 5.0)
+        self.assertEqual(amount, 0.0)
+        self.assertIn("in flight", reason)
+        ledger.settle(1, 10, "mkt1", "BUY", 5.0, filled=False)
+        ledger.settle(1, 10, "mkt1", "BUY", 10.0, filled=True)
+        self.assertEqual(ledger.user_spend[1], 10.0)
+        # Daily cap leaves 15, market cap on mkt1 leaves 5
+        self.assertEqual(ledger.reserve(1, 10, "mkt2", "BUY", 20.0)[0], 15.0)
+        ledger.settle(1, 10, "mkt2", "BUY", 15.0, filled=True)
+        amount, reason = ledger.reserve(1, 10, "mkt3", "BUY", 5.0)
+        self.assertEqual(amount, 0.0)
+        self.assertIn("daily cap", reason)
+        # Sells are never capped and reduce exposure
+        self.assertEqual(ledger.reserve(1, 10, "mkt1", "SELL", 4.0), (4.0, None))
+        ledger.settle(1, 10, "mkt1", "SELL", 4.0, filled=True)
+        self.assertEqual(ledger.market_exposure[(1, "mkt1")], 6.0)
+        # A new day resets spend but not exposure
+        ledger._roll_day(date(2100, 1, 1))
+        self.assertEqual(ledger.user_spend[1], 0.0)
+        self.assertEqual(ledger.market_exposure[(1, "mkt1")], 6.0)
+        print("✅ Risk caps enforced")
+
+    def test_minimum_order(self):
+        print("\nTesting the minimum order size...")
+        self.assertEqual(ExposureLedger(None, None, None, None, min_order=0.0).reserve(1, 10, "m", "BUY", 0.5),
+                         (0.5, None))
+        ledger = ExposureLedger(daily_cap=None, subscription_daily_cap=None, market_cap=10.5,
+                                max_open_orders=None, min_order=1.0)
+        self.assertEqual(ledger.reserve(1, 10, "m", "BUY", 0.5), (0.0, "Order of $0.50 is below the minimum of $1.00."))
+        self.assertEqual(ledger.reserve(1, 10, "m", "BUY", 10.0)[0], 10.0)
+        amount, reason = ledger.reserve(1, 10, "m", "BUY", 10.0)
+        self.assertEqual(amount, 0.0)
+        self.assertTrue(reason.startswith("Risk limit: market cap") and "below the minimum" in reason, reason)
+        print("✅ Small orders pass by default and rejections always carry a reason")
+
+    async def test_rebuild_from_trade_log(self):
+        print("\nTesting ledger rebuild...")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with Session() as session:
+            session.add(User(telegram_user_id=1))
+            session.add(Subscription(id=10, user_id=1, subscription_type="WALLET", trade_amount_usdc=10.0))
+            for side, status in [("BUY", "SUCCESS"), ("BUY", "SUCCESS"), ("SELL", "SUCCESS"), ("BUY", "FAILED")]:
+                session.add(TradeLog(subscription_id=10, source_market_id="mkt1", source_outcome_index=0,
+                                     source_side=side, copy_trade_status=status))
+            await session.commit()
+
+        ledger = ExposureLedger(daily_cap=None, subscription_daily_cap=None, market_cap=None, max_open_orders=None)
+        with patch("risk.AsyncSessionLocal", Session):
+            await ledger.rebuild()
+        self.assertEqual(ledger.user_spend[1], 20.0)
+        self.assertEqual(ledger.sub_spend[10], 20.0)
+        self.assertEqual(ledger.market_exposure[(1, "mkt1")], 10.0)
+        await engine.dispose()
+        print("✅ Ledger rebuilt from TradeLog")
+
+
+if __name__ == "__main__":
+    unittest.main()
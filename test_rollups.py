@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, User, Subscription, SubscriptionDailyStats, TradeLog
+from rollups import record_outcome, user_stats, backfill
+
+
+class TestRollups(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        async with self.Session() as session:
+            session.add(User(telegram_user_id=1))
+            session.add(Subscription(id=10, user_id=1, subscription_type="WALLET", trade_amount_usdc=5.0))
+            await session.commit()
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    async def test_incremental_updates(self):
+        print("\nTesting stats rollup updates...")
+        async with self.Session() as session:
+            await record_outcome(session, 10, 1, "SUCCESS", 12.5)
+            await record_outcome(session, 10, 1, "FAILED", 12.5, "Insufficient balance")
+            await record_outcome(session, 10, 1, "SUCCESS", 7.5)
+            await session.commit()
+            rows = await user_stats(session, 1)
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row.success_count, row.failed_count, row.volume_usdc), (2, 1, 20.0))
+        self.assertEqual(row.last_error, "Insufficient balance")
+        print("✅ Rollups updated incrementally")
+
+    async def test_backfill(self):
+        print("\nTesting stats backfill from TradeLog...")
+        async with self.Session() as session:
+            for i, status in enumerate(["SUCCESS", "SUCCESS", "FAILED", "PENDING"]):
+                session.add(TradeLog(subscription_id=10, source_trade_hash=f"h{i}", source_market_id="m",
+                                     source_outcome_index=0, source_side="BUY", copy_trade_status=status,
+                                     created_at=datetime(2025, 3, 1, 12)))
+            await session.commit()
+        async with self.engine.begin() as conn:
+            await backfill(conn)
+        async with self.Session() as session:
+            row = await session.get(SubscriptionDailyStats, (10, datetime(2025, 3, 1).date()))
+        self.assertEqual((row.user_id, row.success_count, row.failed_count, row.volume_usdc), (1, 2, 1, 10.0))
+        print("✅ Rollups backfilled")
+
+
+if __name__ == "__main__":
+    unittest.main()
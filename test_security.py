@@ -0,0 +1,82 @@
+import base64
+import os
+import unittest
+from unittest.mock import patch
+from cryptography.fernet import Fernet, MultiFernet
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import sessionmaker
+
+os.environ.setdefault("ENCRYPTION_KEY", "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398=")
+
+import key_rotation
+import security
+from database import Base, User, UserKeys
+
+OLD = Fernet(Fernet.generate_key())
+NEW = Fernet(Fernet.generate_key())
+
+
+def legacy(f: Fernet, data: str) -> str:
+    """A value in the original double-encoded format."""
+    return base64.urlsafe_b64encode(f.encrypt(data.encode())).decode()
+
+
+def v2(f: Fernet, data: str) -> str:
+    return security.V2_PREFIX + f.encrypt(data.encode()).decode()
+
+
+class TestSecurity(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # NEW is the current key, OLD a retired one listed in ENCRYPTION_OLD_KEYS
+        self.keys = patch.multiple(security, fernet=NEW, keyring=MultiFernet([NEW, OLD]))
+        self.keys.start()
+
+    def tearDown(self):
+        self.keys.stop()
+
+    def test_formats(self):
+        print("\nTesting v2 credential format...")
+        value = security.encrypt_data("secret")
+        self.assertTrue(value.startswith("v2:"))
+        self.assertLess(len(value), len(legacy(NEW, "secret")))
+        self.assertEqual(security.decrypt_data(value), "secret")
+        self.assertEqual(security.decrypt_data(legacy(OLD, "old-secret")), "old-secret")
+        self.assertIsNone(security.reencrypt_data(value))
+        rotated = security.reencrypt_data(legacy(OLD, "old-secret"))
+        self.assertEqual(NEW.decrypt(rotated[3:].encode()), b"old-secret")
+        with self.assertRaises(ValueError):
+            security.decrypt_data(v2(Fernet(Fernet.generate_key()), "unknown key"))
+        print("✅ v2 written, original format and retired keys still read")
+
+    async def test_rotation_in_batches(self):
+        print("\nTesting batched key rotation...")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        lost = Fernet(Fernet.generate_key())  # a key that is in neither ENCRYPTION_KEY nor ENCRYPTION_OLD_KEYS
+        encoders = {0: lambda s: v2(lost, s), 1: lambda s: legacy(OLD, s), 2: lambda s: legacy(NEW, s),
+                    3: lambda s: v2(OLD, s), 4: lambda s: v2(NEW, s), 5: lambda s: v2(OLD, s)}
+        async with Session() as session:
+            for user_id, encode in encoders.items():
+                session.add(User(telegram_user_id=user_id))
+                session.add(UserKeys(user_id=user_id, api_key=encode(f"k{user_id}"),
+                                     api_secret=encode(f"s{user_id}"), api_passphrase=encode(f"p{user_id}")))
+            await session.commit()
+
+        with patch.object(key_rotation, "AsyncSessionLocal", Session):
+            self.assertEqual(await key_rotation.rotate_all(batch_size=2, pause=0), 4)
+            self.assertEqual(await key_rotation.rotate_all(batch_size=2, pause=0), 0)
+        async with Session() as session:
+            rows = (await session.execute(select(UserKeys).order_by(UserKeys.user_id))).scalars().all()
+        self.assertEqual(lost.decrypt(rows.pop(0).api_key[3:].encode()), b"k0")  # left as it was
+        for row in rows:
+            self.assertEqual(NEW.decrypt(row.api_key[3:].encode()).decode(), f"k{row.user_id}")
+            self.assertEqual(security.decrypt_data(row.api_passphrase), f"p{row.user_id}")
+        await engine.dispose()
+        print("✅ All readable rows re-encrypted under the current key, idempotently; an unreadable one skipped")
+
+
+if __name__ == "__main__":
+    unittest.main()
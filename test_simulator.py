@@ -0,0 +1,92 @@
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.future import select
+
+os.environ.setdefault("ENCRYPTION_KEY", "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398=")
+
+import executor
+import poller
+from database import Base, User, SourceTrader, Subscription, TradeLog
+from jobs import expand_fanout
+from risk import ledger
+from simulator import SimulatedExchange
+
+WALLET = "0x" + "ef" * 20
+
+
+def _write_books(path, snapshots):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"version": 1, "recorded_at": "", "tokens": ["tok"]}) + "\n")
+        for snap in snapshots:
+            f.write(json.dumps(snap) + "\n")
+
+
+class TestSimulatedExchange(unittest.IsolatedAsyncioTestCase):
+    def test_fills_against_replayed_books(self):
+        print("\nTesting simulated fills against a replayed book...")
+        now = [0.0]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/books.ndjson.gz"
+            _write_books(path, [
+                {"t": 0, "token_id": "tok", "bids": [[0.48, 100], [0.47, 100]], "asks": [[0.50, 100], [0.52, 100]]},
+                {"t": 10, "token_id": "tok", "bids": [[0.58, 100]], "asks": [[0.60, 100]]},
+            ])
+            sim = SimulatedExchange(source=path, latency=0, clock=lambda: now[0])
+        full = sim.create_and_post_order("tok", 0.51, "BUY", 80)
+        self.assertEqual((full["status"], full["size_matched"], full["avg_price"]), ("matched", 80, 0.50))
+        partial = sim.create_and_post_order("tok", 0.53, "BUY", 250)
+        self.assertEqual((partial["status"], partial["size_matched"]), ("partially_filled", 200))
+        self.assertAlmostEqual(partial["avg_price"], 0.51)
+        self.assertFalse(sim.create_and_post_order("tok", 0.50, "SELL", 10)["success"])
+        now[0] = 11
+        self.assertEqual(sim.get_order_book("tok").asks[0].price, "0.6")
+        self.assertIn("asks", sim.book("other-token"))  # unknown tokens get a synthetic book
+        self.assertEqual(sim.stats()["partial"], 1)
+        print("✅ Full, partial and unfilled orders; books advance with the recording")
+
+    async def test_paper_subscription_end_to_end(self):
+        print("\nTesting a paper-trading subscription through poller and executor...")
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        Session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with Session() as session:
+            session.add_all([User(telegram_user_id=1), User(telegram_user_id=2),
+                             SourceTrader(id=1, wallet_address=WALLET, last_seen_trade_timestamp=0),
+                             Subscription(id=10, user_id=1, subscription_type="WALLET", trader_id=1,
+                                          trade_amount_usdc=5.0, paper_trading=True),
+                             Subscription(id=11, user_id=2, subscription_type="WALLET", trader_id=1,
+                                          trade_amount_usdc=5.0)])
+            await session.commit()
+            trader = await session.get(SourceTrader, 1)
+        trade = {"transactionHash": "0xabc", "timestamp": 1, "marketId": "tok", "outcome": 0, "side": "BUY"}
+        queue = asyncio.Queue()
+        sim = SimulatedExchange(source="synthetic", latency=0)
+        with patch.object(poller, "AsyncSessionLocal", Session), patch.object(executor, "AsyncSessionLocal", Session), \
+                patch("simulator._exchange", sim):
+            await poller.ingest_activity(WALLET, [trade], queue, src_trader=trader)
+            jobs = [queue.get_nowait() for _ in range(queue.qsize())]
+            self.assertEqual([(j.get("paper_trading", False), j["targets"]["user_id"].tolist()) for j in jobs],
+                             [(False, [2]), (True, [1])])
+            (paper_job,) = expand_fanout(jobs[1])
+            budget = (ledger.open_orders[1], ledger.user_spend[1])
+            await executor.execute_job(paper_job)
+        async with Session() as session:
+            log = (await session.execute(select(TradeLog))).scalar_one()
+        self.assertEqual((log.subscription_id, log.copy_trade_status), (10, "SIMULATED"))
+        self.assertTrue(log.copy_trade_order_id.startswith("sim-"))
+        self.assertAlmostEqual(log.filled_size * log.fill_price, 5.0, delta=0.1)
+        self.assertEqual((ledger.open_orders[1], ledger.user_spend[1]), budget)
+        await engine.dispose()
+        print("✅ Paper copies filled by the simulator without keys or risk budget")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import unittest
+
+from benchmarks.bench_startup import measure_imports, cumulative_ms, DEFERRED_MODULES, STARTUP_BUDGET_MS
+
+
+class TestStartup(unittest.TestCase):
+    def test_import_budget(self):
+        print("\nTesting cold import of main...")
+        entries = measure_imports("main")
+        names = {name for _, _, name in entries}
+        for module in DEFERRED_MODULES:
+            self.assertNotIn(module, names, f"{module} should be imported on first use")
+        self.assertNotIn("aiosqlite", names, "the engine should be created by init_db")
+        elapsed = cumulative_ms(entries, "main")
+        self.assertLess(elapsed, STARTUP_BUDGET_MS)
+        print(f"✅ import main took {elapsed:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import asyncio
+from types import SimpleNamespace
+
+from update_processor import PerUserUpdateProcessor
+
+
+def _update(user_id):
+    return SimpleNamespace(effective_chat=SimpleNamespace(id=user_id), effective_user=SimpleNamespace(id=user_id))
+
+
+class TestPerUserUpdateProcessor(unittest.IsolatedAsyncioTestCase):
+    async def test_serializes_per_user_and_bounds_concurrency(self):
+        print("\nTesting per-user update serialization...")
+        processor = PerUserUpdateProcessor(max_running=3, max_pending=100)
+        running = {"now": 0, "max": 0}
+        active_users = set()
+        order = []
+
+        async def handle(user_id, n):
+            self.assertNotIn(user_id, active_users, "two updates of one user ran concurrently")
+            active_users.add(user_id)
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.01)
+            order.append((user_id, n))
+            running["now"] -= 1
+            active_users.discard(user_id)
+
+        await asyncio.gather(*(
+            processor.process_update(_update(user), handle(user, n))
+            for n in range(4) for user in range(6)
+        ))
+        self.assertEqual(running["max"], 3)
+        for user in range(6):
+            self.assertEqual([n for u, n in order if u == user], [0, 1, 2, 3])
+        self.assertEqual(processor._locks, {})
+        print("✅ Updates serialized per user with bounded concurrency")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+os.environ.setdefault("ENCRYPTION_KEY", "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398=")
+
+import bot
+from database import Base
+from view_cache import ViewCache
+
+WALLET = "0x" + "ab" * 20
+
+
+def _update(user_id=1):
+    message = SimpleNamespace(reply_text=AsyncMock())
+    return SimpleNamespace(message=message, callback_query=None,
+                           effective_user=SimpleNamespace(id=user_id, username="tester"))
+
+
+class TestViewCache(unittest.TestCase):
+    def test_ttl_invalidate_and_stats(self):
+        print("\nTesting view cache expiry and invalidation...")
+        now = [0.0]
+        cache = ViewCache(ttl=10, clock=lambda: now[0])
+        self.assertIsNone(cache.get(1, "subs"))
+        cache.set(1, "subs", "a")
+        cache.set(1, "status", "b")
+        cache.set(2, "subs", "c")
+        self.assertEqual(cache.get(1, "subs"), "a")
+        cache.invalidate(1, "subs")
+        self.assertIsNone(cache.get(1, "subs"))
+        self.assertEqual(cache.get(1, "status"), "b")
+        cache.invalidate(1)
+        self.assertIsNone(cache.get(1, "status"))
+        now[0] = 11
+        self.assertIsNone(cache.get(2, "subs"))
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 0)
+        self.assertEqual(stats["views"]["subs"], {"hits": 1, "misses": 3, "hit_rate": 0.25})
+        print("✅ Entries expire and invalidate per user and view")
+
+
+class TestReadThroughViews(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.Session = sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        self.cache = ViewCache(ttl=60)
+        self.patches = [patch.object(bot, "AsyncSessionLocal", self.Session),
+                        patch.object(bot, "view_cache", self.cache)]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        for p in self.patches:
+            p.stop()
+        await self.engine.dispose()
+
+    async def test_list_is_cached_until_subscriptions_change(self):
+        print("\nTesting /list read-through cache...")
+        await bot.copy_wallet(_update(), SimpleNamespace(args=[WALLET, "5"]))
+        first = _update()
+        await bot.list_subscriptions(first, None)
+        second = _update()
+        await bot.list_subscriptions(second, None)
+        self.assertEqual(first.message.reply_text.call_args, second.message.reply_text.call_args)
+        self.assertEqual(self.cache.hits["subs"], 1)
+
+        await bot.config_wallet(_update(), SimpleNamespace(args=[WALLET, "7"]))
+        third = _update()
+        await bot.list_subscriptions(third, None)
+        self.assertIn("$7.00", third.message.reply_text.call_args.args[0])
+        self.assertEqual(self.cache.misses["subs"], 2)
+        print("✅ /list served from cache and refreshed after /config_wallet")
+
+
+if __name__ == "__main__":
+    unittest.main()
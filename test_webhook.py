@@ -0,0 +1,60 @@
+import os
+import unittest
+import asyncio
+from unittest.mock import MagicMock, patch
+from aiohttp.test_utils import TestServer
+from telegram import Bot
+
+from server import build_app, WEBHOOK_PATH
+from fake_services import FakeUpdateSender
+
+
+class TestWebhook(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.application = MagicMock()
+        self.application.bot = Bot("123456:TEST")
+        self.application.update_queue = asyncio.Queue()
+        self.server = TestServer(build_app(self.application, "s3cret"))
+        await self.server.start_server()
+        self.url = str(self.server.make_url(WEBHOOK_PATH))
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_update_reaches_queue(self):
+        print("\nTesting webhook update delivery...")
+        status = await FakeUpdateSender(self.url, "s3cret").send("/status", user_id=42)
+        self.assertEqual(status, 200)
+        update = self.application.update_queue.get_nowait()
+        self.assertEqual(update.message.text, "/status")
+        self.assertEqual(update.effective_user.id, 42)
+        self.assertEqual(update.message.entities[0].type, "bot_command")
+        print("✅ Webhook update queued")
+
+    async def test_wrong_secret_rejected(self):
+        print("\nTesting webhook secret verification...")
+        status = await FakeUpdateSender(self.url, "wrong").send("/status", user_id=42)
+        self.assertEqual(status, 403)
+        self.assertTrue(self.application.update_queue.empty())
+        print("✅ Wrong secret rejected")
+
+    def test_secret_required(self):
+        with self.assertRaises(ValueError):
+            build_app(self.application, None)
+
+    async def test_missing_secret_fails_before_start(self):
+        print("\nTesting webhook configuration check at startup...")
+        os.environ.setdefault("ENCRYPTION_KEY", "0SoYb1MCRG5oyyZZaqKqyGBkHV-hxdj40JLjgPxn398=")
+        import main
+        env = {"TELEGRAM_WEBHOOK_URL": "https://bot.example.com", "TELEGRAM_WEBHOOK_SECRET": ""}
+        with patch.dict(os.environ, env), patch.object(main, "load_dotenv"), \
+                patch.object(main, "setup_logging") as setup_logging, patch.object(main, "Application") as app:
+            with self.assertRaises(ValueError):
+                await main.main()
+        setup_logging.assert_not_called()
+        app.builder.assert_not_called()
+        print("✅ Missing secret rejected before the Application is built")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import asyncio
+import os
+from telegram.ext import BaseUpdateProcessor
+
+# Handlers running at the same time across all users
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "64"))
+# Updates accepted (running or waiting behind the same user) before new ones queue in the Application
+MAX_PENDING_UPDATES = int(os.getenv("MAX_PENDING_UPDATES", "4096"))
+
+
+def update_key(update: object):
+    """Serialization key of an update: its chat, else its user, else None (no ordering needed)."""
+    chat = getattr(update, "effective_chat", None)
+    if chat is not None:
+        return chat.id
+    user = getattr(update, "effective_user", None)
+    return user.id if user is not None else None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently while keeping each chat's updates in order.
+
+    Multi-step flows such as add_keys_conv rely on a user's messages being
+    handled one after another, so updates with the same key wait on a
+    per-key lock. Only updates that hold their lock count against
+    `max_running`; a user who sends a burst does not take slots from others.
+    """
+
+    def __init__(self, max_running: int = MAX_CONCURRENT_UPDATES, max_pending: int = MAX_PENDING_UPDATES):
+        super().__init__(max(max_pending, max_running))
+        self.max_running = max_running
+        self._running = asyncio.BoundedSemaphore(max_running)
+        self._locks: dict[object, list] = {}  # key -> [lock, number of updates using it]
+
+    async def do_process_update(self, update, coroutine) -> None:
+        key = update_key(update)
+        if key is None:
+            async with self._running:
+                await coroutine
+            return
+        entry = self._locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._running:
+                    await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
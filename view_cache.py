@@ -0,0 +1,57 @@
+import os
+import time
+from collections import defaultdict
+import metrics
+
+VIEW_CACHE_TTL = float(os.getenv("VIEW_CACHE_TTL_SECONDS", "60"))
+
+
+class ViewCache:
+    """Per-user read-through cache for bot views.
+
+    Holds rendered /list, /status and /stats replies plus a flag for
+    whether the user row exists. Entries expire after `ttl` seconds. They are
+    also dropped explicitly when a command changes the user's subscriptions or
+    an executor outcome is written.
+    """
+
+    def __init__(self, ttl: float = VIEW_CACHE_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: dict[tuple, tuple[float, object]] = {}  # (user_id, view) -> (expires_at, value)
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def get(self, user_id, view):
+        entry = self._entries.get((user_id, view))
+        if entry is not None and entry[0] > self._clock():
+            self.hits[view] += 1
+            return entry[1]
+        if entry is not None:
+            del self._entries[(user_id, view)]
+        self.misses[view] += 1
+        return None
+
+    def set(self, user_id, view, value) -> None:
+        self._entries[(user_id, view)] = (self._clock() + self.ttl, value)
+
+    def invalidate(self, user_id, *views) -> None:
+        """Drop the given views of a user, or all of them when none are named."""
+        if views:
+            for view in views:
+                self._entries.pop((user_id, view), None)
+        else:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        views = {}
+        for view in set(self.hits) | set(self.misses):
+            total = self.hits[view] + self.misses[view]
+            views[view] = {"hits": self.hits[view], "misses": self.misses[view],
+                           "hit_rate": round(self.hits[view] / total, 4) if total else 0.0}
+        return {"entries": len(self._entries), "views": views}
+
+
+view_cache = ViewCache()
+metrics.register("view_cache", view_cache.stats)